@@ -0,0 +1 @@
+"""Benchmarks for cfg_load; run them with `make bench`."""
@@ -0,0 +1,168 @@
+"""Benchmark the transformations and the Configuration class."""
+
+# Core Library
+import os
+import pickle
+from copy import deepcopy
+from typing import Any, Dict
+from unittest.mock import patch
+
+# Third party
+import pytest
+
+# First party
+import cfg_load
+import cfg_load.paths
+from benchmarks.synthetic import make_env_mapping
+
+
+def test_make_paths_absolute(benchmark, synthetic):
+    name, config = synthetic
+    benchmark.group = f"paths-{name}"
+    benchmark.pedantic(
+        cfg_load.paths.make_paths_absolute,
+        setup=lambda: (("/srv/app", deepcopy(config)), {}),
+        rounds=20,
+    )
+
+
+def _make_paths_absolute_recursive(dir_: str, cfg: Dict) -> Dict:
+    """The implementation of cfg_load 0.9, as a baseline."""
+    if hasattr(cfg, "keys"):
+        for key in cfg.keys():
+            if hasattr(key, "endswith"):
+                if key.startswith("_"):
+                    continue
+                if key.endswith("_path"):
+                    if cfg[key].startswith("~"):
+                        cfg[key] = os.path.expanduser(cfg[key])
+                    else:
+                        cfg[key] = os.path.join(dir_, cfg[key])
+                    cfg[key] = os.path.abspath(cfg[key])
+            if type(cfg[key]) is dict:
+                cfg[key] = _make_paths_absolute_recursive(dir_, cfg[key])
+    elif type(cfg) is list:
+        for i, el in enumerate(cfg):
+            cfg[i] = _make_paths_absolute_recursive(dir_, el)
+    return cfg
+
+
+def _repeated_paths(n_entries: int) -> Dict[str, Any]:
+    """A generated configuration with many repeated relative paths."""
+    return {
+        f"dataset_{i}": {
+            "train_path": f"data/{i % 20}/train.csv",
+            "test_path": f"data/{i % 20}/test.csv",
+            "model": {"weights_path": f"../models/{i % 5}/weights.bin"},
+        }
+        for i in range(n_entries)
+    }
+
+
+@pytest.mark.parametrize(
+    "implementation",
+    [cfg_load.paths.make_paths_absolute, _make_paths_absolute_recursive],
+    ids=["iterative", "recursive"],
+)
+def test_make_paths_absolute_repeated(benchmark, implementation):
+    benchmark.group = "paths-repeated"
+    config = _repeated_paths(10_000)
+    benchmark.pedantic(
+        implementation,
+        setup=lambda: (("/srv/app", deepcopy(config)), {}),
+        rounds=10,
+    )
+
+
+def test_load_env(benchmark, synthetic):
+    name, config = synthetic
+    benchmark.group = f"env-{name}"
+    # The top-level values are dicts, so they are overwritten with JSON
+    env = {key: '{"overwritten": true}' for key in list(config)[:10]}
+    with patch.dict(os.environ, env):
+        benchmark.pedantic(
+            cfg_load.load_env, setup=lambda: ((deepcopy(config),), {}), rounds=20
+        )
+
+
+def test_configuration_init(benchmark, synthetic, meta):
+    name, config = synthetic
+    benchmark.group = f"configuration-{name}"
+    benchmark(cfg_load.Configuration, config, meta, load_remote=False)
+
+
+def test_update(benchmark, synthetic, meta):
+    name, config = synthetic
+    benchmark.group = f"configuration-{name}"
+    base = cfg_load.Configuration(config, dict(meta), load_remote=False)
+    other = cfg_load.Configuration(
+        {key: {"overwritten": True} for key in list(config)[:10]},
+        dict(meta),
+        load_remote=False,
+    )
+    benchmark(base.update, other)
+
+
+def test_apply_env(benchmark, synthetic, meta):
+    name, config = synthetic
+    benchmark.group = f"configuration-{name}"
+    cfg = cfg_load.Configuration(config, meta, load_remote=False)
+    env_mapping = make_env_mapping(config, 10)
+    env = {el["env_name"]: "overwritten" for el in env_mapping}
+    with patch.dict(os.environ, env):
+        benchmark(cfg.apply_env, env_mapping)
+
+
+def test_pformat(benchmark, synthetic, meta):
+    name, config = synthetic
+    benchmark.group = f"configuration-{name}"
+    cfg = cfg_load.Configuration(config, meta, load_remote=False)
+    benchmark(cfg.pformat)
+
+
+def test_diff(benchmark, synthetic, meta):
+    name, config = synthetic
+    benchmark.group = f"diff-{name}"
+    base = cfg_load.Configuration(config, dict(meta), load_remote=False)
+    other = cfg_load.Configuration(config, dict(meta), load_remote=False)
+    key = next(iter(config))
+    other.set(key, {"overwritten": True})
+    # The fingerprints are computed in the first round and cached afterwards
+    benchmark(base.diff, other)
+
+
+def test_patch(benchmark, synthetic, meta):
+    name, config = synthetic
+    benchmark.group = f"diff-{name}"
+    base = cfg_load.Configuration(config, dict(meta), load_remote=False)
+    key = next(iter(config))
+    delta = [{"op": "replace", "path": f"/{key}", "value": {"overwritten": True}}]
+    benchmark(base.patch, delta)
+
+
+def test_pickle_roundtrip(benchmark, synthetic, meta):
+    name, config = synthetic
+    benchmark.group = f"pickle-{name}"
+    cfg = cfg_load.Configuration(config, meta, load_remote=False)
+
+    def roundtrip():
+        buffers = []
+        data = pickle.dumps(cfg, protocol=5, buffer_callback=buffers.append)
+        return pickle.loads(data, buffers=buffers)
+
+    # The configuration is pickled in the first round and reused afterwards
+    assert benchmark(roundtrip) == cfg
+
+
+@pytest.mark.parametrize("holder", ["plain", "atomic"])
+def test_read(benchmark, meta, holder):
+    benchmark.group = "read"
+    cfg = cfg_load.Configuration({"server": {"port": 8080}}, meta, load_remote=False)
+    config = cfg_load.AtomicConfiguration(cfg) if holder == "atomic" else cfg
+
+    def read():
+        for _ in range(1000):
+            config["server"]["port"]
+
+    # Reading through AtomicConfiguration takes no lock
+    benchmark(read)
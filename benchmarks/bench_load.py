@@ -0,0 +1,53 @@
+"""Benchmark loading configuration files of every supported format."""
+
+# Third party
+import pytest
+
+# First party
+import cfg_load
+from benchmarks.synthetic import (
+    SIZES,
+    make_config,
+    make_ini_config,
+    write_config,
+)
+
+LOADERS = {
+    "yaml": cfg_load.load_yaml,
+    "json": cfg_load.load_json,
+    "toml": lambda path: cfg_load.load(path, load_raw=True),
+    "msgpack": lambda path: cfg_load.load(path, load_raw=True),
+    "cbor": lambda path: cfg_load.load(path, load_raw=True),
+}
+
+# Optional modules which are needed to write the synthetic files
+WRITER_MODULES = {"toml": "tomli_w", "msgpack": "msgpack", "cbor": "cbor2"}
+
+
+@pytest.mark.parametrize("fmt", list(LOADERS))
+def test_load_format(benchmark, tmp_path, synthetic, fmt):
+    name, config = synthetic
+    if fmt in WRITER_MODULES:
+        pytest.importorskip(WRITER_MODULES[fmt])
+    benchmark.group = f"load-{name}"
+    path = write_config(config, str(tmp_path), name, fmt)
+    loaded = benchmark(LOADERS[fmt], path)
+    assert len(loaded) == len(config)
+
+
+@pytest.mark.parametrize(
+    ("name", "n_leaves"), [(name, n_leaves) for name, n_leaves, _ in SIZES]
+)
+def test_load_ini(benchmark, tmp_path, name, n_leaves):
+    benchmark.group = f"load-{name}"
+    path = write_config(make_ini_config(n_leaves), str(tmp_path), name, "ini")
+    benchmark(cfg_load.load_ini, path)
+
+
+@pytest.mark.parametrize("fmt", ["yaml", "json"])
+def test_load_full(benchmark, tmp_path, fmt):
+    """Measure cfg_load.load() including all transformations."""
+    benchmark.group = "load-full"
+    config = make_config(2_000, 4)
+    path = write_config(config, str(tmp_path), "full", fmt)
+    benchmark(cfg_load.load, path, load_remote=False)
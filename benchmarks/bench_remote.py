@@ -0,0 +1,24 @@
+"""Benchmark cfg_load.remote against a local HTTP server."""
+
+# Third party
+import pytest
+
+# First party
+import cfg_load.remote
+
+
+@pytest.mark.parametrize("filename", ["1MB.bin", "16MB.bin"])
+def test_load_http(benchmark, tmp_path, http_server, filename):
+    base_url, _ = http_server
+    benchmark.group = "remote-http"
+    sink = str(tmp_path / filename)
+    benchmark(cfg_load.remote.load, f"{base_url}/{filename}", sink, "load_always")
+
+
+def test_load_if_missing(benchmark, tmp_path, http_server):
+    """The common case at startup: the artifact is already there."""
+    base_url, _ = http_server
+    benchmark.group = "remote-http"
+    sink = str(tmp_path / "1MB.bin")
+    cfg_load.remote.load(f"{base_url}/1MB.bin", sink)
+    benchmark(cfg_load.remote.load, f"{base_url}/1MB.bin", sink)
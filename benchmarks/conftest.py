@@ -0,0 +1,53 @@
+"""Fixtures for the benchmarks."""
+
+# Core Library
+import functools
+import http.server
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, Tuple
+
+# Third party
+import pytest
+import pytz
+
+# First party
+from benchmarks.synthetic import SIZES, make_config
+
+
+@pytest.fixture(params=SIZES, ids=[name for name, _, _ in SIZES])
+def synthetic(request: Any) -> Tuple[str, Dict[str, Any]]:
+    """A synthetic configuration for every size."""
+    name, n_leaves, depth = request.param
+    return name, make_config(n_leaves, depth)
+
+
+@pytest.fixture
+def meta(tmp_path: Any) -> Dict[str, Any]:
+    """Meta data as cfg_load.load() creates it."""
+    return {
+        "filepath": str(tmp_path / "config.yaml"),
+        "parse_datetime": datetime.now(pytz.utc),
+    }
+
+
+@pytest.fixture(scope="session")
+def http_server(tmp_path_factory: Any) -> Iterator[Tuple[str, str]]:
+    """Serve a directory on localhost; yields (base_url, directory)."""
+    directory = str(tmp_path_factory.mktemp("http_root"))
+    for name, size in [("1MB.bin", 2**20), ("16MB.bin", 2**24)]:
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(os.urandom(size))
+    handler = functools.partial(_QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", directory
+    server.shutdown()
+    server.server_close()
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:  # noqa
+        pass
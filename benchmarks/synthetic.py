@@ -0,0 +1,111 @@
+"""Generate synthetic configurations of a given size and depth."""
+
+# Core Library
+import os
+import random
+from typing import Any, Dict, List
+
+# Third party
+import yaml
+
+# First party
+import cfg_load.formats
+
+# (name, number of leaves, depth of the tree)
+SIZES = [("small", 100, 2), ("medium", 2_000, 4), ("large", 20_000, 6)]
+
+
+def make_config(n_leaves: int, depth: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Generate a nested configuration with roughly n_leaves values.
+
+    The leaves are a mix of strings, numbers, booleans, lists and values of
+    keys ending with `_path`, so all transformations of cfg_load have work to
+    do.
+
+    Parameters
+    ----------
+    n_leaves : int
+    depth : int
+    seed : int
+
+    Returns
+    -------
+    config : Dict[str, Any]
+    """
+    rng = random.Random(seed)
+    fanout = max(2, round(n_leaves ** (1 / depth)))
+    counter = [0]
+
+    def leaf(key: str) -> Any:
+        kind = counter[0] % 6
+        counter[0] += 1
+        if key.endswith("_path"):
+            return f"data/{rng.randrange(50)}/file_{counter[0]}.bin"
+        if kind == 0:
+            return f"value-{rng.randrange(10 ** 6)}"
+        if kind == 1:
+            return rng.randrange(10**6)
+        if kind == 2:
+            return rng.random()
+        if kind == 3:
+            return rng.random() < 0.5
+        if kind == 4:
+            return [rng.randrange(100) for _ in range(8)]
+        return f"some longer text value {rng.randrange(10 ** 9)} " * 2
+
+    def node(level: int) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        for i in range(fanout):
+            if counter[0] >= n_leaves:
+                break
+            if level < depth - 1:
+                result[f"section_{level}_{i}"] = node(level + 1)
+            else:
+                key = f"key_{i}_path" if i % 5 == 0 else f"key_{i}"
+                result[key] = leaf(key)
+        return result
+
+    config: Dict[str, Any] = {}
+    i = 0
+    while counter[0] < n_leaves:
+        config[f"root_{i}"] = node(1) if depth > 1 else leaf(f"root_{i}")
+        i += 1
+    return config
+
+
+def make_ini_config(n_leaves: int) -> Dict[str, Dict[str, str]]:
+    """Generate a configuration with sections of string values for INI."""
+    section_size = 20
+    config: Dict[str, Dict[str, str]] = {}
+    for i in range(n_leaves):
+        section = config.setdefault(f"section_{i // section_size}", {})
+        section[f"key_{i % section_size}"] = f"value-{i}"
+    return config
+
+
+def make_env_mapping(config: Dict[str, Any], n: int) -> List[Dict[str, Any]]:
+    """Generate an env_mapping for Configuration.apply_env with n entries."""
+    mapping = []
+    for i, key in enumerate(list(config)[:n]):
+        mapping.append(
+            {"env_name": f"CFG_LOAD_BENCH_{i}", "keys": [key], "converter": "str"}
+        )
+    return mapping
+
+
+def write_config(config: Dict[str, Any], directory: str, name: str, fmt: str) -> str:
+    """Write config in the given format and return the path of the file."""
+    format_ = cfg_load.formats.get_format(fmt)
+    path = os.path.join(directory, name + format_.extensions[0])
+    with open(path, "wb") as stream:
+        if fmt == "yaml":
+            # Use the fast emitter, so setting up the benchmark is not slow
+            yaml.dump(config, stream, Dumper=_Dumper, encoding="utf-8")
+        else:
+            assert format_.dump is not None, f"{fmt} can not be written"
+            format_.dump(config, stream)
+    return path
+
+
+_Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
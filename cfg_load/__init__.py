@@ -2,44 +2,125 @@
 
 # Core Library
 import collections
+import hashlib
 import importlib.util
+import io
+import itertools
 import json
 import logging
 import os
+import pickle
 import pprint
+import reprlib
 import sys
+import time
+import urllib.parse
+from concurrent.futures import Future
 from copy import deepcopy
 from datetime import datetime
-from typing import Any, Dict, List, Union
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 
 # Third party
 import mpu
 import pytz
-import yaml
 from mpu.datastructures import dict_merge, set_dict_value
-from six.moves import configparser
 
 # First party
+import cfg_load.compact
+import cfg_load.delta
+import cfg_load.dump
+import cfg_load.formats
 import cfg_load.paths
+import cfg_load.references
 import cfg_load.remote
+import cfg_load.schema
+import cfg_load.subscriptions
+import cfg_load.timing
+import cfg_load.typed
 from cfg_load._version import __version__  # noqa
+from cfg_load.atomic import AtomicConfiguration  # noqa
 
 
 def load(
-    filepath: str, load_raw: bool = False, load_remote: bool = True, **kwargs: Any
+    filepath: str,
+    load_raw: bool = False,
+    load_remote: Union[bool, str] = True,
+    schema: Optional[Union[Dict, str]] = None,
+    fill_defaults: bool = True,
+    cache_dir: Optional[str] = None,
+    cache_ttl: float = 0.0,
+    references: Union[bool, str] = False,
+    compact_lists: Union[bool, int] = False,
+    expand_vars: bool = False,
+    check_exists: bool = False,
+    apply_env: bool = True,
+    **kwargs: Any,
 ) -> Union["Configuration", Dict]:
     """
     Load a configuration file.
 
+    The format is detected by the file extension. If the extension is not
+    known, the first bytes of the file are used to detect binary formats.
+    See :mod:`cfg_load.formats` for the supported formats.
+
+    The configuration file itself can be remote, e.g.
+    `s3://bucket/config.yaml`. See :func:`cfg_load.remote.fetch` for how it is
+    cached. Relative paths in remote configurations are relative to the
+    current working directory.
+
     Parameters
     ----------
     filepath : str
-        Path to the configuration file.
+        Path or http(s)://, ftp:// or s3:// URL of the configuration file.
     load_raw : bool, optional (default: False)
         Load only the raw configuration file as a dict,
         without applying any logic to it.
-    load_remote : bool, optional (default: True)
-        Load files stored remotely, e.g. from a webserver or S3
+    load_remote : Union[bool, str], optional (default: True)
+        Load files stored remotely, e.g. from a webserver or S3. If
+        'background', the configuration is returned immediately and the files
+        are downloaded in a thread pool; see :meth:`Configuration.wait_remote`.
+    schema : Union[Dict, str], optional (default: None)
+        A JSON Schema or the path to a JSON Schema file. The parsed file, and
+        again the configuration after environment variables overwrote
+        values, is validated against it and all errors are reported at once
+        as a :class:`cfg_load.schema.ValidationError`. The compiled schema is
+        cached, so passing the same schema again is cheap; a schema file is
+        only read again when it was modified.
+    fill_defaults : bool, optional (default: True)
+        Set missing properties which have a `default` in the schema.
+    cache_dir : str, optional
+        Where remote configuration files are cached. Defaults to
+        :func:`cfg_load.remote.default_cache_dir`.
+    cache_ttl : float, optional (default: 0)
+        Seconds during which a cached remote configuration file is used
+        without revalidating it.
+    references : Union[bool, str], optional (default: False)
+        Resolve references like `${env:HOME}`; see :mod:`cfg_load.references`.
+        If 'lazy', the references in `cfg[key]` are resolved when it is
+        accessed for the first time; only `_path` values are resolved while
+        loading, so they can be made absolute.
+    compact_lists : Union[bool, int], optional (default: False)
+        Store lists of only ints or only floats as read-only arrays; see
+        :mod:`cfg_load.compact`. An int is the minimum length of the lists,
+        True uses `cfg_load.compact.DEFAULT_MIN_LENGTH`.
+    expand_vars : bool, optional (default: False)
+        Replace environment variables like `$DATA_DIR` in `_path` values.
+    check_exists : bool, optional (default: False)
+        Raise a FileNotFoundError if a `_path` value does not exist.
+    apply_env : bool, optional (default: True)
+        Overwrite top-level values with the environment variables of the same
+        name; see :func:`load_env`.
     **kwargs
         Arbitrary keyword arguments which get passed to the loader functions.
 
@@ -47,24 +128,311 @@ def load(
     -------
     config : Configuration
     """
-    if filepath.lower().endswith(".yaml") or filepath.lower().endswith(".yml"):
-        config_dict = load_yaml(filepath, **kwargs)
-    elif filepath.lower().endswith(".json"):
-        config_dict = load_json(filepath, **kwargs)
-    elif filepath.lower().endswith(".ini"):
-        config_dict = load_ini(filepath, **kwargs)
-    else:
-        raise NotImplementedError(
-            f"Extension of the file '{filepath}' was not recognized."
+    timer = cfg_load.timing.Timer(filepath)
+    remote_file = None
+    if cfg_load.remote.is_url(filepath):
+        with timer.phase("read", source_url=filepath) as attributes:
+            remote_file = cfg_load.remote.fetch(filepath, cache_dir, cache_ttl)
+            content = remote_file.content
+            sha256 = hashlib.sha256(content).hexdigest()
+            attributes["bytes"] = len(content)
+            attributes["from_cache"] = remote_file.from_cache
+        fmt = cfg_load.formats.find_format(
+            urllib.parse.urlparse(filepath).path,
+            head=content[: cfg_load.formats.SNIFF_BYTES],
         )
-    if not load_raw:
+    else:
+        fmt = cfg_load.formats.find_format(filepath)
+        with timer.phase("read") as attributes:
+            with open(filepath, "rb") as stream:
+                content, sha256 = _read_hashed(stream)
+            attributes["bytes"] = len(content)
+    with timer.phase("parse", format=fmt.name):
+        config_dict = fmt.load(io.BytesIO(content), **kwargs)
+    config_dict = _prepare(config_dict, timer, schema, fill_defaults, compact_lists)
+    if load_raw:
+        return config_dict
+    if remote_file is None:
         reference_dir = os.path.dirname(filepath)
-        config_dict = cfg_load.paths.make_paths_absolute(reference_dir, config_dict)
-        config_dict = load_env(config_dict)
         meta = mpu.io.get_file_meta(filepath)
-        meta["parse_datetime"] = datetime.now(pytz.utc)
-        config = Configuration(config_dict, meta=meta, load_remote=load_remote)
-    return config
+        meta["origin"] = meta["filepath"]
+    else:
+        reference_dir = os.getcwd()
+        meta = {
+            "filepath": filepath,
+            "origin": remote_file.origin,
+            "etag": remote_file.etag,
+            "version": remote_file.version,
+            "fetch_datetime": datetime.fromtimestamp(remote_file.fetched_at, pytz.utc),
+            "from_cache": remote_file.from_cache,
+            "stale": remote_file.stale,
+        }
+    meta["bytes"] = len(content)
+    meta["sha256"] = sha256
+    # Used by Configuration.reload and Configuration.source_changed
+    meta["load_options"] = {
+        "schema": schema,
+        "fill_defaults": fill_defaults,
+        "cache_dir": cache_dir,
+        "cache_ttl": cache_ttl,
+        "compact_lists": compact_lists,
+        "expand_vars": expand_vars,
+        "check_exists": check_exists,
+        "apply_env": apply_env,
+        **kwargs,
+    }
+    return _finish(
+        config_dict,
+        timer,
+        reference_dir,
+        meta,
+        load_remote,
+        references,
+        schema,
+        expand_vars,
+        check_exists,
+        apply_env,
+    )
+
+
+def _prepare(
+    config_dict: Any,
+    timer: cfg_load.timing.Timer,
+    schema: Optional[Union[Dict, str, cfg_load.schema.Validator]],
+    fill_defaults: bool,
+    compact_lists: Union[bool, int],
+) -> Any:
+    """Validate a parsed document and compact its lists."""
+    if schema is not None:
+        with timer.phase("validate"):
+            if not isinstance(schema, cfg_load.schema.Validator):
+                schema = _compile_schema(schema)
+            config_dict = schema.validate(config_dict, fill_defaults)
+    if compact_lists:
+        with timer.phase("compact_lists"):
+            config_dict = cfg_load.compact.compact_lists(
+                config_dict,
+                (
+                    cfg_load.compact.DEFAULT_MIN_LENGTH
+                    if compact_lists is True
+                    else compact_lists
+                ),
+            )
+    return config_dict
+
+
+def _compile_schema(schema: Union[Dict, str]) -> cfg_load.schema.Validator:
+    """
+    Compile a schema or the schema in a file.
+
+    Schema files are only read again when their modification time or size
+    changed.
+    """
+    if not isinstance(schema, str):
+        return cfg_load.schema.compile_schema(schema)
+    if cfg_load.remote.is_url(schema):
+        return cfg_load.schema.compile_schema(cast(Dict, load(schema, load_raw=True)))
+    path = os.path.abspath(schema)
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _SCHEMA_FILES.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    validator = cfg_load.schema.compile_schema(cast(Dict, load(path, load_raw=True)))
+    _SCHEMA_FILES[path] = (signature, validator)
+    return validator
+
+
+# The compiled schema files by path, with their modification time and size
+_SCHEMA_FILES: Dict[str, Tuple[Tuple[int, int], cfg_load.schema.Validator]] = {}
+
+
+def _finish(
+    config_dict: Dict,
+    timer: cfg_load.timing.Timer,
+    reference_dir: str,
+    meta: Dict,
+    load_remote: Union[bool, str],
+    references: Union[bool, str],
+    schema: Optional[Union[Dict, str, cfg_load.schema.Validator]] = None,
+    expand_vars: bool = False,
+    check_exists: bool = False,
+    apply_env: bool = True,
+) -> "Configuration":
+    """Apply references, paths and environment variables and wrap the result."""
+    # Paths are made absolute after their references are resolved, so
+    # `${env:DATA_DIR}/train.csv` is not joined with reference_dir. The
+    # `_load_url` entries are downloaded while loading, so they are resolved
+    # in lazy mode, too.
+    if references == "lazy":
+        eager_keys = [
+            keys
+            for keys, value in cfg_load.paths.iter_paths(config_dict)
+            if cfg_load.references.has_references(value)
+        ] + [
+            keys
+            for keys, entry in _load_url_entries(config_dict)
+            if _contains_references(entry)
+        ]
+        if eager_keys:
+            with timer.phase("resolve_references"):
+                resolver = cfg_load.references.References(config_dict)
+                for keys in eager_keys:
+                    resolver.resolve(keys)
+    elif references:
+        with timer.phase("resolve_references"):
+            config_dict = cfg_load.references.resolve(config_dict)
+    with timer.phase("make_paths_absolute"):
+        config_dict = cfg_load.paths.make_paths_absolute(
+            reference_dir, config_dict, expand_vars, check_exists
+        )
+    overridden = False
+    if apply_env:
+        with timer.phase("load_env"):
+            overridden = any(
+                name in config_dict for name in os.environ if not name.startswith("_")
+            )
+            config_dict = load_env(config_dict)
+    if schema is not None and overridden:
+        # The values from environment variables have to match the schema, too
+        with timer.phase("validate"):
+            if not isinstance(schema, cfg_load.schema.Validator):
+                schema = _compile_schema(schema)
+            schema.validate(config_dict, fill_defaults=False)
+    meta["parse_datetime"] = datetime.now(pytz.utc)
+    meta["nodes"] = cfg_load.timing.count_nodes(config_dict)
+    meta["timings"] = timer.timings
+    meta["references"] = references
+    cfg = Configuration(config_dict, meta=meta, load_remote=load_remote)
+    if references == "lazy":
+        cfg._references = cfg_load.references.References(cfg._dict)
+    return cfg
+
+
+def iter_load(
+    filepath: str,
+    load_raw: bool = False,
+    load_remote: bool = True,
+    schema: Optional[Union[Dict, str]] = None,
+    fill_defaults: bool = True,
+    references: Union[bool, str] = False,
+    compact_lists: Union[bool, int] = False,
+    expand_vars: bool = False,
+    check_exists: bool = False,
+    **kwargs: Any,
+) -> Iterator[Union["Configuration", Dict]]:
+    """
+    Load the documents of a multi-document YAML or a JSON Lines file.
+
+    The file is read while iterating, so only one document is in memory at a
+    time:
+
+    >> for cfg in cfg_load.iter_load("jobs.jsonl"):
+    ..     run(cfg)
+
+    Every document is processed like a file loaded with :func:`load`; its
+    index is stored in `meta['document']`. Empty YAML documents are skipped.
+    Files in other formats give a single document.
+
+    Parameters
+    ----------
+    filepath : str
+        A local file.
+    load_raw : bool, optional (default: False)
+    load_remote : bool, optional (default: True)
+    schema : Union[Dict, str], optional (default: None)
+        Every document is validated against it.
+    fill_defaults : bool, optional (default: True)
+    references : Union[bool, str], optional (default: False)
+    compact_lists : Union[bool, int], optional (default: False)
+    expand_vars : bool, optional (default: False)
+    check_exists : bool, optional (default: False)
+    **kwargs
+        Arbitrary keyword arguments which get passed to the loader functions.
+
+    Yields
+    ------
+    config : Configuration
+    """
+    fmt = cfg_load.formats.find_format(filepath)
+    file_meta = mpu.io.get_file_meta(filepath)
+    file_meta["origin"] = file_meta["filepath"]
+    validator = None if schema is None else _compile_schema(schema)
+    with open(filepath, "rb") as stream:
+        if fmt.load_all is not None:
+            documents = fmt.load_all(stream, **kwargs)
+        else:
+            documents = iter([fmt.load(stream, **kwargs)])
+        for index in itertools.count():
+            timer = cfg_load.timing.Timer(filepath)
+            with timer.phase("parse", format=fmt.name):
+                config_dict = next(documents, _END)
+            if config_dict is _END:
+                return
+            if config_dict is None:
+                # An empty document, e.g. after a trailing '---'
+                continue
+            config_dict = _prepare(
+                config_dict, timer, validator, fill_defaults, compact_lists
+            )
+            if load_raw:
+                yield config_dict
+                continue
+            meta = dict(file_meta)
+            meta["document"] = index
+            yield _finish(
+                config_dict,
+                timer,
+                os.path.dirname(filepath),
+                meta,
+                load_remote,
+                references,
+                validator,
+                expand_vars,
+                check_exists,
+            )
+
+
+# Marks the end of the documents in iter_load
+_END = object()
+
+
+def _read_hashed(stream: IO[bytes], keep: bool = True) -> Tuple[bytes, str]:
+    """Read stream and compute its SHA-256 while reading it."""
+    hasher = hashlib.sha256()
+    chunks = []
+    while True:
+        chunk = stream.read(cfg_load.remote.COPY_BUFFER_SIZE)
+        if not chunk:
+            break
+        hasher.update(chunk)
+        if keep:
+            chunks.append(chunk)
+    return b"".join(chunks), hasher.hexdigest()
+
+
+def connect(socket_path: Optional[str] = None, timeout: float = 10.0) -> Any:
+    """
+    Connect to a cfg_load daemon which was started with `cfg_load serve`.
+
+    >> client = cfg_load.connect()
+    >> cfg = client.load("config.yaml")
+
+    Parameters
+    ----------
+    socket_path : str, optional
+        See :func:`cfg_load.server.default_socket_path`.
+    timeout : float, optional (default: 10.0)
+
+    Returns
+    -------
+    client : cfg_load.server.Client
+    """
+    # Import here, as the server module needs the Configuration class
+    # First party
+    import cfg_load.server
+
+    return cfg_load.server.connect(socket_path, timeout)
 
 
 def load_yaml(yaml_filepath: str, safe_load: bool = True, **kwargs: Any) -> Dict:
@@ -85,12 +453,8 @@ def load_yaml(yaml_filepath: str, safe_load: bool = True, **kwargs: Any) -> Dict
     -------
     config : Dict
     """
-    with open(yaml_filepath) as stream:
-        if safe_load:
-            config = yaml.safe_load(stream)
-        else:
-            config = yaml.load(stream, **kwargs)  # noqa
-    return config
+    with open(yaml_filepath, "rb") as stream:
+        return cfg_load.formats.load_yaml_stream(stream, safe_load, **kwargs)
 
 
 def load_json(json_filepath: str, **kwargs: Any) -> Dict:
@@ -107,9 +471,8 @@ def load_json(json_filepath: str, **kwargs: Any) -> Dict:
     -------
     config : Dict
     """
-    with open(json_filepath) as stream:
-        config = json.load(stream, **kwargs)
-    return config
+    with open(json_filepath, "rb") as stream:
+        return cfg_load.formats.load_json_stream(stream, **kwargs)
 
 
 def load_ini(ini_filepath: str, **kwargs: Any) -> collections.OrderedDict:
@@ -126,10 +489,8 @@ def load_ini(ini_filepath: str, **kwargs: Any) -> collections.OrderedDict:
     -------
     config : OrderedDict
     """
-    config = configparser.ConfigParser(**kwargs)
-    config.read(ini_filepath)
-    # This is not so nice as it accesses a private property of the INI parser
-    return config._sections  # type: ignore
+    with open(ini_filepath, "rb") as stream:
+        return cfg_load.formats.load_ini_stream(stream, **kwargs)
 
 
 def load_env(config: Dict) -> Dict:
@@ -151,7 +512,10 @@ def load_env(config: Dict) -> Dict:
         if env_name in config:
             if isinstance(config[env_name], str):
                 config[env_name] = os.environ[env_name]
-            elif isinstance(config[env_name], (list, dict, float, int, bool)):
+            elif isinstance(
+                config[env_name],
+                (list, dict, float, int, bool, cfg_load.compact.FrozenArray),
+            ):
                 config[env_name] = json.loads(os.environ[env_name])
             else:
                 logger.warning(
@@ -163,6 +527,123 @@ def load_env(config: Dict) -> Dict:
     return config
 
 
+def _unpickle(
+    cls: Type["Configuration"], data: Any, meta: Dict, downloaded: List[str]
+) -> "Configuration":
+    """Restore a pickled configuration without loading anything again."""
+    self = cls.__new__(cls)
+    load_remote = meta["load_remote"]
+    self._setup(
+        pickle.loads(data),
+        meta,
+        False,
+        cfg_load.timing.Timer(meta.get("filepath")),
+        modules={},
+    )
+    self.meta["load_remote"] = load_remote
+    self._modules = None
+    for key in downloaded:
+        future: Future = Future()
+        future.set_result(None)
+        self._remote[key] = future
+    return self
+
+
+def _log_download_error(key: str, future: Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logging.error(
+            f"The background download of '{key}' failed", exc_info=future.exception()
+        )
+
+
+def _changed_subtree(config: Dict, path: str, keyword: str) -> Any:
+    """Get the part of config below path which may contain `keyword` keys."""
+    return _changed_location(config, path, keyword)[1]
+
+
+def _changed_location(
+    config: Dict, path: str, keyword: str
+) -> Tuple[Tuple[Any, ...], Any]:
+    """Get the keys of the subtree of :func:`_changed_subtree` and the subtree."""
+    node: Any = config
+    keys: Tuple[Any, ...] = ()
+    for token in cfg_load.delta.split_path(path):
+        if isinstance(node, dict) and token.endswith(keyword):
+            return keys, ({token: node[token]} if token in node else {})
+        try:
+            key = int(token) if isinstance(node, list) else token
+            node = node[key]
+        except (KeyError, IndexError, ValueError):
+            # The value was removed
+            return (), {}
+        keys += (key,)
+    return keys, (node if isinstance(node, (dict, list)) else {})
+
+
+def _load_url_entries(config: Any) -> Iterator[Tuple[Tuple[Any, ...], Any]]:
+    """Get the keys and values of the `_load_url` keys which are downloaded."""
+    keyword = "_load_url"
+    stack: List[Tuple[Tuple[Any, ...], Any]] = [((), config)]
+    while stack:
+        keys, node = stack.pop()
+        if isinstance(node, list):
+            stack.extend((keys + (i,), value) for i, value in enumerate(node))
+        elif isinstance(node, dict):
+            for key, value in node.items():
+                if hasattr(key, "endswith") and not key.startswith("_"):
+                    if key.endswith(keyword):
+                        yield keys + (key,), value
+                if type(value) is dict:
+                    stack.append((keys + (key,), value))
+
+
+def _contains_references(node: Any) -> bool:
+    """Check if a string in node contains references."""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+        elif cfg_load.references.has_references(node):
+            return True
+    return False
+
+
+def _module_names(config: Any) -> List[str]:
+    """Get the names of all modules which are loaded for config."""
+    keyword = "_module_path"
+    names = []
+    stack = [config]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            for key, value in node.items():
+                if hasattr(key, "endswith") and not key.startswith("_"):
+                    if key.endswith(keyword):
+                        names.append(key[: -len(keyword)])
+                if type(value) is dict:
+                    stack.append(value)
+    return names
+
+
+def _make_repr() -> reprlib.Repr:
+    repr_ = reprlib.Repr()
+    repr_.maxlevel = 4
+    repr_.maxdict = 20
+    repr_.maxlist = 20
+    repr_.maxtuple = 20
+    repr_.maxstring = 200
+    repr_.maxother = 200
+    return repr_
+
+
+_REPR = _make_repr()
+
+
 class Configuration(collections.abc.Mapping):
     """
     Configuration class.
@@ -173,20 +654,81 @@ class Configuration(collections.abc.Mapping):
     ----------
     cfg_dict : Dict
     meta : Dict
-    load_remote : bool
+    load_remote : Union[bool, str]
+        True, False or 'background'.
     """
 
-    def __init__(self, cfg_dict: Dict, meta: Dict, load_remote: bool = True):
-        self._dict = deepcopy(cfg_dict)  # make a copy
+    _modules: Optional[Dict]
+
+    def __init__(
+        self, cfg_dict: Dict, meta: Dict, load_remote: Union[bool, str] = True
+    ):
+        timer = cfg_load.timing.Timer(meta.get("filepath"))
+        with timer.phase("copy"):
+            cfg_dict = deepcopy(cfg_dict)  # make a copy
+        self._setup(cfg_dict, meta, load_remote, timer)
+
+    @classmethod
+    def _wrap(
+        cls,
+        cfg_dict: Dict,
+        meta: Dict,
+        load_remote: Union[bool, str] = True,
+        modules: Optional[Dict] = None,
+    ) -> "Configuration":
+        """
+        Create a configuration which takes ownership of cfg_dict.
+
+        In contrast to the constructor, cfg_dict is not copied. Only use this
+        for dicts which are not referenced anywhere else. If modules are
+        given, they are used instead of loading the modules of cfg_dict.
+        """
+        self = cls.__new__(cls)
+        self._setup(
+            cfg_dict,
+            meta,
+            load_remote,
+            cfg_load.timing.Timer(meta.get("filepath")),
+            modules,
+        )
+        return self
+
+    def _setup(
+        self,
+        cfg_dict: Dict,
+        meta: Dict,
+        load_remote: Union[bool, str],
+        timer: cfg_load.timing.Timer,
+        modules: Optional[Dict] = None,
+    ) -> None:
+        # meta might be shared with other configurations, e.g. by update()
+        meta = dict(meta)
+        self._timer = timer
+        self._dict = cfg_dict
         self._hash = None
+        self._fingerprints: cfg_load.delta.FingerprintCache = {}
+        self._subscriptions = cfg_load.subscriptions.Subscriptions()
+        self._references: Optional[cfg_load.references.References] = None
+        # The downloads of the `_load_url` keys
+        self._remote: Dict[str, Future] = {}
+        # The pickled _dict, reused whenever the configuration is pickled
+        self._pickled: Optional[bytes] = None
         meta["load_remote"] = load_remote
         self._add_meta(meta)
-        self.modules: Dict = {}
-        self._load_modules(self._dict)
+        if modules is not None:
+            self.modules = modules
+        else:
+            self.modules = {}
+            with self._timer.phase("load_modules"):
+                self._load_modules(self._dict)
         if load_remote:
-            self._load_remote(self._dict)
+            with self._timer.phase("load_remote"):
+                self._load_remote(self._dict)
+        self.meta["timings"] = {**meta.get("timings", {}), **self._timer.timings}
 
     def __getitem__(self, key: Any) -> Any:
+        if self._references is not None and self._references.resolve((key,)):
+            self._fingerprints = {}
         return self._dict[key]
 
     def __len__(self) -> int:
@@ -195,6 +737,43 @@ class Configuration(collections.abc.Mapping):
     def __iter__(self) -> Any:
         return iter(self._dict)
 
+    @property
+    def modules(self) -> Dict:
+        """The modules of `_module_path` keys."""
+        if self._modules is None:
+            # Unpickled configurations load their modules when needed
+            self._modules = {}
+            self._load_modules(self._dict)
+        return self._modules
+
+    @modules.setter
+    def modules(self, modules: Dict) -> None:
+        self._modules = modules
+
+    def __reduce_ex__(self, protocol: Any) -> Any:
+        """
+        Pickle the configuration without its modules, locks and callbacks.
+
+        The configuration is pickled once and the bytes are reused, e.g. when
+        it is sent to every task of a process pool. With protocol 5, they are
+        passed as a :class:`pickle.PickleBuffer`, so a `buffer_callback` can
+        transfer them out-of-band without a copy. Unpickling neither loads
+        remote files nor modules; modules are loaded on first access.
+        """
+        if self._pickled is None:
+            self._pickled = pickle.dumps(
+                self.to_dict(), protocol=pickle.HIGHEST_PROTOCOL
+            )
+        data: Any = self._pickled
+        if isinstance(protocol, int) and protocol >= 5:
+            data = pickle.PickleBuffer(data)
+        downloaded = [
+            key
+            for key, future in self._remote.items()
+            if future.done() and not future.cancelled() and not future.exception()
+        ]
+        return (_unpickle, (type(self), data, dict(self.meta), downloaded))
+
     def __eq__(self, other: Any) -> bool:
         return self._dict == other._dict
 
@@ -212,6 +791,8 @@ class Configuration(collections.abc.Mapping):
         >> cfg.set('key', inner_dict)
         """
         self._dict[key] = value
+        self._fingerprints = {}
+        self._pickled = None
         return self
 
     def __str__(self) -> str:
@@ -221,18 +802,25 @@ class Configuration(collections.abc.Mapping):
         )
 
     def __repr__(self) -> str:
+        # Huge configurations are shortened, so logging them stays cheap
         class_name = self.__class__.__name__
         return (
             "{class_name}(cfg_dict={cfg_dict}, meta={meta}, "
             "load_remote={load_remote})".format(
                 class_name=class_name,
-                cfg_dict=self._dict,
-                meta=self.meta,
+                cfg_dict=_REPR.repr(self._dict),
+                meta=_REPR.repr(self.meta),
                 load_remote=self.meta["load_remote"],
             )
         )
 
-    def pformat(self, indent: int = 4, meta: bool = False) -> str:
+    def pformat(
+        self,
+        indent: int = 4,
+        meta: bool = False,
+        max_depth: Optional[int] = None,
+        max_items: Optional[int] = None,
+    ) -> str:
         """
         Pretty-format the configuration.
 
@@ -241,6 +829,10 @@ class Configuration(collections.abc.Mapping):
         indent : int
         meta : bool
             Print metadata
+        max_depth : int, optional
+            Replace dicts and lists below this depth by a short description.
+        max_items : int, optional
+            Show only the first max_items elements of each dict and list.
 
         Returns
         -------
@@ -248,15 +840,49 @@ class Configuration(collections.abc.Mapping):
         """
         str_ = ""
         if meta:
-            str_ += "Configuration:"
-            str_ += "Meta:"
-            str_ += f"\tSource: {self.meta['filepath']}"
-            str_ += f"\tParsed at: {self.meta['parse_datetime']}"
-            str_ += "Values:"
+            str_ += "Configuration:\n"
+            str_ += "Meta:\n"
+            str_ += f"\tSource: {self.meta['filepath']}\n"
+            str_ += f"\tParsed at: {self.meta['parse_datetime']}\n"
+            str_ += "Values:\n"
         pp = pprint.PrettyPrinter(indent=indent)
-        str_ += pp.pformat(self._dict)
+        str_ += pp.pformat(cfg_load.dump.elide(self._dict, max_depth, max_items))
         return str_
 
+    def dump(
+        self,
+        stream: IO,
+        format: str = "yaml",  # noqa
+        max_depth: Optional[int] = None,
+        max_items: Optional[int] = None,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Write the configuration to a stream, piece by piece.
+
+        Without max_depth and max_items, the output can be read again by
+        :func:`cfg_load.load`.
+
+        >> with open("config.json", "wb") as f:
+        ..     cfg.dump(f, format="json")
+
+        Parameters
+        ----------
+        stream : IO
+            A binary stream. YAML and JSON can also be written to text
+            streams like sys.stdout.
+        format : str, optional (default: 'yaml')
+            'yaml', 'json' or any other format in :mod:`cfg_load.formats`
+            which can be written.
+        max_depth : int, optional
+            Replace dicts and lists below this depth by a short description.
+        max_items : int, optional
+            Write only the first max_items elements of each dict and list.
+        **kwargs : Any
+            Passed to the writer.
+        """
+        cfg_load.dump.dump(self._dict, stream, format, max_depth, max_items, **kwargs)
+
     def _add_meta(self, meta: Dict) -> "Configuration":
         """
         Add meta data to configuration.
@@ -272,7 +898,8 @@ class Configuration(collections.abc.Mapping):
         assert isinstance(meta, dict), f"type(meta)={type(meta)}, meta={meta}"
         assert "parse_datetime" in meta, "meta does not contain parse_datetime"
         self.meta = meta
-        self.meta["filepath"] = os.path.abspath(meta["filepath"])
+        if not cfg_load.remote.is_url(meta["filepath"]):
+            self.meta["filepath"] = os.path.abspath(meta["filepath"])
         return self
 
     def _load_modules(self, config: Dict) -> Dict:
@@ -311,7 +938,7 @@ class Configuration(collections.abc.Mapping):
                     config[key] = self._load_modules(config[key])
         return config
 
-    def _load_remote(self, config: Dict) -> Dict:
+    def _load_remote(self, config: Dict, keys: Tuple[Any, ...] = ()) -> Dict:
         """
         Load remote paths.
 
@@ -319,11 +946,21 @@ class Configuration(collections.abc.Mapping):
         `sink_path`. Sources which are AWS S3 URLs and URLs starting with
         http(s) will be loaded automatically and stored in the sink. A `policy`
         parameter can specify if it should be `load_always` or
-        `load_if_missing`.
+        `load_if_missing`. An optional `sha256` or `md5` hex digest is
+        verified while downloading and for existing files.
+
+        A `source_url` which ends with '/' is a directory: an S3 prefix or a
+        HTTP directory with a `manifest_url`. It is mirrored into the
+        directory `sink_path` by `workers` parallel downloads; see
+        :func:`cfg_load.remote.load_directory`. The statistics are stored in
+        `meta['downloads']` by the JSON Pointer of the key, e.g.
+        '/data/images_load_url'.
 
         Parameters
         ----------
         config : Dict
+        keys : Tuple[Any, ...]
+            The keys of config in the whole configuration.
 
         Returns
         -------
@@ -332,7 +969,7 @@ class Configuration(collections.abc.Mapping):
         keyword = "_load_url"
         if isinstance(config, list):
             for i, el in enumerate(config):
-                config[i] = self._load_remote(el)
+                config[i] = self._load_remote(el, keys + (i,))
         elif isinstance(config, dict):
             for key in list(config.keys()):
                 if hasattr(key, "endswith"):
@@ -349,13 +986,126 @@ class Configuration(collections.abc.Mapping):
                                 "'source_url' and 'sink_path' "
                             )
                         else:
-                            source = config[key]["source_url"]
-                            sink = config[key]["sink_path"]
-                            cfg_load.remote.load(source, sink)
+                            path = cfg_load.delta.join_path(keys + (key,))
+                            self._download(path, config[key])
                 if type(config[key]) is dict:
-                    config[key] = self._load_remote(config[key])
+                    config[key] = self._load_remote(config[key], keys + (key,))
         return config
 
+    def _download(self, key: str, entry: Dict) -> None:
+        """
+        Download one `_load_url` entry, in the background if requested.
+
+        key is the JSON Pointer of the entry, so keys with the same name in
+        different subtrees do not replace each other's download.
+        """
+        if self.meta["load_remote"] == "background":
+            future = cfg_load.remote.submit(self._download_now, key, entry)
+            future.add_done_callback(lambda done: _log_download_error(key, done))
+        else:
+            self._download_now(key, entry)
+            future = Future()
+            future.set_result(None)
+        self._remote[key] = future
+
+    def _download_now(self, key: str, entry: Dict) -> None:
+        """Download the file or directory of one `_load_url` entry."""
+        source = entry["source_url"]
+        sink = entry["sink_path"]
+        policy = entry.get("policy", "load_if_missing")
+        with self._timer.phase(
+            "download", record=False, key=key, source_url=source
+        ) as attributes:
+            if not source.endswith("/"):
+                cfg_load.remote.load(
+                    source,
+                    sink,
+                    policy,
+                    entry.get("sha256"),
+                    entry.get("md5"),
+                    entry.get("segments"),
+                )
+                return
+            stats = cfg_load.remote.load_directory(
+                source,
+                sink,
+                policy,
+                workers=entry.get("workers", cfg_load.remote.DEFAULT_WORKERS),
+                manifest_url=entry.get("manifest_url"),
+            )
+            attributes.update(stats.to_dict())
+        downloads = self.meta.setdefault("downloads", {})
+        downloads[key] = stats.to_dict()
+
+    def remote_ready(self, key: str) -> bool:
+        """
+        Check if the download of a `_load_url` key has finished.
+
+        This never blocks. With `load_remote='background'`, use it to skip
+        work which needs the file; a failed download counts as finished and
+        its exception is raised by :meth:`wait_remote`.
+
+        Parameters
+        ----------
+        key : str
+            The JSON Pointer of a key ending with `_load_url`, e.g.
+            '/models/bert_load_url', or its name if it is unique, e.g.
+            'bert_load_url'.
+
+        Returns
+        -------
+        ready : bool
+        """
+        return self._remote_future(key).done()
+
+    def _remote_future(self, key: str) -> Future:
+        """Get the download of a JSON Pointer or of a unique key name."""
+        if key in self._remote:
+            return self._remote[key]
+        paths = [
+            path for path in self._remote if cfg_load.delta.split_path(path)[-1] == key
+        ]
+        if len(paths) == 1:
+            return self._remote[paths[0]]
+        if not paths:
+            raise KeyError(key)
+        raise KeyError(
+            f"The key '{key}' is ambiguous, use one of {', '.join(sorted(paths))}"
+        )
+
+    def wait_remote(
+        self, key: Optional[str] = None, timeout: Optional[float] = None
+    ) -> "Configuration":
+        """
+        Wait until the downloads of `_load_url` keys have finished.
+
+        >> cfg = cfg_load.load("config.yaml", load_remote="background")
+        >> start_server()
+        >> model = load_model(cfg.wait_remote("model_load_url")["model_load_url"])
+
+        Parameters
+        ----------
+        key : str, optional
+            Wait only for the download of this key instead of all downloads;
+            see :meth:`remote_ready`.
+        timeout : float, optional
+            Seconds to wait at most; a TimeoutError is raised afterwards.
+
+        Returns
+        -------
+        config : Configuration
+            This configuration.
+        """
+        futures = (
+            [self._remote_future(key)] if key is not None else self._remote.values()
+        )
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for future in list(futures):
+            remaining = None if deadline is None else deadline - time.monotonic()
+            # Raises the exception of a failed download
+            future.result(None if remaining is None else max(remaining, 0.0))
+        return self
+
     def update(self, other: "Configuration") -> "Configuration":
         """
         Update this configuration with values of the other configuration.
@@ -368,11 +1118,10 @@ class Configuration(collections.abc.Mapping):
         -------
         updated_config : Configuration
         """
-        this_dict = deepcopy(self._dict)
-        other_dict = deepcopy(other._dict)
+        this_dict = deepcopy(self.to_dict())
+        other_dict = deepcopy(other.to_dict())
         merged_dict = dict_merge(this_dict, other_dict, merge_method="take_right_deep")
-        cfg = Configuration(merged_dict, other.meta)
-        return cfg
+        return self._derive(self._rebuild(merged_dict, other.meta, [other]))
 
     def apply_env(self, env_mapping: List[Dict[str, Any]]) -> "Configuration":
         """
@@ -418,7 +1167,7 @@ class Configuration(collections.abc.Mapping):
             "float": float,
             "json": json.loads,
         }
-        new_dict = deepcopy(self._dict)
+        new_dict = deepcopy(self.to_dict())
         for el in env_mapping:
             env_name = el["env_name"]
             if env_name not in os.environ:
@@ -426,9 +1175,289 @@ class Configuration(collections.abc.Mapping):
             convert = converters[el["converter"]]
             value = convert(os.environ[env_name])
             set_dict_value(new_dict, el["keys"], value)
-        return Configuration(new_dict, self.meta)
+        return self._derive(self._rebuild(new_dict, self.meta, []))
+
+    def fingerprint(self) -> str:
+        """
+        Get a hash of the configuration which does not depend on the meta data.
+
+        The hashes of all subtrees are cached, so :meth:`diff` can skip
+        unchanged subtrees.
+
+        Returns
+        -------
+        fingerprint : str
+        """
+        return cfg_load.delta.fingerprint(self._dict, self._fingerprints)
+
+    def diff(self, other: "Configuration") -> List[Dict[str, Any]]:
+        """
+        Get the changes from this configuration to the other configuration.
+
+        >> cfg.diff(new_cfg)
+        [{'op': 'replace', 'path': '/server/port', 'value': 8081}]
+
+        Parameters
+        ----------
+        other : Configuration
+
+        Returns
+        -------
+        delta : List[Dict[str, Any]]
+            JSON-Patch-like operations; see :mod:`cfg_load.delta`.
+        """
+        return cfg_load.delta.diff(
+            self._dict, other._dict, self._fingerprints, other._fingerprints
+        )
+
+    def patch(self, delta: List[Dict[str, Any]]) -> "Configuration":
+        """
+        Get a new configuration with the changes of delta applied.
+
+        Unchanged subtrees are shared with this configuration instead of
+        being copied. Remote files are only downloaded for changed
+        `_load_url` keys.
+
+        Parameters
+        ----------
+        delta : List[Dict[str, Any]]
+            As returned by :meth:`diff`.
+
+        Returns
+        -------
+        patched_config : Configuration
+        """
+        new_dict = cfg_load.delta.patch(self.to_dict(), delta)
+        meta = {key: value for key, value in self.meta.items() if key != "timings"}
+        # Only the modules and remote files of changed subtrees are loaded
+        modules = dict(self.modules)
+        for operation in delta:
+            old_subtree = _changed_subtree(
+                self._dict, operation["path"], "_module_path"
+            )
+            for name in _module_names(old_subtree):
+                modules.pop(name, None)
+        cfg = Configuration._wrap(new_dict, meta, load_remote=False, modules=modules)
+        cfg._fingerprints = cfg_load.delta.inherit_fingerprints(
+            new_dict, self._fingerprints
+        )
+        cfg._remote = dict(self._remote)
+        cfg.meta["load_remote"] = self.meta["load_remote"]
+        with cfg._timer.phase("load_modules"):
+            for operation in delta:
+                cfg._load_modules(
+                    _changed_subtree(new_dict, operation["path"], "_module_path")
+                )
+        if self.meta["load_remote"]:
+            with cfg._timer.phase("load_remote"):
+                for operation in delta:
+                    keys, subtree = _changed_location(
+                        new_dict, operation["path"], "_load_url"
+                    )
+                    cfg._load_remote(subtree, keys)
+        cfg.meta["timings"] = {**cfg.meta["timings"], **cfg._timer.timings}
+        return self._derive(cfg)
+
+    def subscribe(
+        self,
+        keys: cfg_load.subscriptions.Keys,
+        callback: cfg_load.subscriptions.Callback,
+    ) -> cfg_load.subscriptions.Subscription:
+        """
+        Call callback when the subtree at keys changes.
+
+        The callback gets a :class:`cfg_load.subscriptions.ChangeEvent` when a
+        configuration which is derived from this one by :meth:`update`,
+        :meth:`apply_env`, :meth:`patch` or :meth:`reload` has a different
+        subtree at keys:
+
+        >> cfg.subscribe("cache.redis", lambda event: redis.reconnect(event.new))
+        >> cfg = cfg.reload()
+
+        The derived configurations share the subscriptions of this one.
+
+        Parameters
+        ----------
+        keys : Union[str, Sequence[Any]]
+            A dot-separated string like 'cache.redis' or a list of keys.
+        callback : Callable[[ChangeEvent], None]
+
+        Returns
+        -------
+        subscription : cfg_load.subscriptions.Subscription
+            Call its `cancel()` method to unsubscribe.
+        """
+        return self._subscriptions.add(keys, callback)
+
+    def reload(self, if_changed: bool = False, **kwargs: Any) -> "Configuration":
+        """
+        Load the configuration file again and notify the subscribers.
+
+        Parameters
+        ----------
+        if_changed : bool, optional (default: False)
+            Return this configuration if :meth:`source_changed` is False.
+        **kwargs : Any
+            Passed to :func:`cfg_load.load`, e.g. a `schema`. The options
+            which this configuration was loaded with are used by default;
+            they are stored in `meta['load_options']`.
+
+        Returns
+        -------
+        config : Configuration
+        """
+        if if_changed and not self.source_changed():
+            return self
+        kwargs = {
+            **self.meta.get("load_options", {}),
+            "load_remote": self.meta["load_remote"],
+            "references": self.meta.get("references", False),
+            **kwargs,
+        }
+        cfg = load(self.meta["filepath"], **kwargs)
+        return self._derive(cast(Configuration, cfg))
+
+    def source_changed(self) -> bool:
+        """
+        Check if the content of the configuration file changed since loading.
+
+        The file is hashed, but not parsed, and compared with
+        `meta['sha256']`, the SHA-256 of the bytes which were loaded. Remote
+        files are fetched with :func:`cfg_load.remote.fetch`, so an unchanged
+        ETag is enough.
+
+        Returns
+        -------
+        changed : bool
+            True as well if the configuration was not created by
+            :func:`cfg_load.load`.
+        """
+        if "sha256" not in self.meta:
+            return True
+        filepath = self.meta["filepath"]
+        if cfg_load.remote.is_url(filepath):
+            options = self.meta.get("load_options", {})
+            content = cfg_load.remote.fetch(
+                filepath, options.get("cache_dir"), options.get("cache_ttl", 0.0)
+            ).content
+            sha256 = hashlib.sha256(content).hexdigest()
+        else:
+            with open(filepath, "rb") as stream:
+                sha256 = _read_hashed(stream, keep=False)[1]
+        return sha256 != self.meta["sha256"]
+
+    def canonical(self) -> bytes:
+        """
+        Serialize the configuration deterministically.
+
+        Two configurations with the same content give the same bytes, e.g. a
+        YAML and a JSON file, or files with a different order of keys. See
+        :func:`cfg_load.dump.canonical`.
+
+        Returns
+        -------
+        serialized : bytes
+        """
+        return cfg_load.dump.canonical(self.to_dict())
+
+    def _rebuild(
+        self, new_dict: Dict, meta: Dict, others: List["Configuration"]
+    ) -> "Configuration":
+        """
+        Create a configuration from new_dict with the downloads of this one.
+
+        Like :meth:`patch`, it keeps `load_remote` and reuses the downloads,
+        also those which still run in the background. Only `_load_url` keys
+        which are neither in this configuration nor in one of others are
+        downloaded.
+        """
+        meta = {key: value for key, value in meta.items() if key != "timings"}
+        cfg = Configuration(new_dict, meta, load_remote=False)
+        load_remote = self.meta["load_remote"]
+        cfg.meta["load_remote"] = load_remote
+        for source in [self] + others:
+            cfg._remote.update(source._remote)
+        if load_remote:
+            with cfg._timer.phase("load_remote"):
+                for operation in cfg_load.delta.diff(self._dict, cfg._dict):
+                    keys, subtree = _changed_location(
+                        cfg._dict, operation["path"], "_load_url"
+                    )
+                    if not any(
+                        subtree
+                        == _changed_subtree(other._dict, operation["path"], "_load_url")
+                        for other in others
+                    ):
+                        cfg._load_remote(subtree, keys)
+        cfg.meta["timings"] = {**cfg.meta["timings"], **cfg._timer.timings}
+        return cfg
+
+    def _derive(self, cfg: "Configuration") -> "Configuration":
+        """Share the subscriptions with cfg and notify them of changes."""
+        cfg._subscriptions = self._subscriptions
+        self._subscriptions.notify(self, cfg)
+        return cfg
+
+    def resolve_references(self) -> "Configuration":
+        """
+        Resolve all references which were not accessed yet.
+
+        This is only needed for configurations loaded with
+        `references='lazy'`. Configurations derived from them, e.g. by
+        :meth:`update`, are resolved completely.
+
+        Returns
+        -------
+        config : Configuration
+        """
+        if self._references is not None and self._references.resolve():
+            self._fingerprints = {}
+        return self
+
+    def to_shared(self, name: Optional[str] = None) -> Any:
+        """
+        Copy the configuration into shared memory for pre-fork servers.
+
+        Call this in the master process before forking; all workers read the
+        same copy. See :func:`cfg_load.shared.share`.
+
+        Parameters
+        ----------
+        name : str, optional
+            Name of the shared memory block.
+
+        Returns
+        -------
+        shared_config : cfg_load.shared.SharedConfiguration
+        """
+        # Import here, as shared memory is not needed by most users
+        # First party
+        import cfg_load.shared
+
+        return cfg_load.shared.share(self, name)
 
-    def to_dict(self) -> Dict:
+    def as_typed(self, spec: Union[Dict, type]) -> Any:
+        """
+        Convert the configuration into typed objects with attribute access.
+
+        The conversion happens once, including type coercion, so reading a
+        value later is a plain attribute access:
+
+        >> typed = cfg.as_typed(ServerConfig)
+        >> typed.server.port
+
+        Parameters
+        ----------
+        spec : Union[Dict, type]
+            A dataclass or a JSON Schema. See :func:`cfg_load.typed.as_typed`.
+
+        Returns
+        -------
+        typed : Any
+        """
+        return cfg_load.typed.as_typed(self._dict, spec)
+
+    def to_dict(self, plain_lists: bool = False) -> Dict:
         """
         Return a dictionary representation of the configuration.
 
@@ -436,8 +1465,16 @@ class Configuration(collections.abc.Mapping):
         It is discuraged to use this in production as it loses the metadata
         and guarantees connected with the configuraiton object.
 
+        Parameters
+        ----------
+        plain_lists : bool, optional (default: False)
+            Return lists instead of the arrays of `compact_lists`.
+
         Returns
         -------
         config : dict
         """
+        self.resolve_references()
+        if plain_lists:
+            return cfg_load.compact.plain_lists(self._dict)
         return self._dict
@@ -0,0 +1,214 @@
+"""
+Share a configuration between threads which read and modify it.
+
+:class:`AtomicConfiguration` holds the current :class:`cfg_load.Configuration`.
+Writers never modify it, they create a new configuration and replace the
+reference; assigning an attribute is atomic in Python. Readers therefore do
+not take a lock, and a snapshot which a reader got from :meth:`snapshot`
+never changes.
+"""
+
+# Core Library
+import collections.abc
+import threading
+from typing import Any, Callable, Dict, List
+
+# First party
+import cfg_load.delta
+import cfg_load.subscriptions
+
+
+class AtomicConfiguration(collections.abc.Mapping):
+    """
+    A thread-safe holder of the current configuration.
+
+    Reads are lock-free. Writes are serialized by a lock, so no update is
+    lost when two threads modify the configuration at the same time:
+
+    >> config = cfg_load.AtomicConfiguration(cfg_load.load("config.yaml"))
+    >> config["server"]["port"]          # in a request handler
+    >> config.set("log_level", "DEBUG")  # in an admin thread
+
+    It is a Mapping, so `config.get("log_level", "INFO")` works as for a
+    Configuration. Every access reads the current configuration, so readers
+    which need several consistent values take a snapshot:
+
+    >> cfg = config.snapshot()
+    >> connect(cfg["db"]["host"], cfg["db"]["port"])
+
+    Do not call `set()` on the snapshots; they are shared with all readers.
+
+    Parameters
+    ----------
+    config : cfg_load.Configuration
+    """
+
+    def __init__(self, config: "cfg_load.Configuration"):
+        self._config = config
+        self._write_lock = threading.Lock()
+
+    def snapshot(self) -> "cfg_load.Configuration":
+        """
+        Get the current configuration without locking.
+
+        Returns
+        -------
+        config : cfg_load.Configuration
+        """
+        return self._config
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """
+        Get the value of key in the current configuration.
+
+        Parameters
+        ----------
+        key : Any
+        default : Any, optional (default: None)
+            Returned if the key does not exist.
+
+        Returns
+        -------
+        value : Any
+        """
+        return self._config.get(key, default)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._config[key]
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._config
+
+    def __len__(self) -> int:
+        return len(self._config)
+
+    def __iter__(self) -> Any:
+        return iter(self._config)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._config!r})"
+
+    @property
+    def meta(self) -> Dict:
+        """The meta data of the current configuration."""
+        return self._config.meta
+
+    def transform(
+        self,
+        function: Callable[["cfg_load.Configuration"], "cfg_load.Configuration"],
+    ) -> "cfg_load.Configuration":
+        """
+        Replace the configuration by function(configuration).
+
+        Writers are serialized, so function always gets the result of the
+        previous write. It must return a new configuration instead of
+        modifying its argument.
+
+        Parameters
+        ----------
+        function : Callable[[Configuration], Configuration]
+
+        Returns
+        -------
+        config : cfg_load.Configuration
+            The new configuration.
+        """
+        with self._write_lock:
+            new_config = function(self._config)
+            self._config = new_config
+        return new_config
+
+    def set(self, key: str, value: Any) -> "cfg_load.Configuration":  # noqa
+        """
+        Set the top-level key to value in a new configuration.
+
+        Parameters
+        ----------
+        key : str
+        value : Any
+
+        Returns
+        -------
+        config : cfg_load.Configuration
+        """
+        path = cfg_load.delta.join_path([key])
+        return self.transform(
+            lambda config: config.patch([{"op": "add", "path": path, "value": value}])
+        )
+
+    def patch(self, delta: List[Dict[str, Any]]) -> "cfg_load.Configuration":
+        """
+        Apply delta; see :meth:`cfg_load.Configuration.patch`.
+
+        Parameters
+        ----------
+        delta : List[Dict[str, Any]]
+
+        Returns
+        -------
+        config : cfg_load.Configuration
+        """
+        return self.transform(lambda config: config.patch(delta))
+
+    def update(self, other: "cfg_load.Configuration") -> "cfg_load.Configuration":
+        """
+        Merge other into the configuration.
+
+        Parameters
+        ----------
+        other : cfg_load.Configuration
+
+        Returns
+        -------
+        config : cfg_load.Configuration
+        """
+        return self.transform(lambda config: config.update(other))
+
+    def apply_env(self, env_mapping: List[Dict[str, Any]]) -> "cfg_load.Configuration":
+        """
+        Overwrite values with environment variables.
+
+        Parameters
+        ----------
+        env_mapping : List[Dict[str, Any]]
+            See :meth:`cfg_load.Configuration.apply_env`.
+
+        Returns
+        -------
+        config : cfg_load.Configuration
+        """
+        return self.transform(lambda config: config.apply_env(env_mapping))
+
+    def reload(self, **kwargs: Any) -> "cfg_load.Configuration":
+        """
+        Load the configuration file again.
+
+        Parameters
+        ----------
+        **kwargs : Any
+            Passed to :func:`cfg_load.load`.
+
+        Returns
+        -------
+        config : cfg_load.Configuration
+        """
+        return self.transform(lambda config: config.reload(**kwargs))
+
+    def subscribe(
+        self,
+        keys: cfg_load.subscriptions.Keys,
+        callback: cfg_load.subscriptions.Callback,
+    ) -> cfg_load.subscriptions.Subscription:
+        """
+        Call callback when a write changes the subtree at keys.
+
+        Parameters
+        ----------
+        keys : Union[str, Sequence[Any]]
+        callback : Callable[[ChangeEvent], None]
+
+        Returns
+        -------
+        subscription : cfg_load.subscriptions.Subscription
+        """
+        return self._config.subscribe(keys, callback)
@@ -1,12 +1,21 @@
 """Show what cfg_load.load() returns."""
 
 # Core Library
-import logging.config
-from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
-from typing import cast
+import json
+import pprint
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser, Namespace
+from typing import Any, Dict, Iterable, List, Optional, TextIO, Tuple, cast
 
 # First party
 import cfg_load
+import cfg_load.dump
+import cfg_load.formats
+import cfg_load.schema
+import cfg_load.subscriptions
+import cfg_load.timing
 
 config = {
     "LOGGING": {
@@ -20,7 +29,7 @@ config = {
                 "class": "logging.StreamHandler",
                 "level": "DEBUG",
                 "formatter": "simple",
-                "stream": "ext://sys.stdout",
+                "stream": "ext://sys.stderr",
             },
             "info_file_handler": {
                 "class": "logging.handlers.RotatingFileHandler",
@@ -30,6 +39,7 @@ config = {
                 "maxBytes": 10485760,
                 "backupCount": 20,
                 "encoding": "utf8",
+                "delay": True,
             },
             "error_file_handler": {
                 "class": "logging.handlers.RotatingFileHandler",
@@ -39,6 +49,7 @@ config = {
                 "maxBytes": 10485760,
                 "backupCount": 20,
                 "encoding": "utf8",
+                "delay": True,
             },
         },
         "loggers": {
@@ -51,7 +62,20 @@ config = {
     }
 }
 
-logging.config.dictConfig(config["LOGGING"])
+COMMANDS = ("show", "convert", "query", "validate", "batch", "serve", "profile")
+
+
+def setup_logging() -> None:
+    """
+    Configure logging for the CLI.
+
+    This is not done at import time, so importing cfg_load.cli has no side
+    effects. The log files are only created when something is logged.
+    """
+    # Core Library
+    import logging.config
+
+    logging.config.dictConfig(config["LOGGING"])
 
 
 def get_parser() -> ArgumentParser:
@@ -59,9 +83,149 @@ def get_parser() -> ArgumentParser:
     parser = ArgumentParser(
         description=__doc__, formatter_class=ArgumentDefaultsHelpFormatter
     )
-    parser.add_argument(
+    subparsers = parser.add_subparsers(dest="command")
+
+    show_parser = subparsers.add_parser(
+        "show",
+        help="pretty-print a configuration file",
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    show_parser.add_argument(
+        dest="filename", help="read this configuration file", metavar="FILE"
+    )
+    _add_load_arguments(show_parser)
+    _add_json_argument(show_parser)
+    show_parser.add_argument(
+        "--max-depth",
+        dest="max_depth",
+        type=int,
+        default=None,
+        help="summarize dicts and lists below this depth",
+    )
+    show_parser.add_argument(
+        "--max-items",
+        dest="max_items",
+        type=int,
+        default=None,
+        help="show only this many elements of each dict and list",
+    )
+
+    convert_parser = subparsers.add_parser(
+        "convert",
+        help="convert a configuration file to another format",
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    convert_parser.add_argument(
+        dest="source", help="read this configuration file", metavar="SOURCE"
+    )
+    convert_parser.add_argument(
+        dest="target", help="write the configuration to this file", metavar="TARGET"
+    )
+    convert_parser.add_argument(
+        "--format",
+        dest="format",
+        default=None,
+        choices=[fmt.name for fmt in cfg_load.formats.list_formats() if fmt.dump],
+        help="format of TARGET; detected by its extension if not given",
+    )
+
+    query_parser = subparsers.add_parser(
+        "query",
+        help="print the value of a key, e.g. 'server.hosts.0'",
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    query_parser.add_argument(
+        dest="filename", help="read this configuration file", metavar="FILE"
+    )
+    query_parser.add_argument(
+        dest="key", help="dot-separated path of the key", metavar="KEY"
+    )
+    _add_load_arguments(query_parser)
+    query_parser.add_argument(
+        "--text",
+        action="store_true",
+        dest="text",
+        default=False,
+        help="print strings without JSON quoting",
+    )
+
+    validate_parser = subparsers.add_parser(
+        "validate",
+        help="check if a configuration file can be loaded",
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    validate_parser.add_argument(
+        dest="filename", help="read this configuration file", metavar="FILE"
+    )
+    _add_schema_argument(validate_parser)
+    _add_json_argument(validate_parser)
+
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help=(
+            "run 'show', 'query' or 'validate' for every file path read from "
+            "stdin and print one JSON object per line"
+        ),
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    batch_parser.add_argument(
+        dest="batch_command",
+        choices=["show", "query", "validate"],
+        metavar="COMMAND",
+        help="one of 'show', 'query' and 'validate'",
+    )
+    batch_parser.add_argument(
+        "--key", dest="key", default=None, help="the key for 'query'"
+    )
+    _add_load_arguments(batch_parser)
+    _add_schema_argument(batch_parser)
+
+    profile_parser = subparsers.add_parser(
+        "profile",
+        help="measure the phases, memory and structure of loading a file",
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    profile_parser.add_argument(
         dest="filename", help="read this configuration file", metavar="FILE"
     )
+    _add_load_arguments(profile_parser)
+    _add_json_argument(profile_parser)
+    profile_parser.add_argument(
+        "--runs",
+        dest="runs",
+        type=int,
+        default=5,
+        help="load the file this often; the first run is the cold one",
+    )
+    profile_parser.add_argument(
+        "--top",
+        dest="top",
+        type=int,
+        default=10,
+        help="show this many of the largest subtrees",
+    )
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="keep configurations loaded and serve them over a Unix socket",
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    serve_parser.add_argument(
+        "--socket",
+        dest="socket_path",
+        default=None,
+        help="path of the socket; see cfg_load.server.default_socket_path",
+    )
+    serve_parser.add_argument(
+        dest="preload",
+        nargs="*",
+        metavar="FILE",
+        help="load these configuration files before the first request",
+    )
+    return parser
+
+
+def _add_load_arguments(parser: ArgumentParser) -> None:
     parser.add_argument(
         "--raw",
         action="store_true",
@@ -69,14 +233,386 @@ def get_parser() -> ArgumentParser:
         default=False,
         help="only get the raw file; do not execute anything else",
     )
-    return parser
+    parser.add_argument(
+        "--no-remote",
+        action="store_false",
+        dest="load_remote",
+        default=True,
+        help="do not download the files of `_load_url` keys",
+    )
 
 
-def entry_point() -> None:
-    """Use this as an entry point for the CLI."""
-    args = get_parser().parse_args()
-    loaded = cast(cfg_load.Configuration, cfg_load.load(args.filename, args.raw))
-    if hasattr(loaded, "pformat"):
-        print(loaded.pformat())
+def _add_json_argument(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        dest="json",
+        default=False,
+        help="print JSON instead of human-readable output",
+    )
+
+
+def _add_schema_argument(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "--schema",
+        dest="schema",
+        default=None,
+        metavar="SCHEMA",
+        help="validate against this JSON Schema file",
+    )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> Namespace:
+    """
+    Parse the command line arguments.
+
+    Calling `cfg_load FILE` without a command is kept as a shortcut for
+    `cfg_load show FILE`.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    parser = get_parser()
+    if argv and argv[0] not in COMMANDS and argv[0] not in ("-h", "--help"):
+        argv = ["show"] + list(argv)
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.error("a command or a FILE is required")
+    if args.command == "batch" and args.batch_command == "query" and not args.key:
+        parser.error("'batch query' needs --key")
+    return args
+
+
+def to_json(value: Any, **kwargs: Any) -> str:
+    """Serialize a (part of a) configuration as JSON."""
+    if isinstance(value, cfg_load.Configuration):
+        value = value.to_dict()
+    return json.dumps(value, default=str, ensure_ascii=False, **kwargs)
+
+
+def show(
+    filename: str,
+    raw: bool,
+    load_remote: bool = True,
+    as_json: bool = False,
+    max_depth: Optional[int] = None,
+    max_items: Optional[int] = None,
+) -> None:
+    """Print what cfg_load.load() returns."""
+    loaded = cast(
+        cfg_load.Configuration, cfg_load.load(filename, raw, load_remote=load_remote)
+    )
+    if as_json:
+        value = loaded.to_dict() if hasattr(loaded, "to_dict") else loaded
+        cfg_load.dump.dump(value, sys.stdout, "json", max_depth, max_items)
+    elif hasattr(loaded, "pformat"):
+        print(loaded.pformat(max_depth=max_depth, max_items=max_items))
+    else:
+        print(pprint.pformat(cfg_load.dump.elide(loaded, max_depth, max_items)))
+
+
+def convert(source: str, target: str, format_name: Optional[str] = None) -> None:
+    """Convert the raw configuration in source to the format of target."""
+    config = cfg_load.load(source, load_raw=True)
+    if format_name is None:
+        fmt = cfg_load.formats.find_format(target, head=b"")
     else:
-        print(loaded)
+        fmt = cfg_load.formats.get_format(format_name)
+    if fmt.dump is None:
+        raise NotImplementedError(f"Writing '{fmt.name}' files is not supported.")
+    with open(target, "wb") as stream:
+        fmt.dump(config, stream)
+
+
+def query(
+    filename: str,
+    key: str,
+    raw: bool = False,
+    load_remote: bool = True,
+    text: bool = False,
+) -> None:
+    """Print the value of key in the configuration as JSON."""
+    value = cfg_load.subscriptions.lookup(
+        cfg_load.load(filename, raw, load_remote=load_remote), key
+    )
+    if text and isinstance(value, str):
+        print(value)
+    else:
+        print(to_json(value))
+
+
+def validate(filename: str, schema: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load a configuration file without downloading anything and report errors.
+
+    Returns
+    -------
+    result : Dict[str, Any]
+        With the keys 'filepath', 'valid' and 'errors'.
+    """
+    errors: List[Dict[str, str]] = []
+    try:
+        cfg_load.load(filename, load_remote=False, schema=schema)
+    except cfg_load.schema.ValidationError as exc:
+        errors = [{"path": path, "message": message} for path, message in exc.errors]
+    except Exception as exc:  # noqa
+        errors = [{"path": "$", "message": f"{type(exc).__name__}: {exc}"}]
+    return {"filepath": filename, "valid": not errors, "errors": errors}
+
+
+def batch(
+    command: str,
+    filenames: Iterable[str],
+    out: TextIO,
+    key: Optional[str] = None,
+    raw: bool = False,
+    load_remote: bool = True,
+    schema: Optional[str] = None,
+) -> bool:
+    """
+    Run command for many files in one process and write JSON lines to out.
+
+    Parameters
+    ----------
+    command : {'show', 'query', 'validate'}
+    filenames : Iterable[str]
+        Empty lines are skipped.
+    out : TextIO
+    key : str, optional
+        The key for 'query'.
+    raw : bool
+    load_remote : bool
+    schema : str, optional
+        A JSON Schema file for 'validate'.
+
+    Returns
+    -------
+    success : bool
+        True if the command worked for all files.
+    """
+    success = True
+    for line in filenames:
+        filename = line.strip()
+        if not filename:
+            continue
+        result: Dict[str, Any] = {"filepath": filename}
+        if command == "validate":
+            result = validate(filename, schema)
+            success = success and result["valid"]
+        else:
+            try:
+                loaded = cfg_load.load(filename, raw, load_remote=load_remote)
+                if command == "query":
+                    result["key"] = key
+                    result["value"] = cfg_load.subscriptions.lookup(
+                        loaded, cast(str, key)
+                    )
+                elif isinstance(loaded, cfg_load.Configuration):
+                    result["config"] = loaded.to_dict()
+                else:
+                    result["config"] = loaded
+            except Exception as exc:  # noqa
+                result["error"] = f"{type(exc).__name__}: {exc}"
+                success = False
+        out.write(to_json(result) + "\n")
+        out.flush()
+    return success
+
+
+def profile(
+    filename: str,
+    raw: bool = False,
+    load_remote: bool = True,
+    runs: int = 5,
+    top: int = 10,
+) -> Dict[str, Any]:
+    """
+    Load a configuration file several times and describe where time goes.
+
+    The first run is 'cold': it includes imports and caches which are filled
+    on first use, e.g. compiled schemas. The operating system's file cache is
+    not cleared. Memory is measured in an additional run with tracemalloc, as
+    tracing slows down loading.
+
+    Parameters
+    ----------
+    filename : str
+    raw : bool
+    load_remote : bool
+    runs : int
+    top : int
+        The number of the largest subtrees to report.
+
+    Returns
+    -------
+    report : Dict[str, Any]
+        With the keys 'filepath', 'runs', 'phases', 'total',
+        'peak_memory_bytes', 'nodes', 'keys', 'depth' and 'largest_subtrees'.
+        Durations are in seconds; 'warm' is the mean of all runs but the
+        first one.
+    """
+    events: List[cfg_load.timing.PhaseEvent] = []
+    hook = cfg_load.timing.add_hook(events.append)
+    durations: Dict[str, List[float]] = {}
+    totals = []
+    try:
+        for run in range(max(runs, 1)):
+            del events[:]
+            start = time.perf_counter()
+            loaded = cfg_load.load(filename, raw, load_remote=load_remote)
+            totals.append(time.perf_counter() - start)
+            for event in events:
+                name = event.name
+                if "format" in event.attributes:
+                    name = f"{name} ({event.attributes['format']})"
+                elif "key" in event.attributes:
+                    name = f"{name} ({event.attributes['key']})"
+                phase = durations.setdefault(name, [0.0] * run)
+                phase.append(event.duration)
+            for phase in durations.values():
+                phase.extend([0.0] * (run + 1 - len(phase)))
+    finally:
+        cfg_load.timing.remove_hook(hook)
+    tracemalloc.start()
+    try:
+        cfg_load.load(filename, raw, load_remote=load_remote)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    config = loaded.to_dict() if hasattr(loaded, "to_dict") else loaded
+    nb_keys, depth, sizes = _structure(config)
+    return {
+        "filepath": filename,
+        "runs": len(totals),
+        "phases": {name: _cold_warm(values) for name, values in durations.items()},
+        "total": _cold_warm(totals),
+        "peak_memory_bytes": peak_memory,
+        "nodes": cfg_load.timing.count_nodes(config),
+        "keys": nb_keys,
+        "depth": depth,
+        "largest_subtrees": [
+            {"key": key, "bytes": size}
+            for key, size in sorted(sizes.items(), key=lambda item: -item[1])[:top]
+        ],
+    }
+
+
+def _cold_warm(values: List[float]) -> Dict[str, Optional[float]]:
+    warm = values[1:]
+    return {"cold": values[0], "warm": sum(warm) / len(warm) if warm else None}
+
+
+def _structure(config: Any) -> Tuple[int, int, Dict[str, int]]:
+    """
+    Count the keys and get the depth and serialized size of the subtrees.
+
+    The sizes are the length of compact JSON. They are computed bottom-up,
+    so no subtree is serialized as a whole.
+    """
+    nb_keys = 0
+    depth = 0
+    sizes: Dict[str, int] = {}
+    # (node, dot-separated key, depth, children visited)
+    stack: List[Tuple[Any, str, int, bool]] = [(config, "", 0, False)]
+    node_sizes: Dict[int, int] = {}
+    while stack:
+        node, key, level, visited = stack.pop()
+        depth = max(depth, level)
+        if isinstance(node, dict):
+            items = [(str(child), value) for child, value in node.items()]
+        elif isinstance(node, (list, tuple)):
+            items = [(str(i), value) for i, value in enumerate(node)]
+        else:
+            continue
+        if not visited:
+            nb_keys += len(node) if isinstance(node, dict) else 0
+            stack.append((node, key, level, True))
+            for child, value in items:
+                stack.append(
+                    (value, f"{key}.{child}" if key else child, level + 1, False)
+                )
+            continue
+        # Brackets and separators
+        size = 2 + max(len(items) - 1, 0)
+        for child, value in items:
+            if isinstance(value, (dict, list, tuple)):
+                size += node_sizes[id(value)]
+            else:
+                size += len(json.dumps(value, default=str))
+            if isinstance(node, dict):
+                size += len(json.dumps(child)) + 1
+        node_sizes[id(node)] = size
+        if key:
+            sizes[key] = size
+    return nb_keys, depth, sizes
+
+
+def print_profile(report: Dict[str, Any]) -> None:
+    """Print the result of :func:`profile` as a table."""
+    print(f"{report['filepath']}: {report['runs']} runs")
+    rows = list(report["phases"].items()) + [("total", report["total"])]
+    width = max(len(name) for name, _ in rows)
+    print(f"{'phase':<{width}}  {'cold [ms]':>10}  {'warm [ms]':>10}")
+    for name, timing in rows:
+        warm = "-" if timing["warm"] is None else f"{timing['warm'] * 1000:.2f}"
+        print(f"{name:<{width}}  {timing['cold'] * 1000:>10.2f}  {warm:>10}")
+    print(f"peak memory: {report['peak_memory_bytes'] / 2**20:.2f} MiB")
+    print(
+        f"nodes: {report['nodes']}, keys: {report['keys']}, "
+        f"depth: {report['depth']}"
+    )
+    if report["largest_subtrees"]:
+        print("largest subtrees (bytes of JSON):")
+        for subtree in report["largest_subtrees"]:
+            print(f"{subtree['bytes']:>12}  {subtree['key']}")
+
+
+def entry_point(argv: Optional[List[str]] = None) -> int:
+    """Use this as an entry point for the CLI."""
+    args = parse_args(argv)
+    setup_logging()
+    if args.command == "show":
+        show(
+            args.filename,
+            args.raw,
+            args.load_remote,
+            args.json,
+            args.max_depth,
+            args.max_items,
+        )
+    elif args.command == "convert":
+        convert(args.source, args.target, args.format)
+    elif args.command == "query":
+        query(args.filename, args.key, args.raw, args.load_remote, args.text)
+    elif args.command == "validate":
+        result = validate(args.filename, args.schema)
+        if args.json:
+            print(to_json(result))
+        elif result["valid"]:
+            print(f"{args.filename}: valid")
+        else:
+            for error in result["errors"]:
+                print(f"{args.filename}: {error['path']}: {error['message']}")
+        return 0 if result["valid"] else 1
+    elif args.command == "batch":
+        success = batch(
+            args.batch_command,
+            sys.stdin,
+            sys.stdout,
+            key=args.key,
+            raw=args.raw,
+            load_remote=args.load_remote,
+            schema=args.schema,
+        )
+        return 0 if success else 1
+    elif args.command == "profile":
+        report = profile(args.filename, args.raw, args.load_remote, args.runs, args.top)
+        if args.json:
+            print(to_json(report))
+        else:
+            print_profile(report)
+    elif args.command == "serve":
+        # First party
+        import cfg_load.server
+
+        cfg_load.server.serve(args.socket_path, tuple(args.preload))
+    return 0
@@ -0,0 +1,176 @@
+"""
+Store large lists of numbers compactly.
+
+A list of 1000 floats takes about 32 kB as a Python list, but 8 kB as an
+:class:`array.array`. :func:`compact_lists` replaces long lists which contain
+only ints or only floats by a :class:`FrozenArray`, which behaves like a
+read-only list. As it can not be modified, copying a configuration does not
+copy it.
+"""
+
+# Core Library
+import array
+import collections.abc
+from typing import Any, Iterator, List
+
+# Lists with fewer elements are kept as they are
+DEFAULT_MIN_LENGTH = 256
+
+_INT64_MIN = -(2**63)
+_INT64_MAX = 2**63 - 1
+
+
+class FrozenArray(collections.abc.Sequence):
+    """
+    A read-only list of numbers, stored in an :class:`array.array`.
+
+    It is equal to the list with the same numbers. Slices are lists.
+
+    Parameters
+    ----------
+    values : array.array
+        Not copied; it must not be modified afterwards.
+    """
+
+    __slots__ = ("_array",)
+
+    def __init__(self, values: array.array):
+        self._array = values
+
+    @property
+    def typecode(self) -> str:
+        """'q' for ints and 'd' for floats."""
+        return self._array.typecode
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return self._array[index].tolist()
+        return self._array[index]
+
+    def __len__(self) -> int:
+        return len(self._array)
+
+    def __iter__(self) -> Iterator:
+        return iter(self._array)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, FrozenArray):
+            return self._array == other._array
+        if isinstance(other, list):
+            return len(other) == len(self._array) and self.tolist() == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self._array.tobytes())
+
+    def __repr__(self) -> str:
+        return f"FrozenArray({self._array.typecode!r}, {self._array.tolist()!r})"
+
+    def __copy__(self) -> "FrozenArray":
+        return self
+
+    def __deepcopy__(self, memo: Any) -> "FrozenArray":
+        return self
+
+    def __reduce__(self) -> Any:
+        return (_from_bytes, (self._array.typecode, self._array.tobytes()))
+
+    def tolist(self) -> List:
+        """Get the numbers as a list."""
+        return self._array.tolist()
+
+    def to_memoryview(self) -> memoryview:
+        """Get a read-only view of the numbers without copying them."""
+        return memoryview(self._array).toreadonly()
+
+    def to_numpy(self) -> Any:
+        """Get a read-only NumPy array which shares the memory."""
+        # Import here to make this dependency optional
+        # Third party
+        import numpy as np
+
+        return np.frombuffer(self.to_memoryview(), dtype=self._array.typecode)
+
+
+def _from_bytes(typecode: str, data: bytes) -> FrozenArray:
+    values = array.array(typecode)
+    values.frombytes(data)
+    return FrozenArray(values)
+
+
+def compact_lists(config: Any, min_length: int = DEFAULT_MIN_LENGTH) -> Any:
+    """
+    Replace lists of only ints or only floats by a :class:`FrozenArray`.
+
+    Lists with booleans, mixed ints and floats, or ints which do not fit
+    into 64 bits are kept, so the values do not change.
+
+    Parameters
+    ----------
+    config : Any
+        Modified in place.
+    min_length : int, optional
+        Shorter lists are kept.
+
+    Returns
+    -------
+    config : Any
+    """
+    stack = [config] if isinstance(config, (dict, list)) else []
+    while stack:
+        node = stack.pop()
+        keys: Any = node.keys() if isinstance(node, dict) else range(len(node))
+        for key in keys:
+            value = node[key]
+            if isinstance(value, dict):
+                stack.append(value)
+            elif isinstance(value, list):
+                compacted = _compact(value, min_length)
+                if compacted is None:
+                    stack.append(value)
+                else:
+                    node[key] = compacted
+    return config
+
+
+def _compact(values: List, min_length: int) -> Any:
+    if len(values) < min_length:
+        return None
+    kind = type(values[0])
+    if kind is int:
+        if all(
+            type(value) is int and _INT64_MIN <= value <= _INT64_MAX for value in values
+        ):
+            return FrozenArray(array.array("q", values))
+    elif kind is float:
+        if all(type(value) is float for value in values):
+            return FrozenArray(array.array("d", values))
+    return None
+
+
+def plain_lists(config: Any) -> Any:
+    """
+    Get config with every :class:`FrozenArray` replaced by a list.
+
+    Only the dicts and lists which contain a FrozenArray are copied; config
+    is returned as it is if there is none.
+
+    Parameters
+    ----------
+    config : Any
+
+    Returns
+    -------
+    config : Any
+    """
+    if isinstance(config, FrozenArray):
+        return config.tolist()
+    if isinstance(config, dict):
+        items = {key: plain_lists(value) for key, value in config.items()}
+        if any(items[key] is not value for key, value in config.items()):
+            return items
+    elif isinstance(config, list):
+        values = [plain_lists(value) for value in config]
+        if any(new is not old for new, old in zip(values, config)):
+            return values
+    return config
@@ -0,0 +1,311 @@
+"""
+Compute and apply structural differences between configurations.
+
+A delta is a list of operations in the style of JSON Patch (RFC 6902):
+
+    [{"op": "replace", "path": "/server/port", "value": 8081},
+     {"op": "remove", "path": "/server/debug"},
+     {"op": "add", "path": "/model/thresholds/3", "value": 0.9}]
+
+Paths are JSON Pointers (RFC 6901): keys are separated by '/', and '~' and
+'/' within a key are written as '~0' and '~1'.
+"""
+
+# Core Library
+import copy
+import hashlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Fingerprints of dicts and lists by id(); the node is kept to detect reuse
+FingerprintCache = Dict[int, Tuple[Any, bytes]]
+
+
+def fingerprint(node: Any, cache: Optional[FingerprintCache] = None) -> str:
+    """
+    Get a hash of node which is equal for equal (sub-)configurations.
+
+    Values of different types are different, e.g. 1 and True.
+
+    Parameters
+    ----------
+    node : Any
+    cache : FingerprintCache, optional
+        The fingerprints of all dicts and lists in node are stored here, so
+        they are not computed again for subtrees which are not modified.
+
+    Returns
+    -------
+    fingerprint : str
+        A hex digest.
+    """
+    return _fingerprint(node, {} if cache is None else cache).hex()
+
+
+def _fingerprint(node: Any, cache: FingerprintCache) -> bytes:
+    if isinstance(node, (dict, list)):
+        entry = cache.get(id(node))
+        if entry is not None and entry[0] is node:
+            return entry[1]
+    hasher = hashlib.blake2b(digest_size=16)
+    if isinstance(node, dict):
+        hasher.update(b"d")
+        # The order of keys does not matter, as for ==
+        for key_digest, value_digest in sorted(
+            (_fingerprint(key, cache), _fingerprint(value, cache))
+            for key, value in node.items()
+        ):
+            hasher.update(key_digest)
+            hasher.update(value_digest)
+    elif isinstance(node, list):
+        hasher.update(b"l")
+        for value in node:
+            hasher.update(_fingerprint(value, cache))
+    else:
+        hasher.update(f"{type(node).__name__}:{node!r}".encode("utf-8"))
+    digest = hasher.digest()
+    if isinstance(node, (dict, list)):
+        cache[id(node)] = (node, digest)
+    return digest
+
+
+def inherit_fingerprints(node: Any, cache: FingerprintCache) -> FingerprintCache:
+    """
+    Get the cached fingerprints of the subtrees of node which are in cache.
+
+    This is cheap for the result of :func:`patch`: only the copied dicts and
+    lists on the paths of the operations are visited.
+
+    Parameters
+    ----------
+    node : Any
+    cache : FingerprintCache
+        The fingerprints of the configuration which was patched.
+
+    Returns
+    -------
+    inherited : FingerprintCache
+    """
+    inherited: FingerprintCache = {}
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        entry = cache.get(id(node))
+        if entry is not None and entry[0] is node:
+            inherited[id(node)] = entry
+        elif isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return inherited
+
+
+def diff(
+    old: Any,
+    new: Any,
+    old_cache: Optional[FingerprintCache] = None,
+    new_cache: Optional[FingerprintCache] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Get the operations which turn old into new.
+
+    Subtrees which are the same object or have the same fingerprint are
+    skipped without looking at their content. Fingerprints which are not in
+    the caches are computed, so pass the same caches again for the next diff.
+
+    Parameters
+    ----------
+    old : Any
+    new : Any
+    old_cache : FingerprintCache, optional
+    new_cache : FingerprintCache, optional
+
+    Returns
+    -------
+    delta : List[Dict[str, Any]]
+        The values in the operations are the objects of new, not copies.
+    """
+    delta: List[Dict[str, Any]] = []
+    _diff(
+        old,
+        new,
+        "",
+        delta,
+        {} if old_cache is None else old_cache,
+        {} if new_cache is None else new_cache,
+    )
+    return delta
+
+
+def _diff(
+    old: Any,
+    new: Any,
+    path: str,
+    delta: List[Dict[str, Any]],
+    old_cache: FingerprintCache,
+    new_cache: FingerprintCache,
+) -> None:
+    if old is new:
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        if _fingerprint(old, old_cache) == _fingerprint(new, new_cache):
+            return
+        for key, value in old.items():
+            if key not in new:
+                delta.append({"op": "remove", "path": _join(path, key)})
+            else:
+                _diff(value, new[key], _join(path, key), delta, old_cache, new_cache)
+        for key, value in new.items():
+            if key not in old:
+                delta.append({"op": "add", "path": _join(path, key), "value": value})
+    elif isinstance(old, list) and isinstance(new, list):
+        if _fingerprint(old, old_cache) == _fingerprint(new, new_cache):
+            return
+        for i in range(min(len(old), len(new))):
+            _diff(old[i], new[i], _join(path, i), delta, old_cache, new_cache)
+        for i in range(len(old), len(new)):
+            delta.append({"op": "add", "path": _join(path, i), "value": new[i]})
+        # Remove from the end, so the indices of the operations stay valid
+        for i in range(len(old) - 1, len(new) - 1, -1):
+            delta.append({"op": "remove", "path": _join(path, i)})
+    elif type(old) is not type(new) or old != new:
+        delta.append({"op": "replace", "path": path, "value": new})
+
+
+def _join(path: str, key: Any) -> str:
+    return path + "/" + str(key).replace("~", "~0").replace("/", "~1")
+
+
+def join_path(keys: Sequence[Any]) -> str:
+    """
+    Get the JSON Pointer of keys; the inverse of :func:`split_path`.
+
+    >>> join_path(["a/b", "c~d", 0])
+    '/a~1b/c~0d/0'
+
+    Parameters
+    ----------
+    keys : Sequence[Any]
+
+    Returns
+    -------
+    path : str
+    """
+    path = ""
+    for key in keys:
+        path = _join(path, key)
+    return path
+
+
+def split_path(path: str) -> List[str]:
+    """
+    Split a JSON Pointer into its unescaped tokens.
+
+    >>> split_path("/server/hosts/0")
+    ['server', 'hosts', '0']
+    >>> split_path("/a~1b/c~0d")
+    ['a/b', 'c~d']
+
+    Parameters
+    ----------
+    path : str
+
+    Returns
+    -------
+    tokens : List[str]
+    """
+    if path == "":
+        return []
+    if not path.startswith("/"):
+        raise ValueError(f"A path has to start with '/', got '{path}'")
+    return [
+        token.replace("~1", "/").replace("~0", "~") for token in path[1:].split("/")
+    ]
+
+
+def patch(config: Any, delta: List[Dict[str, Any]]) -> Any:
+    """
+    Apply delta to config without modifying config.
+
+    Only the dicts and lists on the paths of the operations are copied; all
+    other subtrees are shared between config and the result.
+
+    Parameters
+    ----------
+    config : Any
+    delta : List[Dict[str, Any]]
+        As returned by :func:`diff`.
+
+    Returns
+    -------
+    patched : Any
+    """
+    root = config
+    # Containers which were copied for this patch, by id()
+    copies: Dict[int, Any] = {}
+
+    def own(node: Any) -> Any:
+        if id(node) not in copies:
+            node = copy.copy(node)
+            copies[id(node)] = node
+        return node
+
+    for operation in delta:
+        op = operation["op"]
+        tokens = split_path(operation["path"])
+        if not tokens:
+            if op != "replace":
+                raise ValueError(f"Can not '{op}' the root of a configuration")
+            root = copy.deepcopy(operation["value"])
+            copies[id(root)] = root
+            continue
+        root = own(root)
+        parent = root
+        for token in tokens[:-1]:
+            key = _resolve(parent, token, operation)
+            parent[key] = own(parent[key])
+            parent = parent[key]
+        if op == "remove":
+            del parent[_resolve(parent, tokens[-1], operation)]
+        elif op in ("add", "replace"):
+            value = copy.deepcopy(operation["value"])
+            if isinstance(parent, list) and tokens[-1] == "-":
+                parent.append(value)
+            elif isinstance(parent, list) and op == "add":
+                index = _index(parent, tokens[-1], operation, allow_end=True)
+                parent.insert(index, value)
+            elif isinstance(parent, dict) and op == "add":
+                parent[_key(parent, tokens[-1])] = value
+            else:
+                parent[_resolve(parent, tokens[-1], operation)] = value
+        else:
+            raise ValueError(f"Unknown op: {op!r}")
+    return root
+
+
+def _key(parent: Dict, token: str) -> Any:
+    """Find the key of parent which is written as token in a path."""
+    if token in parent:
+        return token
+    # YAML allows keys which are no strings, e.g. integers
+    for key in parent:
+        if str(key) == token:
+            return key
+    return token
+
+
+def _index(
+    parent: List, token: str, operation: Dict[str, Any], allow_end: bool = False
+) -> int:
+    if not token.isdigit() or int(token) > len(parent) - (0 if allow_end else 1):
+        raise ValueError(f"The path of {operation} does not exist")
+    return int(token)
+
+
+def _resolve(parent: Any, token: str, operation: Dict[str, Any]) -> Any:
+    if isinstance(parent, list):
+        return _index(parent, token, operation)
+    if isinstance(parent, dict):
+        key = _key(parent, token)
+        if key in parent:
+            return key
+    raise ValueError(f"The path of {operation} does not exist")
@@ -0,0 +1,193 @@
+"""Write configurations incrementally and shorten huge ones for display."""
+
+# Core Library
+import datetime
+import io
+import json
+from typing import IO, Any, Dict, List, Optional
+
+# Third party
+import yaml
+
+# First party
+import cfg_load.compact
+import cfg_load.formats
+
+# Chunks of the JSON encoder are collected up to this size before writing
+WRITE_BUFFER_SIZE = 2**16
+
+_YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+def elide(
+    config: Any, max_depth: Optional[int] = None, max_items: Optional[int] = None
+) -> Any:
+    """
+    Get a copy of config which is cut off at max_depth and max_items.
+
+    Only the part which is kept is copied, so this is cheap for huge configs.
+
+    Parameters
+    ----------
+    config : Any
+    max_depth : int, optional
+        Dicts and lists deeper than this are replaced by a string like
+        '<dict with 3 items>'. The top level has depth 0.
+    max_items : int, optional
+        Only the first max_items elements of every dict and list are kept.
+        A dict gets the key '...' and a list the element '<N more items>'.
+
+    Returns
+    -------
+    elided : Any
+    """
+    if max_depth is None and max_items is None:
+        return config
+    return _elide(config, 0, max_depth, max_items)
+
+
+def _elide(
+    node: Any, depth: int, max_depth: Optional[int], max_items: Optional[int]
+) -> Any:
+    if not isinstance(node, (dict, list, tuple, cfg_load.compact.FrozenArray)):
+        return node
+    kind = "dict" if isinstance(node, dict) else "list"
+    if max_depth is not None and depth > max_depth and len(node) > 0:
+        return f"<{kind} with {_items(len(node))}>"
+    nb_more = 0 if max_items is None else max(0, len(node) - max_items)
+    if isinstance(node, dict):
+        result: Dict[Any, Any] = {}
+        for i, (key, value) in enumerate(node.items()):
+            if nb_more and i == max_items:
+                break
+            result[key] = _elide(value, depth + 1, max_depth, max_items)
+        if nb_more:
+            result["..."] = f"<{_items(nb_more, 'more ')}>"
+        return result
+    items: List[Any] = [
+        _elide(value, depth + 1, max_depth, max_items)
+        for value in (node[:max_items] if nb_more else node)
+    ]
+    if nb_more:
+        items.append(f"<{_items(nb_more, 'more ')}>")
+    return items
+
+
+def _items(count: int, prefix: str = "") -> str:
+    return f"{count} {prefix}item" + ("" if count == 1 else "s")
+
+
+def dump(
+    config: Any,
+    stream: IO,
+    format: str = "yaml",  # noqa
+    max_depth: Optional[int] = None,
+    max_items: Optional[int] = None,
+    **kwargs: Any,
+) -> None:
+    """
+    Write config to stream without building the whole output in memory.
+
+    Parameters
+    ----------
+    config : Any
+    stream : IO
+        A binary stream. YAML and JSON can also be written to text streams.
+    format : str, optional (default: 'yaml')
+        The name of a format in :mod:`cfg_load.formats`. Without max_depth
+        and max_items, the output can be read by :func:`cfg_load.load`.
+    max_depth : int, optional
+        See :func:`elide`.
+    max_items : int, optional
+        See :func:`elide`.
+    **kwargs : Any
+        Passed to the writer, e.g. `indent` for JSON.
+    """
+    config = cfg_load.compact.plain_lists(elide(config, max_depth, max_items))
+    is_text = isinstance(stream, io.TextIOBase)
+    if format == "json":
+        kwargs.setdefault("indent", 4)
+        kwargs.setdefault("ensure_ascii", False)
+        kwargs.setdefault("default", str)
+        chunks: List[str] = []
+        size = 0
+        for chunk in json.JSONEncoder(**kwargs).iterencode(config):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= WRITE_BUFFER_SIZE:
+                _write(stream, "".join(chunks), is_text)
+                chunks, size = [], 0
+        _write(stream, "".join(chunks) + "\n", is_text)
+    elif format == "yaml":
+        kwargs.setdefault("allow_unicode", True)
+        kwargs.setdefault("default_flow_style", False)
+        kwargs.setdefault("sort_keys", False)
+        if not is_text:
+            kwargs.setdefault("encoding", "utf-8")
+        # The emitter writes to the stream while it walks the tree
+        yaml.dump(config, stream, Dumper=_YamlDumper, **kwargs)
+    else:
+        fmt = cfg_load.formats.get_format(format)
+        if fmt.dump is None:
+            raise NotImplementedError(f"Writing '{fmt.name}' files is not supported.")
+        if is_text:
+            raise TypeError(f"'{format}' can only be written to binary streams")
+        fmt.dump(config, stream, **kwargs)
+
+
+def _write(stream: IO, text: str, is_text: bool) -> None:
+    stream.write(text if is_text else text.encode("utf-8"))
+
+
+def canonical(config: Any) -> bytes:
+    """
+    Serialize config deterministically, e.g. to hash or compare it.
+
+    Equal configurations give the same bytes, no matter in which order the
+    keys were read: the output is UTF-8 encoded JSON without whitespace and
+    with sorted keys. Dates are written in ISO 8601, arrays of
+    `compact_lists` as lists, keys which are no strings with `str()`.
+
+    >>> canonical({"b": 1, "a": [True, None, 1.5]})
+    b'{"a":[true,null,1.5],"b":1}'
+
+    Parameters
+    ----------
+    config : Any
+
+    Returns
+    -------
+    serialized : bytes
+    """
+    return json.dumps(
+        _string_keys(config),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=_canonical_default,
+    ).encode("utf-8")
+
+
+def _string_keys(node: Any) -> Any:
+    if isinstance(node, dict):
+        result = {}
+        for key, value in node.items():
+            if not isinstance(key, str):
+                key = str(key)
+                if key in node or key in result:
+                    raise ValueError(f"The key {key!r} exists twice")
+            result[key] = _string_keys(value)
+        return result
+    if isinstance(node, (list, tuple)):
+        return [_string_keys(value) for value in node]
+    return node
+
+
+def _canonical_default(value: Any) -> Any:
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, cfg_load.compact.FrozenArray):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    raise TypeError(f"{type(value).__name__} can not be serialized: {value!r}")
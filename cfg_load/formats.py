@@ -0,0 +1,432 @@
+"""Registry of the file formats cfg_load can read and write."""
+
+# Core Library
+import collections
+import io
+import json
+import os
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+# Third party
+import yaml
+from six.moves import configparser
+
+
+class Format(NamedTuple):
+    """
+    A configuration file format.
+
+    Parameters
+    ----------
+    name : str
+        Short name of the format, e.g. 'yaml'.
+    extensions : Tuple[str, ...]
+        File extensions including the leading dot, e.g. ('.yaml', '.yml').
+    load : Callable
+        Gets a binary stream and returns the parsed configuration.
+    dump : Callable, optional
+        Gets a configuration and a binary stream and writes the configuration
+        to the stream.
+    magic : Tuple[bytes, ...]
+        Prefixes of the file content which identify the format. They are only
+        used if the extension is not known.
+    load_all : Callable, optional
+        Gets a binary stream and yields the documents in it one by one; used
+        by :func:`cfg_load.iter_load`.
+    """
+
+    name: str
+    extensions: Tuple[str, ...]
+    load: Callable[..., Any]
+    dump: Optional[Callable[..., None]] = None
+    magic: Tuple[bytes, ...] = ()
+    load_all: Optional[Callable[..., Iterator]] = None
+
+
+_FORMATS: List[Format] = []
+SNIFF_BYTES = 16
+
+_YamlSafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def register(fmt: Format) -> Format:
+    """
+    Register a file format.
+
+    Formats registered later take precedence over formats registered earlier,
+    so this can be used to replace a built-in loader.
+
+    Parameters
+    ----------
+    fmt : Format
+
+    Returns
+    -------
+    fmt : Format
+    """
+    _FORMATS.insert(0, fmt)
+    return fmt
+
+
+def list_formats() -> List[Format]:
+    """
+    Get all registered formats, the ones with the highest precedence first.
+
+    Returns
+    -------
+    formats : List[Format]
+    """
+    return list(_FORMATS)
+
+
+def get_format(name: str) -> Format:
+    """
+    Get a registered format by its name.
+
+    Parameters
+    ----------
+    name : str
+
+    Returns
+    -------
+    fmt : Format
+    """
+    for fmt in _FORMATS:
+        if fmt.name == name:
+            return fmt
+    raise NotImplementedError(f"The format '{name}' is not registered.")
+
+
+def find_format(filepath: str, head: Optional[bytes] = None) -> Format:
+    """
+    Find the format of a file by its extension or by its first bytes.
+
+    Parameters
+    ----------
+    filepath : str
+    head : bytes, optional
+        The first bytes of the file. If not given and the extension is not
+        known, they are read from filepath.
+
+    Returns
+    -------
+    fmt : Format
+    """
+    lower = filepath.lower()
+    for fmt in _FORMATS:
+        if lower.endswith(fmt.extensions):
+            return fmt
+    if head is None and os.path.isfile(filepath):
+        with open(filepath, "rb") as stream:
+            head = stream.read(SNIFF_BYTES)
+    if head:
+        for fmt in _FORMATS:
+            if fmt.magic and head.startswith(fmt.magic):
+                return fmt
+    raise NotImplementedError(f"Extension of the file '{filepath}' was not recognized.")
+
+
+def load_yaml_stream(stream: IO, safe_load: bool = True, **kwargs: Any) -> Dict:
+    """
+    Load a YAML document from a stream.
+
+    Parameters
+    ----------
+    stream : IO
+    safe_load : bool, optional (default: True)
+        This triggers the usage of yaml.safe_load.
+        yaml.load can call any Python function and should only be used if the
+        source of the configuration file is trusted.
+    **kwargs : Any
+        Arbitrary keyword arguments which get passed to yaml.load.
+
+    Returns
+    -------
+    config : Dict
+    """
+    if safe_load:
+        return yaml.safe_load(stream)
+    return yaml.load(stream, **kwargs)  # noqa
+
+
+def iter_yaml_stream(stream: IO, safe_load: bool = True, **kwargs: Any) -> Iterator:
+    """
+    Load the documents of a YAML stream one by one.
+
+    Documents are separated by '---'. The C loader of libyaml is used if it
+    is available.
+
+    Parameters
+    ----------
+    stream : IO
+    safe_load : bool, optional (default: True)
+        See :func:`load_yaml_stream`.
+    **kwargs : Any
+        Arbitrary keyword arguments which get passed to yaml.load_all.
+
+    Yields
+    ------
+    config : Any
+    """
+    if safe_load:
+        return yaml.load_all(stream, Loader=_YamlSafeLoader)
+    return yaml.load_all(stream, **kwargs)  # noqa
+
+
+def dump_yaml_stream(config: Any, stream: IO, **kwargs: Any) -> None:
+    """Write config as YAML to a binary stream."""
+    kwargs.setdefault("allow_unicode", True)
+    kwargs.setdefault("default_flow_style", False)
+    yaml.safe_dump(config, stream, encoding="utf-8", **kwargs)
+
+
+def load_json_stream(stream: IO, **kwargs: Any) -> Dict:
+    """
+    Load a JSON document from a stream.
+
+    Parameters
+    ----------
+    stream : IO
+    **kwargs : Any
+        Arbitrary keyword arguments which get passed to json.load.
+
+    Returns
+    -------
+    config : Dict
+    """
+    return json.load(stream, **kwargs)
+
+
+def iter_jsonl_stream(stream: IO, **kwargs: Any) -> Iterator:
+    """
+    Load the JSON documents of a JSON Lines stream one by one.
+
+    Empty lines are skipped.
+
+    Parameters
+    ----------
+    stream : IO
+    **kwargs : Any
+        Arbitrary keyword arguments which get passed to json.loads.
+
+    Yields
+    ------
+    config : Any
+    """
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line, **kwargs)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Line {line_number}: {exc}") from exc
+
+
+def load_jsonl_stream(stream: IO, **kwargs: Any) -> List:
+    """
+    Load all documents of a JSON Lines stream as a list.
+
+    Parameters
+    ----------
+    stream : IO
+    **kwargs : Any
+        Arbitrary keyword arguments which get passed to json.loads.
+
+    Returns
+    -------
+    configs : List
+    """
+    return list(iter_jsonl_stream(stream, **kwargs))
+
+
+def dump_jsonl_stream(configs: Any, stream: IO, **kwargs: Any) -> None:
+    """Write every element of configs as one line of JSON to a binary stream."""
+    kwargs.setdefault("ensure_ascii", False)
+    for config in configs:
+        stream.write(json.dumps(config, **kwargs).encode("utf-8") + b"\n")
+
+
+def dump_json_stream(config: Any, stream: IO, **kwargs: Any) -> None:
+    """Write config as JSON to a binary stream."""
+    kwargs.setdefault("indent", 4)
+    kwargs.setdefault("ensure_ascii", False)
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="\n")
+    json.dump(config, text, **kwargs)
+    text.detach()
+
+
+def load_ini_stream(stream: IO, **kwargs: Any) -> collections.OrderedDict:
+    """
+    Load an INI document from a binary stream.
+
+    Parameters
+    ----------
+    stream : IO
+    **kwargs : Any
+        Arbitrary keyword arguments which get passed to ConfigParser.
+
+    Returns
+    -------
+    config : OrderedDict
+    """
+    config = configparser.ConfigParser(**kwargs)
+    config.read_file(io.TextIOWrapper(stream, encoding="utf-8"))
+    # This is not so nice as it accesses a private property of the INI parser
+    return config._sections  # type: ignore
+
+
+def dump_ini_stream(config: Dict, stream: IO, **kwargs: Any) -> None:
+    """Write a dict of sections as INI to a binary stream."""
+    parser = configparser.ConfigParser(**kwargs)
+    parser.read_dict(config)
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="\n")
+    parser.write(text)
+    text.detach()
+
+
+def load_toml_stream(stream: IO, **kwargs: Any) -> Dict:
+    """
+    Load a TOML document from a binary stream.
+
+    Uses tomllib on Python 3.11+ and the tomli backport otherwise.
+
+    Parameters
+    ----------
+    stream : IO
+    **kwargs : Any
+        Arbitrary keyword arguments which get passed to tomllib.load.
+
+    Returns
+    -------
+    config : Dict
+    """
+    # Import here to make this dependency optional
+    try:
+        # Core Library
+        import tomllib
+    except ImportError:  # pragma: no cover
+        # Third party
+        import tomli as tomllib  # type: ignore
+    return tomllib.load(stream, **kwargs)
+
+
+def dump_toml_stream(config: Dict, stream: IO, **kwargs: Any) -> None:
+    """Write config as TOML to a binary stream (needs tomli_w)."""
+    # Import here to make this dependency optional
+    # Third party
+    import tomli_w
+
+    tomli_w.dump(config, stream, **kwargs)
+
+
+def load_msgpack_stream(stream: IO, **kwargs: Any) -> Dict:
+    """
+    Load a MessagePack document from a binary stream.
+
+    Parameters
+    ----------
+    stream : IO
+    **kwargs : Any
+        Arbitrary keyword arguments which get passed to msgpack.unpack.
+
+    Returns
+    -------
+    config : Dict
+    """
+    # Import here to make this dependency optional
+    # Third party
+    import msgpack
+
+    kwargs.setdefault("raw", False)
+    kwargs.setdefault("strict_map_key", False)
+    return msgpack.unpack(stream, **kwargs)
+
+
+def dump_msgpack_stream(config: Any, stream: IO, **kwargs: Any) -> None:
+    """Write config as MessagePack to a binary stream."""
+    # Import here to make this dependency optional
+    # Third party
+    import msgpack
+
+    msgpack.pack(config, stream, **kwargs)
+
+
+def load_cbor_stream(stream: IO, **kwargs: Any) -> Dict:
+    """
+    Load a CBOR document from a binary stream.
+
+    Parameters
+    ----------
+    stream : IO
+    **kwargs : Any
+        Arbitrary keyword arguments which get passed to cbor2.load.
+
+    Returns
+    -------
+    config : Dict
+    """
+    # Import here to make this dependency optional
+    # Third party
+    import cbor2
+
+    return cbor2.load(stream, **kwargs)
+
+
+def dump_cbor_stream(config: Any, stream: IO, **kwargs: Any) -> None:
+    """Write config as CBOR to a binary stream."""
+    # Import here to make this dependency optional
+    # Third party
+    import cbor2
+
+    cbor2.dump(config, stream, **kwargs)
+
+
+# A configuration is a map at the top level, so only map headers are used to
+# detect the binary formats: fixmap / map16 / map32 for MessagePack and the
+# self-describe tag or a map header for CBOR.
+_MSGPACK_MAGIC = tuple(bytes([b]) for b in list(range(0x80, 0x90)) + [0xDE, 0xDF])
+_CBOR_MAGIC = (b"\xd9\xd9\xf7",) + tuple(
+    bytes([b]) for b in list(range(0xA0, 0xBC)) + [0xBF]
+)
+
+register(Format("cbor", (".cbor",), load_cbor_stream, dump_cbor_stream, _CBOR_MAGIC))
+register(
+    Format(
+        "msgpack",
+        (".msgpack", ".mpk"),
+        load_msgpack_stream,
+        dump_msgpack_stream,
+        _MSGPACK_MAGIC,
+    )
+)
+register(Format("toml", (".toml",), load_toml_stream, dump_toml_stream))
+register(Format("ini", (".ini",), load_ini_stream, dump_ini_stream))
+register(Format("json", (".json",), load_json_stream, dump_json_stream))
+register(
+    Format(
+        "jsonl",
+        (".jsonl", ".ndjson"),
+        load_jsonl_stream,
+        dump_jsonl_stream,
+        load_all=iter_jsonl_stream,
+    )
+)
+register(
+    Format(
+        "yaml",
+        (".yaml", ".yml"),
+        load_yaml_stream,
+        dump_yaml_stream,
+        load_all=iter_yaml_stream,
+    )
+)
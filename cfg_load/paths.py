@@ -2,36 +2,132 @@
 
 # Core Library
 import os
-from typing import Dict
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
 
-def make_paths_absolute(dir_: str, cfg: Dict) -> Dict:
+def make_paths_absolute(
+    dir_: str,
+    cfg: Dict,
+    expand_vars: bool = False,
+    check_exists: bool = False,
+    cache: Optional[Dict[str, str]] = None,
+) -> Dict:
     """
     Make all values for keys ending with `_path` absolute to dir_.
 
+    Nested dicts and lists are visited iteratively. Keys which start with `_`
+    are skipped together with their values, and values which are no strings,
+    e.g. `None`, are kept as they are. Every distinct value is resolved only
+    once.
+
     Parameters
     ----------
     dir_ : str
     cfg : Dict
+    expand_vars : bool, optional (default: False)
+        Replace environment variables like `$DATA_DIR` in the paths.
+    check_exists : bool, optional (default: False)
+        Raise a FileNotFoundError which lists all paths that do not exist.
+        Each directory is listed only once, no matter how many of the paths
+        are in it.
+    cache : Dict[str, str], optional
+        Resolved paths of dir_ by the value in the configuration. Pass the
+        same dict again to reuse them for another configuration in dir_.
 
     Returns
     -------
     cfg : Dict
     """
-    if hasattr(cfg, "keys"):
-        for key in cfg.keys():
-            if hasattr(key, "endswith"):
-                if key.startswith("_"):
-                    continue
-                if key.endswith("_path"):
-                    if cfg[key].startswith("~"):
-                        cfg[key] = os.path.expanduser(cfg[key])
-                    else:
-                        cfg[key] = os.path.join(dir_, cfg[key])
-                    cfg[key] = os.path.abspath(cfg[key])
-            if type(cfg[key]) is dict:
-                cfg[key] = make_paths_absolute(dir_, cfg[key])
-    elif type(cfg) is list:
-        for i, el in enumerate(cfg):
-            cfg[i] = make_paths_absolute(dir_, el)
+    if cache is None:
+        cache = {}
+    base = os.path.abspath(dir_)
+    stack: List[Any] = [cfg]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if isinstance(key, str):
+                    if key.startswith("_"):
+                        continue
+                    if key.endswith("_path") and isinstance(value, str):
+                        resolved = cache.get(value)
+                        if resolved is None:
+                            resolved = _resolve(base, value, expand_vars)
+                            cache[value] = resolved
+                        node[key] = resolved
+                        continue
+                if isinstance(value, (dict, list)):
+                    stack.append(value)
+        elif isinstance(node, list):
+            stack.extend(value for value in node if isinstance(value, (dict, list)))
+    if check_exists:
+        missing = _missing_paths(set(cache.values()))
+        if missing:
+            raise FileNotFoundError(
+                f"{len(missing)} paths do not exist: " + ", ".join(sorted(missing))
+            )
     return cfg
+
+
+def iter_paths(cfg: Dict) -> Iterator[Tuple[Tuple[Any, ...], str]]:
+    """
+    Get the keys and values of all paths which make_paths_absolute changes.
+
+    Parameters
+    ----------
+    cfg : Dict
+
+    Yields
+    ------
+    keys, value : Tuple[Tuple[Any, ...], str]
+        The keys of the value in cfg and the value.
+    """
+    stack: List[Tuple[Tuple[Any, ...], Any]] = [((), cfg)]
+    while stack:
+        keys, node = stack.pop()
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if isinstance(key, str):
+                    if key.startswith("_"):
+                        continue
+                    if key.endswith("_path") and isinstance(value, str):
+                        yield keys + (key,), value
+                        continue
+                if isinstance(value, (dict, list)):
+                    stack.append((keys + (key,), value))
+        elif isinstance(node, list):
+            stack.extend(
+                (keys + (index,), value)
+                for index, value in enumerate(node)
+                if isinstance(value, (dict, list))
+            )
+
+
+def _resolve(base: str, value: str, expand_vars: bool) -> str:
+    """Get the absolute path of value relative to the absolute path base."""
+    if expand_vars:
+        value = os.path.expandvars(value)
+    if value.startswith("~"):
+        return os.path.abspath(os.path.expanduser(value))
+    # The same as abspath(join(base, value)), but without calling getcwd()
+    return os.path.normpath(os.path.join(base, value))
+
+
+def _missing_paths(paths: Set[str]) -> List[str]:
+    """Find the paths which do not exist by listing each directory once."""
+    by_directory: Dict[str, Set[str]] = {}
+    for path in paths:
+        directory, name = os.path.split(path)
+        by_directory.setdefault(directory, set()).add(name)
+    missing: List[str] = []
+    for directory, names in by_directory.items():
+        try:
+            with os.scandir(directory) as entries:
+                existing = {entry.name for entry in entries}
+        except OSError:
+            existing = set()
+        # The root directory itself has no name
+        missing.extend(
+            os.path.join(directory, name) for name in names - existing if name
+        )
+    return missing
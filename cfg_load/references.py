@@ -0,0 +1,374 @@
+"""
+Resolve references like `${env:HOME}` in configurations.
+
+A string value can contain references of the form `${scheme:name}`:
+
+* `${env:DB_HOST}`: the environment variable DB_HOST
+* `${file:/run/secrets/db}`: the content of a file, without trailing newline
+* `${ref:database.host}`: another value of the same configuration
+
+If the whole string is one reference, it is replaced by the resolved value,
+which might be a number, a list or a dict. Otherwise the resolved values are
+inserted as strings. Write `$${` to get a literal `${`.
+
+Further schemes, e.g. for a secret store, are added with :func:`register`.
+All names of one scheme are resolved with a single call of the resolver.
+"""
+
+# Core Library
+import copy
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# First party
+import cfg_load.compact
+import cfg_load.subscriptions
+
+_PATTERN = re.compile(r"(\$?)\$\{([A-Za-z_][\w-]*):([^}]*)\}")
+
+
+class ReferenceCycleError(ValueError):
+    """
+    References which refer to each other.
+
+    Parameters
+    ----------
+    cycle : List[str]
+        The dot-separated keys of the values in the cycle.
+    """
+
+    def __init__(self, cycle: List[str]):
+        super().__init__("Reference cycle: " + " -> ".join(cycle))
+        self.cycle = cycle
+
+
+class Resolver:
+    """
+    Base class of the resolvers of one scheme.
+
+    Parameters
+    ----------
+    ttl : float, optional (default: 0)
+        Seconds during which resolved values are cached. 0 disables caching.
+    """
+
+    def __init__(self, ttl: float = 0.0):
+        self.ttl = ttl
+
+    def resolve_many(self, names: List[str]) -> Dict[str, Any]:
+        """
+        Get the values of names.
+
+        Parameters
+        ----------
+        names : List[str]
+
+        Returns
+        -------
+        values : Dict[str, Any]
+            Names which can not be resolved are missing.
+        """
+        raise NotImplementedError
+
+
+class EnvResolver(Resolver):
+    """Resolve environment variables."""
+
+    def resolve_many(self, names: List[str]) -> Dict[str, Any]:
+        """Get the values of the environment variables names."""
+        return {name: os.environ[name] for name in names if name in os.environ}
+
+
+class FileResolver(Resolver):
+    """
+    Resolve the content of files, e.g. Docker secrets.
+
+    Parameters
+    ----------
+    ttl : float, optional (default: 60)
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        super().__init__(ttl)
+
+    def resolve_many(self, names: List[str]) -> Dict[str, Any]:
+        """Get the content of the files names."""
+        values = {}
+        for name in names:
+            if os.path.isfile(name):
+                with open(name) as f:
+                    values[name] = f.read().rstrip("\n")
+        return values
+
+
+class LocalSecretsResolver(Resolver):
+    """
+    Resolve names from a local configuration file.
+
+    This is meant to replace a secret store in tests and local development:
+
+    >> cfg_load.references.register("vault", LocalSecretsResolver("secrets.yaml"))
+
+    Names are dot-separated keys of the file, e.g. `${vault:db.password}`.
+
+    Parameters
+    ----------
+    filepath : str
+        A file in any format which :func:`cfg_load.load` can read.
+    ttl : float, optional (default: 0)
+    """
+
+    def __init__(self, filepath: str, ttl: float = 0.0):
+        super().__init__(ttl)
+        self.filepath = filepath
+
+    def resolve_many(self, names: List[str]) -> Dict[str, Any]:
+        """Get the values of the dot-separated keys names."""
+        secrets = cfg_load.load(self.filepath, load_raw=True)
+        values = {}
+        for name in names:
+            exists, value = cfg_load.subscriptions.get_subtree(
+                secrets, cfg_load.subscriptions.split_keys(name)
+            )
+            if exists:
+                values[name] = value
+        return values
+
+
+_RESOLVERS: Dict[str, Resolver] = {"env": EnvResolver(), "file": FileResolver()}
+
+# (scheme, name) -> (value, expiry time)
+_CACHE: Dict[Tuple[str, str], Tuple[Any, float]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def register(scheme: str, resolver: Resolver) -> None:
+    """
+    Use resolver for references of the form `${scheme:name}`.
+
+    Parameters
+    ----------
+    scheme : str
+    resolver : Resolver
+    """
+    if scheme == "ref":
+        raise ValueError("The scheme 'ref' can not be replaced")
+    _RESOLVERS[scheme] = resolver
+
+
+def clear_cache() -> None:
+    """Forget all cached values, e.g. after rotating secrets."""
+    with _CACHE_LOCK:
+        _CACHE.clear()
+
+
+def has_references(value: Any) -> bool:
+    """
+    Check if value is a string which contains references.
+
+    >>> has_references("${env:HOME}/data")
+    True
+    >>> has_references("$${env:HOME}")
+    False
+    """
+    if not isinstance(value, str) or "${" not in value:
+        return False
+    return any(not match.group(1) for match in _PATTERN.finditer(value))
+
+
+class References:
+    """
+    Resolve the references in one configuration in place.
+
+    Parameters
+    ----------
+    config : Dict
+    resolvers : Dict[str, Resolver], optional
+        Used in addition to the registered resolvers.
+    """
+
+    def __init__(self, config: Dict, resolvers: Optional[Dict[str, Resolver]] = None):
+        self.config = config
+        self.resolvers = {**_RESOLVERS, **(resolvers or {})}
+        self._values: Dict[Tuple[str, str], Any] = {}
+        # (id(container), key) of resolved values
+        self._done: Set[Tuple[int, Any]] = set()
+        # Values which are resolved at the moment, to detect cycles
+        self._active: Set[Tuple[int, Any]] = set()
+        self._stack: List[str] = []
+        self._all_done = False
+        self._lock = threading.RLock()
+
+    def resolve(self, keys: Tuple[Any, ...] = ()) -> bool:
+        """
+        Resolve all references in the subtree at keys.
+
+        Parameters
+        ----------
+        keys : Tuple[Any, ...]
+            The keys of the subtree. The whole configuration by default.
+
+        Returns
+        -------
+        resolved : bool
+            False if the subtree was resolved before.
+        """
+        with self._lock:
+            if not keys:
+                if self._all_done:
+                    return False
+                self._prefetch(self.config)
+                for key in _children(self.config):
+                    self._resolve_value(self.config, key, [])
+                self._all_done = True
+                return True
+            exists, parent = cfg_load.subscriptions.get_subtree(self.config, keys[:-1])
+            if not exists or not isinstance(parent, (dict, list)):
+                return False
+            key = keys[-1]
+            if (id(parent), key) in self._done:
+                return False
+            try:
+                value = parent[key]
+            except (KeyError, IndexError, TypeError):
+                return False
+            self._prefetch(value)
+            self._resolve_value(parent, key, list(keys[:-1]))
+            return True
+
+    def _prefetch(self, node: Any) -> None:
+        """Resolve the names of all schemes in node with one call each."""
+        missing: Dict[str, Set[str]] = {}
+        for scheme, name in _external_references(node, self._done):
+            if (scheme, name) not in self._values:
+                missing.setdefault(scheme, set()).add(name)
+        now = time.monotonic()
+        for scheme, names in missing.items():
+            if scheme not in self.resolvers:
+                raise KeyError(f"No resolver for references '${{{scheme}:...}}'")
+            resolver = self.resolvers[scheme]
+            to_resolve = []
+            with _CACHE_LOCK:
+                for name in names:
+                    cached = _CACHE.get((scheme, name))
+                    if cached is not None and cached[1] > now:
+                        self._values[(scheme, name)] = cached[0]
+                    else:
+                        to_resolve.append(name)
+            if not to_resolve:
+                continue
+            values = resolver.resolve_many(sorted(to_resolve))
+            for name in to_resolve:
+                if name not in values:
+                    raise KeyError(f"Could not resolve '${{{scheme}:{name}}}'")
+                self._values[(scheme, name)] = values[name]
+            if resolver.ttl > 0:
+                with _CACHE_LOCK:
+                    for name in to_resolve:
+                        _CACHE[(scheme, name)] = (values[name], now + resolver.ttl)
+
+    def _resolve_value(self, parent: Any, key: Any, path: List[Any]) -> None:
+        """Resolve parent[key]; path contains the keys of parent."""
+        location = (id(parent), key)
+        if location in self._done:
+            return
+        path = path + [key]
+        if location in self._active:
+            cycle = self._stack[self._stack.index(_dotted(path)) :]
+            raise ReferenceCycleError(cycle + [_dotted(path)])
+        self._active.add(location)
+        self._stack.append(_dotted(path))
+        try:
+            value = parent[key]
+            if isinstance(value, (dict, list)):
+                for child_key in _children(value):
+                    self._resolve_value(value, child_key, path)
+            elif isinstance(value, str) and "${" in value:
+                parent[key] = self._substitute(value, path)
+        finally:
+            self._active.discard(location)
+            self._stack.pop()
+        self._done.add(location)
+
+    def _substitute(self, value: str, path: List[Any]) -> Any:
+        matches = list(_PATTERN.finditer(value))
+        if len(matches) == 1 and matches[0].group(0) == value:
+            if not matches[0].group(1):
+                return self._lookup(matches[0].group(2), matches[0].group(3))
+
+        def replace(match: Any) -> str:
+            if match.group(1):
+                return match.group(0)[1:]
+            return str(self._lookup(match.group(2), match.group(3)))
+
+        return _PATTERN.sub(replace, value)
+
+    def _lookup(self, scheme: str, name: str) -> Any:
+        if scheme != "ref":
+            return self._values[(scheme, name)]
+        keys = cfg_load.subscriptions.split_keys(name)
+        exists, parent = cfg_load.subscriptions.get_subtree(self.config, keys[:-1])
+        is_list = isinstance(parent, (list, cfg_load.compact.FrozenArray))
+        if exists and keys and is_list and keys[-1].isdigit():
+            key: Any = int(keys[-1])
+            exists = key < len(parent)
+        elif exists and keys and isinstance(parent, dict):
+            key = keys[-1]
+            exists = key in parent
+        else:
+            exists = False
+        if not exists:
+            raise KeyError(f"Could not resolve '${{ref:{name}}}'")
+        if (id(parent), key) not in self._done:
+            self._prefetch(parent[key])
+            self._resolve_value(parent, key, list(keys[:-1]))
+        value = parent[key]
+        return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+
+def _dotted(path: List[Any]) -> str:
+    return ".".join(str(key) for key in path)
+
+
+def _children(node: Any) -> Iterable[Any]:
+    if isinstance(node, dict):
+        return list(node.keys())
+    return range(len(node))
+
+
+def _external_references(
+    node: Any, done: Set[Tuple[int, Any]]
+) -> Iterable[Tuple[str, str]]:
+    """Get all (scheme, name) of node which are not `ref` and not resolved."""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (dict, list)):
+            stack.extend(
+                node[key] for key in _children(node) if (id(node), key) not in done
+            )
+        elif isinstance(node, str) and "${" in node:
+            for match in _PATTERN.finditer(node):
+                if not match.group(1) and match.group(2) != "ref":
+                    yield match.group(2), match.group(3)
+
+
+def resolve(config: Dict, resolvers: Optional[Dict[str, Resolver]] = None) -> Dict:
+    """
+    Resolve all references in config in place.
+
+    Parameters
+    ----------
+    config : Dict
+    resolvers : Dict[str, Resolver], optional
+        Used in addition to the registered resolvers.
+
+    Returns
+    -------
+    config : Dict
+    """
+    References(config, resolvers).resolve()
+    return config
@@ -1,27 +1,118 @@
 """Load files from remote locations."""
 
 # Core Library
+import hashlib
+import json
+import logging
 import os
-from urllib.request import urlcleanup, urlretrieve
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.request import urlopen
 
 # Third party
 import mypy_boto3_s3 as s3
 import requests
+import urllib3
 
+logger = logging.getLogger(__name__)
 
-def load(source_url: str, sink_path: str, policy: str = "load_if_missing") -> None:
+KNOWN_PROTOCOLS = ("http://", "https://", "ftp://", "s3://")
+
+# Seconds to wait for a server before the cached copy is used
+DEFAULT_TIMEOUT = 30.0
+
+# Number of files which are downloaded at the same time by load_directory
+DEFAULT_WORKERS = 8
+
+# Name of the file in which load_directory stores what it downloaded
+DIRECTORY_INDEX = ".cfg_load-index.json"
+
+COPY_BUFFER_SIZE = 2**20
+
+# Suffix of the files in which digests of downloaded files are cached
+DIGEST_SUFFIX = ".cfg_load-digest"
+
+# Suffix of partial HTTP downloads, which are continued by the next attempt
+PART_SUFFIX = ".part"
+
+# Files of this size are downloaded in DEFAULT_SEGMENTS parallel ranges
+PARALLEL_THRESHOLD = 64 * 2**20
+DEFAULT_SEGMENTS = 4
+
+# Runs the downloads of configurations with load_remote='background'
+_BACKGROUND: Optional[ThreadPoolExecutor] = None
+_BACKGROUND_LOCK = threading.Lock()
+
+
+class ChecksumError(ValueError):
+    """The content of a file does not have the expected digest."""
+
+
+def submit(function: Callable[..., Any], *args: Any) -> Future:
+    """
+    Run function(*args) in the thread pool for background downloads.
+
+    The pool has DEFAULT_WORKERS threads and is shared by all configurations.
+
+    Parameters
+    ----------
+    function : Callable
+    *args : Any
+
+    Returns
+    -------
+    future : concurrent.futures.Future
+    """
+    global _BACKGROUND
+    with _BACKGROUND_LOCK:
+        if _BACKGROUND is None:
+            _BACKGROUND = ThreadPoolExecutor(
+                max_workers=DEFAULT_WORKERS, thread_name_prefix="cfg_load-remote"
+            )
+    return _BACKGROUND.submit(function, *args)
+
+
+def load(
+    source_url: str,
+    sink_path: str,
+    policy: str = "load_if_missing",
+    sha256: Optional[str] = None,
+    md5: Optional[str] = None,
+    segments: Optional[int] = None,
+) -> None:
     """
     Load remote files from source_url to sink_path.
 
+    The file is written to a temporary file first, so sink_path never
+    contains a partial download.
+
     Parameters
     ----------
     source_url : str
     sink_path : str
     policy : {'load_always', 'load_if_missing'}
+    sha256 : str, optional
+        The expected SHA-256 hex digest. It is computed while the file is
+        downloaded; a mismatch raises a :class:`ChecksumError`. An existing
+        sink_path is only kept with 'load_if_missing' if it matches.
+    md5 : str, optional
+        The expected MD5 hex digest, used like sha256.
+    segments : int, optional
+        The number of parallel range requests for HTTP downloads. See
+        :func:`load_requests`.
     """
+    expected = _expected_digest(sha256, md5)
     file_exists = os.path.isfile(sink_path)
     if file_exists and policy == "load_if_missing":
-        return
+        if expected is None or verify_file(sink_path, *expected):
+            return
+        logger.warning(
+            f"The {expected[0]} of '{sink_path}' does not match, loading it again"
+        )
     known_protocols = [
         ("http://", load_requests),
         ("https://", load_requests),
@@ -30,33 +121,274 @@ def load(source_url: str, sink_path: str, policy: str = "load_if_missing") -> No
     ]
     for protocol, handler in known_protocols:
         if source_url.startswith(protocol):
-            handler(source_url, sink_path)
+            if handler is load_requests:
+                load_requests(source_url, sink_path, expected, segments=segments)
+            else:
+                handler(source_url, sink_path, expected)
             break
     else:
         raise RuntimeError(f"Unknown protocol: source_url='{source_url}'")
 
 
-def load_requests(source_url: str, sink_path: str) -> None:
+def load_requests(
+    source_url: str,
+    sink_path: str,
+    expected: Optional[Tuple[str, str]] = None,
+    chunk_size: int = COPY_BUFFER_SIZE,
+    segments: Optional[int] = None,
+) -> None:
     """
     Load a file from an URL (e.g. http).
 
+    The file is downloaded to `sink_path + '.part'`. If a download is
+    interrupted, the next call continues it with a `Range` request, as long
+    as the server supports ranges and the file did not change (`If-Range`).
+
     Parameters
     ----------
     source_url : str
         Where to load the file from.
     sink_path : str
         Where the loaded file is stored.
+    expected : Tuple[str, str], optional
+        The algorithm and hex digest which the file has to have.
+    chunk_size : int, optional
+        Bytes which are read from the socket at once.
+    segments : int, optional
+        Download this many ranges of the file in parallel. By default, files
+        of at least PARALLEL_THRESHOLD bytes are downloaded in DEFAULT_SEGMENTS
+        segments if the server supports ranges. The digest of a file which is
+        downloaded in segments is computed after the download.
+    """
+    part_path = sink_path + PART_SUFFIX
+    state = _read_part_state(part_path)
+    if state.get("url") != source_url or (
+        state.get("segments") and not _is_unchanged(source_url, state)
+    ):
+        _remove_part(part_path)
+        state = {"url": source_url}
+    if not state.get("segments"):
+        digest = _download_sequential(
+            source_url,
+            part_path,
+            state,
+            chunk_size,
+            segments,
+            None if expected is None else expected[0],
+        )
+    if state.get("segments"):
+        _download_segments(source_url, part_path, state, chunk_size)
+        digest = None if expected is None else _hash_file(part_path, expected[0])
+    if expected is not None and digest != expected[1]:
+        _remove_part(part_path)
+        raise ChecksumError(
+            f"The {expected[0]} of '{source_url}' is {digest}, "
+            f"but {expected[1]} was expected"
+        )
+    os.replace(part_path, sink_path)
+    _remove_part(part_path)
+    if expected is not None:
+        _store_digest(sink_path, expected[0], expected[1], os.stat(sink_path))
+
+
+def _download_sequential(
+    source_url: str,
+    part_path: str,
+    state: Dict[str, Any],
+    chunk_size: int,
+    segments: Optional[int],
+    algorithm: Optional[str],
+) -> Optional[str]:
+    """
+    Download source_url to part_path, continuing a partial download.
+
+    If the file should be downloaded in segments, state["segments"] is set and
+    nothing is downloaded.
     """
-    r = requests.get(source_url, stream=True)
-    if r.status_code == 200:
-        with open(sink_path, "wb") as f:
-            for chunk in r:
-                f.write(chunk)
+    offset = 0
+    if state.get("validator") and os.path.isfile(part_path):
+        offset = os.path.getsize(part_path)
+    headers = {}
+    if offset:
+        headers = {"Range": f"bytes={offset}-", "If-Range": state["validator"]}
+    with requests.get(
+        source_url, headers=headers, stream=True, timeout=DEFAULT_TIMEOUT
+    ) as response:
+        if response.status_code == 416 and offset == state.get("size"):
+            # The partial download is already complete
+            return _hash_file(part_path, algorithm) if algorithm else None
+        _raise_for_status(response, source_url)
+        if response.status_code != 206:
+            offset = 0
+            state.update(_describe(response))
+            if segments is None:
+                size = state["size"] or 0
+                segments = DEFAULT_SEGMENTS if size >= PARALLEL_THRESHOLD else 1
+            if segments > 1 and state["accept_ranges"] and state["size"]:
+                state["segments"] = _split(state["size"], segments)
+                return None
+        hasher = None
+        if algorithm is not None:
+            hasher = hashlib.new(algorithm)
+            if offset:
+                _hash_into(part_path, hasher)
+        _write_part_state(part_path, state)
+        with open(part_path, "ab" if offset else "wb") as stream:
+            writer = stream if hasher is None else _HashingWriter(stream, hasher)
+            for chunk in _iter_response(response, chunk_size):
+                writer.write(chunk)
+            nb_bytes = stream.tell()
+    if state.get("size") is not None and nb_bytes != state["size"]:
+        raise OSError(
+            f"Only {nb_bytes} of {state['size']} bytes of '{source_url}' were "
+            "downloaded. The download continues at the next attempt."
+        )
+    return None if hasher is None else hasher.hexdigest()
+
+
+def _download_segments(
+    source_url: str, part_path: str, state: Dict[str, Any], chunk_size: int
+) -> None:
+    """Download the ranges state["segments"] of source_url in parallel."""
+    if not os.path.isfile(part_path):
+        for segment in state["segments"]:
+            segment[2] = 0
+    with open(part_path, "ab") as f:
+        f.truncate(state["size"])
+    _write_part_state(part_path, state)
+    lock = threading.Lock()
+
+    def download_segment(segment: List[int]) -> None:
+        start, end, done = segment
+        if start + done >= end:
+            return
+        headers = {
+            "Range": f"bytes={start + done}-{end - 1}",
+            "If-Range": state["validator"],
+        }
+        with requests.get(
+            source_url, headers=headers, stream=True, timeout=DEFAULT_TIMEOUT
+        ) as response:
+            _raise_for_status(response, source_url)
+            if response.status_code != 206:
+                raise OSError(f"'{source_url}' changed during the download")
+            with open(part_path, "r+b") as stream:
+                stream.seek(start + done)
+                for chunk in _iter_response(response, chunk_size):
+                    chunk = chunk[: end - start - segment[2]]
+                    stream.write(chunk)
+                    with lock:
+                        segment[2] += len(chunk)
+        if segment[2] != end - start:
+            raise OSError(f"The range {headers['Range']} of '{source_url}' was cut")
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(state["segments"])) as executor:
+            list(executor.map(download_segment, state["segments"]))
+    finally:
+        with lock:
+            _write_part_state(part_path, state)
+
+
+def _describe(response: requests.Response) -> Dict[str, Any]:
+    """Get what is needed to continue the download of a response."""
+    headers = response.headers
+    size = None
+    if "Content-Length" in headers and not headers.get("Content-Encoding"):
+        size = int(headers["Content-Length"])
+    return {
+        "size": size,
+        # If-Range requires a strong ETag
+        "validator": (
+            headers.get("ETag")
+            if not headers.get("ETag", "W/").startswith("W/")
+            else headers.get("Last-Modified")
+        ),
+        "accept_ranges": headers.get("Accept-Ranges") == "bytes",
+    }
+
+
+def _is_unchanged(source_url: str, state: Dict[str, Any]) -> bool:
+    """Check if the file of a partial download in segments did not change."""
+    try:
+        response = requests.head(
+            source_url, allow_redirects=True, timeout=DEFAULT_TIMEOUT
+        )
+    except requests.RequestException:
+        return False
+    if response.status_code >= 400:
+        return False
+    description = _describe(response)
+    return (description["size"], description["validator"]) == (
+        state.get("size"),
+        state.get("validator"),
+    )
+
+
+def _split(size: int, nb_segments: int) -> List[List[int]]:
+    """Get [start, end, downloaded bytes] of nb_segments ranges of size bytes."""
+    bounds = [size * i // nb_segments for i in range(nb_segments + 1)]
+    return [[bounds[i], bounds[i + 1], 0] for i in range(nb_segments)]
 
 
-def load_urlretrieve(source_url: str, sink_path: str) -> None:
+def _raise_for_status(response: requests.Response, source_url: str) -> None:
+    if response.status_code >= 400:
+        raise requests.HTTPError(
+            f"{response.status_code} {response.reason} for '{source_url}'",
+            response=response,
+        )
+
+
+def _iter_response(response: requests.Response, chunk_size: int) -> Any:
+    """Read the body in large chunks into one reused buffer."""
+    if response.headers.get("Content-Encoding") or not hasattr(
+        response.raw, "readinto"
+    ):
+        # The content has to be decoded
+        yield from response.iter_content(chunk_size)
+        return
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    while True:
+        try:
+            nb_read = response.raw.readinto(buffer)
+        except urllib3.exceptions.ProtocolError as e:
+            # Raise the same exception as iter_content
+            raise requests.exceptions.ChunkedEncodingError(e)
+        if not nb_read:
+            break
+        yield view[:nb_read]
+
+
+def _read_part_state(part_path: str) -> Dict[str, Any]:
+    if not os.path.isfile(part_path):
+        return {}
+    try:
+        with open(part_path + ".json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_part_state(part_path: str, state: Dict[str, Any]) -> None:
+    _write_atomic(
+        os.path.dirname(os.path.abspath(part_path)),
+        part_path + ".json",
+        json.dumps(state).encode("utf-8"),
+    )
+
+
+def _remove_part(part_path: str) -> None:
+    for path in (part_path, part_path + ".json"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def load_urlretrieve(
+    source_url: str, sink_path: str, expected: Optional[Tuple[str, str]] = None
+) -> None:
     """
-    Load a file from an URL with urlretrieve.
+    Load a file from an URL with urllib, e.g. from FTP.
 
     Parameters
     ----------
@@ -64,12 +396,21 @@ def load_urlretrieve(source_url: str, sink_path: str) -> None:
         Where to load the file from.
     sink_path : str
         Where the loaded file is stored.
+    expected : Tuple[str, str], optional
+        The algorithm and hex digest which the file has to have.
     """
-    urlcleanup()
-    urlretrieve(source_url, sink_path)
+    _download_atomic(_stream_urlopen, source_url, sink_path, expected)
+
 
+def _stream_urlopen(source_url: str, stream: Any) -> Optional[str]:
+    with urlopen(source_url, timeout=DEFAULT_TIMEOUT) as response:
+        shutil.copyfileobj(response, stream, COPY_BUFFER_SIZE)
+    return None
 
-def load_aws_s3(source_url: str, sink_path: str) -> None:
+
+def load_aws_s3(
+    source_url: str, sink_path: str, expected: Optional[Tuple[str, str]] = None
+) -> None:
     """
     Load a file from AWS S3.
 
@@ -79,6 +420,8 @@ def load_aws_s3(source_url: str, sink_path: str) -> None:
         Where to load the file from.
     sink_path : str
         Where the loaded file is stored.
+    expected : Tuple[str, str], optional
+        The algorithm and hex digest which the file has to have.
     """
     # Import here to make this dependency optional
     # Third party
@@ -90,11 +433,672 @@ def load_aws_s3(source_url: str, sink_path: str) -> None:
     if len(key) == 0:
         raise ValueError(f"Key was empty for source_url='{source_url}'")
 
-    # Download file
     client: s3.S3Client = boto3.client("s3")
-    response = client.get_object(Bucket=bucket, Key=key)
+    _download_atomic(
+        _directory_downloader_aws_s3(client), source_url, sink_path, expected
+    )
+
+
+def _expected_digest(
+    sha256: Optional[str], md5: Optional[str]
+) -> Optional[Tuple[str, str]]:
+    if sha256 is not None:
+        return "sha256", sha256.lower()
+    if md5 is not None:
+        return "md5", md5.lower()
+    return None
+
+
+def file_digest(filepath: str, algorithm: str = "sha256") -> str:
+    """
+    Get the hex digest of a file.
+
+    The digest is stored in a sidecar file next to filepath together with the
+    size and modification time of the file. As long as they do not change,
+    the file is not read again.
+
+    Parameters
+    ----------
+    filepath : str
+    algorithm : str, optional (default: 'sha256')
+        Any algorithm of hashlib, e.g. 'md5'.
+
+    Returns
+    -------
+    hexdigest : str
+    """
+    stat = os.stat(filepath)
+    sidecar = _read_sidecar(filepath)
+    if (
+        sidecar.get("size") == stat.st_size
+        and sidecar.get("mtime_ns") == stat.st_mtime_ns
+        and algorithm in sidecar.get("digests", {})
+    ):
+        return sidecar["digests"][algorithm]
+    hexdigest = _hash_file(filepath, algorithm)
+    _store_digest(filepath, algorithm, hexdigest, stat)
+    return hexdigest
+
+
+def _hash_file(filepath: str, algorithm: str) -> str:
+    hasher = hashlib.new(algorithm)
+    _hash_into(filepath, hasher)
+    return hasher.hexdigest()
+
+
+def _hash_into(filepath: str, hasher: Any) -> None:
+    buffer = bytearray(COPY_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(filepath, "rb", buffering=0) as f:
+        while True:
+            nb_read = f.readinto(buffer)
+            if not nb_read:
+                break
+            hasher.update(view[:nb_read])
+
+
+def verify_file(filepath: str, algorithm: str, expected: str) -> bool:
+    """
+    Check if the file at filepath has the expected hex digest.
+
+    Parameters
+    ----------
+    filepath : str
+    algorithm : str
+    expected : str
+
+    Returns
+    -------
+    matches : bool
+    """
+    return file_digest(filepath, algorithm) == expected.lower()
+
+
+def _sidecar_path(filepath: str) -> str:
+    return filepath + DIGEST_SUFFIX
+
+
+def _read_sidecar(filepath: str) -> Dict[str, Any]:
+    try:
+        with open(_sidecar_path(filepath)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _store_digest(
+    filepath: str, algorithm: str, hexdigest: str, stat: os.stat_result
+) -> None:
+    sidecar = _read_sidecar(filepath)
+    if (sidecar.get("size"), sidecar.get("mtime_ns")) != (
+        stat.st_size,
+        stat.st_mtime_ns,
+    ):
+        sidecar = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digests": {}}
+    sidecar["digests"][algorithm] = hexdigest
+    _write_atomic(
+        os.path.dirname(os.path.abspath(filepath)),
+        _sidecar_path(filepath),
+        json.dumps(sidecar).encode("utf-8"),
+    )
+
+
+class _HashingWriter:
+    """Write to a stream and update a hash with the written bytes."""
+
+    def __init__(self, stream: Any, hasher: Any):
+        self.stream = stream
+        self.hasher = hasher
+
+    def write(self, data: bytes) -> int:
+        self.hasher.update(data)
+        return self.stream.write(data)
+
+
+class RemoteEntry(NamedTuple):
+    """
+    A file in a remote directory.
+
+    Parameters
+    ----------
+    path : str
+        The path relative to the directory, with '/' as separator.
+    url : str
+    size : int, optional
+    etag : str, optional
+    """
+
+    path: str
+    url: str
+    size: Optional[int]
+    etag: Optional[str]
+
+
+class DownloadStats(NamedTuple):
+    """
+    What :func:`load_directory` did.
+
+    Parameters
+    ----------
+    files : int
+        The number of files in the remote directory.
+    downloaded : int
+    skipped : int
+        Files which were already up to date.
+    bytes : int
+        The number of downloaded bytes.
+    seconds : float
+    """
+
+    files: int
+    downloaded: int
+    skipped: int
+    bytes: int
+    seconds: float
+
+    @property
+    def bytes_per_second(self) -> float:
+        """Get the download throughput."""
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the statistics as a dict, e.g. for `meta`."""
+        stats = self._asdict()
+        stats["bytes_per_second"] = self.bytes_per_second
+        return stats
+
+
+def load_directory(
+    source_url: str,
+    sink_path: str,
+    policy: str = "load_if_missing",
+    workers: int = DEFAULT_WORKERS,
+    manifest_url: Optional[str] = None,
+) -> DownloadStats:
+    """
+    Mirror a remote directory into the directory sink_path.
+
+    The source is an S3 prefix, e.g. `s3://bucket/models/v3/`, or a HTTP
+    directory with a JSON manifest which lists its files:
+
+    ```
+    {"files": [{"path": "shard-0001.bin", "size": 1024, "etag": "abc"}]}
+    ```
+
+    The size and etag are optional. Files are downloaded in parallel, and
+    files which are already up to date are skipped.
+
+    Parameters
+    ----------
+    source_url : str
+        An s3:// or http(s):// URL which ends with '/'.
+    sink_path : str
+        A local directory. It is created if it does not exist.
+    policy : {'load_always', 'load_if_missing'}
+        With 'load_if_missing', only files which do not exist locally are
+        downloaded. With 'load_always', files whose size or ETag changed are
+        downloaded again, too.
+    workers : int, optional
+        The number of parallel downloads.
+    manifest_url : str, optional
+        The manifest of a HTTP directory. Defaults to 'manifest.json' in the
+        directory.
+
+    Returns
+    -------
+    stats : DownloadStats
+    """
+    start = time.perf_counter()
+    if source_url.startswith("s3://"):
+        # Import here to make this dependency optional
+        # Third party
+        import boto3
+
+        client = boto3.client("s3")
+        entries = _list_aws_s3(client, source_url)
+        download = _directory_downloader_aws_s3(client)
+    elif source_url.startswith(("http://", "https://")):
+        entries = _list_manifest(source_url, manifest_url)
+        download = _directory_downloader_requests()
+    else:
+        raise RuntimeError(f"Directories are not supported for '{source_url}'")
+    os.makedirs(sink_path, exist_ok=True)
+    index = _read_index(sink_path)
+    todo = [
+        entry
+        for entry in entries
+        if not _is_up_to_date(sink_path, entry, index.get(entry.path), policy)
+    ]
+    index_lock = threading.Lock()
+
+    def fetch_entry(entry: RemoteEntry) -> int:
+        target = _local_path(sink_path, entry.path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        nb_bytes, etag = _download_atomic(download, entry.url, target)
+        stat = os.stat(target)
+        with index_lock:
+            index[entry.path] = {
+                "etag": etag or entry.etag,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+            }
+        return nb_bytes
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            nb_bytes = sum(executor.map(fetch_entry, todo))
+    finally:
+        _write_index(sink_path, index)
+    return DownloadStats(
+        files=len(entries),
+        downloaded=len(todo),
+        skipped=len(entries) - len(todo),
+        bytes=nb_bytes,
+        seconds=time.perf_counter() - start,
+    )
+
+
+def _list_aws_s3(client: Any, source_url: str) -> List[RemoteEntry]:
+    bucket, prefix = source_url[len("s3://") :].split("/", 1)
+    entries = []
+    paginator = client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            path = obj["Key"][len(prefix) :]
+            if not path or path.endswith("/"):
+                continue
+            entries.append(
+                RemoteEntry(
+                    path, f"s3://{bucket}/{obj['Key']}", obj["Size"], obj.get("ETag")
+                )
+            )
+    return entries
+
+
+def _list_manifest(source_url: str, manifest_url: Optional[str]) -> List[RemoteEntry]:
+    if manifest_url is None:
+        manifest_url = source_url + "manifest.json"
+    response = requests.get(manifest_url, timeout=DEFAULT_TIMEOUT)
+    response.raise_for_status()
+    manifest = response.json()
+    files = manifest["files"] if isinstance(manifest, dict) else manifest
+    entries = []
+    for item in files:
+        if isinstance(item, str):
+            item = {"path": item}
+        path = item["path"].lstrip("/")
+        entries.append(
+            RemoteEntry(path, source_url + path, item.get("size"), item.get("etag"))
+        )
+    return entries
+
+
+def _directory_downloader_aws_s3(client: Any) -> Any:
+    def download(url: str, stream: Any) -> Optional[str]:
+        bucket, key = url[len("s3://") :].split("/", 1)
+        response = client.get_object(Bucket=bucket, Key=key)
+        shutil.copyfileobj(response["Body"], stream, COPY_BUFFER_SIZE)
+        return response.get("ETag")
+
+    return download
+
+
+def _directory_downloader_requests() -> Any:
+    # requests.Session objects should not be shared between threads
+    local = threading.local()
+
+    def download(url: str, stream: Any) -> Optional[str]:
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        with local.session.get(url, stream=True, timeout=DEFAULT_TIMEOUT) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(COPY_BUFFER_SIZE):
+                stream.write(chunk)
+            return response.headers.get("ETag")
+
+    return download
+
+
+def _download_atomic(
+    download: Any,
+    url: str,
+    target: str,
+    expected: Optional[Tuple[str, str]] = None,
+) -> Tuple[int, Optional[str]]:
+    """
+    Download url to target via a temporary file; return bytes and ETag.
+
+    If an expected (algorithm, hexdigest) is given, the digest is computed
+    while downloading and stored next to target; see :func:`file_digest`.
+    """
+    directory = os.path.dirname(os.path.abspath(target))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as stream:
+            if expected is None:
+                etag = download(url, stream)
+            else:
+                hasher = hashlib.new(expected[0])
+                etag = download(url, _HashingWriter(stream, hasher))
+                if hasher.hexdigest() != expected[1]:
+                    raise ChecksumError(
+                        f"The {expected[0]} of '{url}' is {hasher.hexdigest()}, "
+                        f"but {expected[1]} was expected"
+                    )
+            nb_bytes = stream.tell()
+        os.replace(tmp_path, target)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    if expected is not None:
+        _store_digest(target, expected[0], expected[1], os.stat(target))
+    return nb_bytes, etag
+
+
+def _local_path(sink_path: str, path: str) -> str:
+    target = os.path.normpath(os.path.join(sink_path, *path.split("/")))
+    if not target.startswith(os.path.normpath(sink_path) + os.sep):
+        raise ValueError(f"The path '{path}' is outside of '{sink_path}'")
+    return target
+
+
+def _is_up_to_date(
+    sink_path: str, entry: RemoteEntry, indexed: Optional[Dict[str, Any]], policy: str
+) -> bool:
+    try:
+        stat = os.stat(_local_path(sink_path, entry.path))
+    except FileNotFoundError:
+        return False
+    if policy == "load_if_missing":
+        return True
+    if entry.size is not None and entry.size != stat.st_size:
+        return False
+    if entry.etag is None:
+        return entry.size is not None
+    # The ETag is only known for files which were downloaded and not modified
+    return (
+        indexed is not None
+        and indexed.get("etag") == entry.etag
+        and indexed.get("size") == stat.st_size
+        and indexed.get("mtime_ns") == stat.st_mtime_ns
+    )
+
+
+def _read_index(sink_path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(os.path.join(sink_path, DIRECTORY_INDEX)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(sink_path: str, index: Dict[str, Dict[str, Any]]) -> None:
+    _write_atomic(
+        sink_path,
+        os.path.join(sink_path, DIRECTORY_INDEX),
+        json.dumps(index, sort_keys=True).encode("utf-8"),
+    )
+
+
+def is_url(path: str) -> bool:
+    """
+    Check if path is an URL which can be loaded by :func:`fetch`.
+
+    >>> is_url("s3://bucket/config.yaml")
+    True
+    >>> is_url("config.yaml")
+    False
+    """
+    return path.startswith(KNOWN_PROTOCOLS)
+
+
+class RemoteFile(NamedTuple):
+    """
+    The content of a remote file and where it came from.
+
+    Parameters
+    ----------
+    content : bytes
+    origin : str
+        The URL.
+    etag : str, optional
+        The ETag of the content, if the server sent one.
+    version : str, optional
+        The S3 `VersionId` or the HTTP `Last-Modified` header.
+    fetched_at : float
+        When the content was downloaded or last revalidated, as a timestamp.
+    from_cache : bool
+        True if the content was not downloaded again.
+    stale : bool
+        True if the source was unreachable and the cached copy was used.
+    """
+
+    content: bytes
+    origin: str
+    etag: Optional[str]
+    version: Optional[str]
+    fetched_at: float
+    from_cache: bool
+    stale: bool
+
+
+def default_cache_dir() -> str:
+    """
+    Get the directory where :func:`fetch` caches files if none is given.
+
+    This is $CFG_LOAD_CACHE_DIR if it is set, otherwise cfg_load in
+    $XDG_CACHE_HOME or ~/.cache.
+
+    Returns
+    -------
+    cache_dir : str
+    """
+    if "CFG_LOAD_CACHE_DIR" in os.environ:
+        return os.environ["CFG_LOAD_CACHE_DIR"]
+    cache_home = os.environ.get(
+        "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(cache_home, "cfg_load")
+
+
+def fetch(
+    source_url: str,
+    cache_dir: Optional[str] = None,
+    ttl: float = 0.0,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> RemoteFile:
+    """
+    Get the content of a remote file, using a local cache.
+
+    A cached copy which is younger than ttl seconds is used directly.
+    Otherwise it is revalidated with its ETag (`If-None-Match`), so it is only
+    downloaded again if it changed. If the source is unreachable, the last
+    cached copy is used and a warning is logged.
+
+    Parameters
+    ----------
+    source_url : str
+        An http(s)://, ftp:// or s3:// URL.
+    cache_dir : str, optional
+        Defaults to :func:`default_cache_dir`.
+    ttl : float, optional (default: 0)
+        Seconds during which the cached copy is used without asking the
+        source.
+    timeout : float, optional
+
+    Returns
+    -------
+    remote_file : RemoteFile
+    """
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+    cached = _read_cache(cache_dir, source_url)
+    if cached is not None and time.time() - cached[1]["fetched_at"] < ttl:
+        return _from_cache(source_url, cached, stale=False)
+    etag = cached[1]["etag"] if cached is not None else None
+    try:
+        if source_url.startswith(("http://", "https://")):
+            fetched = _fetch_requests(source_url, etag, timeout)
+        elif source_url.startswith("s3://"):
+            fetched = _fetch_aws_s3(source_url, etag)
+        elif source_url.startswith("ftp://"):
+            fetched = _fetch_urlopen(source_url, timeout)
+        else:
+            raise RuntimeError(f"Unknown protocol: source_url='{source_url}'")
+    except Exception as exc:  # noqa
+        if cached is None or not _is_unreachable(exc):
+            raise
+        logger.warning(f"Using the cached copy of '{source_url}': {exc}")
+        return _from_cache(source_url, cached, stale=True)
+    if fetched is None:
+        # Not modified
+        assert cached is not None
+        cached[1]["fetched_at"] = time.time()
+        _write_cache_info(cache_dir, source_url, cached[1])
+        return _from_cache(source_url, cached, stale=False)
+    content, info = fetched
+    info["fetched_at"] = time.time()
+    _write_cache(cache_dir, source_url, content, info)
+    return RemoteFile(
+        content,
+        source_url,
+        info["etag"],
+        info["version"],
+        info["fetched_at"],
+        from_cache=False,
+        stale=False,
+    )
+
+
+def _fetch_requests(
+    source_url: str, etag: Optional[str], timeout: float
+) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+    headers = {"If-None-Match": etag} if etag else {}
+    response = requests.get(source_url, headers=headers, timeout=timeout)
+    if response.status_code == 304:
+        return None
+    response.raise_for_status()
+    info = {
+        "etag": response.headers.get("ETag"),
+        "version": response.headers.get("Last-Modified"),
+    }
+    return response.content, info
+
+
+def _fetch_aws_s3(
+    source_url: str, etag: Optional[str]
+) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+    # Import here to make this dependency optional
+    # Third party
+    import boto3
+
+    url = source_url[len("s3://") :]
+    bucket, key = url.split("/", 1)
+    if len(key) == 0:
+        raise ValueError(f"Key was empty for source_url='{source_url}'")
+    client: s3.S3Client = boto3.client("s3")
+    try:
+        if etag:
+            response = client.get_object(Bucket=bucket, Key=key, IfNoneMatch=etag)
+        else:
+            response = client.get_object(Bucket=bucket, Key=key)
+    except Exception as exc:  # noqa
+        if _status_code(exc) == 304:
+            return None
+        raise
+    info = {"etag": response.get("ETag"), "version": response.get("VersionId")}
+    return response["Body"].read(), info
+
+
+def _fetch_urlopen(
+    source_url: str, timeout: float
+) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+    with urlopen(source_url, timeout=timeout) as response:
+        return response.read(), {"etag": None, "version": None}
+
+
+def _status_code(exc: Exception) -> Optional[int]:
+    """Get the HTTP status code of a botocore ClientError."""
+    response = getattr(exc, "response", None)
+    if isinstance(response, dict):
+        return response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return None
+
+
+def _is_unreachable(exc: Exception) -> bool:
+    """Check if exc means that the source could not be reached."""
+    if isinstance(exc, requests.HTTPError):
+        return exc.response is not None and exc.response.status_code >= 500
+    if isinstance(exc, (requests.RequestException, OSError)):
+        return True
+    status_code = _status_code(exc)
+    if status_code is not None:
+        return status_code >= 500
+    # e.g. botocore.exceptions.EndpointConnectionError
+    return type(exc).__module__.startswith("botocore")
+
+
+def _cache_paths(cache_dir: str, source_url: str) -> Tuple[str, str]:
+    name = hashlib.sha256(source_url.encode("utf-8")).hexdigest()
+    return (
+        os.path.join(cache_dir, name + ".data"),
+        os.path.join(cache_dir, name + ".json"),
+    )
+
+
+def _read_cache(
+    cache_dir: str, source_url: str
+) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+    data_path, info_path = _cache_paths(cache_dir, source_url)
+    try:
+        with open(info_path) as f:
+            info = json.load(f)
+        with open(data_path, "rb") as f:
+            content = f.read()
+    except (OSError, ValueError):
+        return None
+    if info.get("size") != len(content):
+        return None
+    return content, info
+
+
+def _from_cache(
+    source_url: str, cached: Tuple[bytes, Dict[str, Any]], stale: bool
+) -> RemoteFile:
+    content, info = cached
+    return RemoteFile(
+        content,
+        source_url,
+        info["etag"],
+        info["version"],
+        info["fetched_at"],
+        from_cache=True,
+        stale=stale,
+    )
+
+
+def _write_cache(
+    cache_dir: str, source_url: str, content: bytes, info: Dict[str, Any]
+) -> None:
+    data_path, _ = _cache_paths(cache_dir, source_url)
+    info["size"] = len(content)
+    _write_atomic(cache_dir, data_path, content)
+    _write_cache_info(cache_dir, source_url, info)
+
+
+def _write_cache_info(cache_dir: str, source_url: str, info: Dict[str, Any]) -> None:
+    _, info_path = _cache_paths(cache_dir, source_url)
+    _write_atomic(cache_dir, info_path, json.dumps(info).encode("utf-8"))
+
 
-    # Write file to local file
-    body_string = response["Body"].read()
-    with open(sink_path, "wb") as f:
-        f.write(body_string)
+def _write_atomic(cache_dir: str, path: str, content: bytes) -> None:
+    """Write content to path, so readers never see a partial file."""
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
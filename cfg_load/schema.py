@@ -0,0 +1,428 @@
+"""Validate configurations against a JSON Schema."""
+
+# Core Library
+import hashlib
+import json
+import re
+from copy import deepcopy
+from typing import Any, Callable, Dict, List, Tuple
+
+# First party
+import cfg_load.delta
+from cfg_load.compact import FrozenArray
+
+# A check gets the value, its path and the list of errors found so far. It
+# appends to the errors and returns the value, with defaults filled in.
+Check = Callable[[Any, str, List[Tuple[str, str]]], Any]
+
+_TYPES: Dict[str, Callable[[Any], bool]] = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, (list, tuple, FrozenArray)),
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "number": lambda value: isinstance(value, (int, float))
+    and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None,
+}
+
+# Keywords which only document the schema and are not needed for validation
+_ANNOTATIONS = {
+    "$schema",
+    "$id",
+    "$comment",
+    "title",
+    "description",
+    "examples",
+    "default",
+    "readOnly",
+    "writeOnly",
+    "deprecated",
+    "format",
+    # Containers of subschemas which are used by `$ref`
+    "$defs",
+    "definitions",
+}
+
+_CACHE: Dict[str, "Validator"] = {}
+
+
+class ValidationError(ValueError):
+    """
+    The configuration does not match the schema.
+
+    Parameters
+    ----------
+    errors : List[Tuple[str, str]]
+        All (path, message) pairs which were found, e.g.
+        ('$.server.port', "expected type 'integer', got 'str'").
+    """
+
+    def __init__(self, errors: List[Tuple[str, str]]):
+        self.errors = errors
+        lines = [f"{path}: {message}" for path, message in errors]
+        super().__init__(f"{len(errors)} validation error(s):\n" + "\n".join(lines))
+
+
+class Validator:
+    """
+    A schema which was compiled into nested checks.
+
+    Use :func:`compile_schema` to get a cached instance.
+
+    Parameters
+    ----------
+    schema : Dict
+    """
+
+    def __init__(self, schema: Dict):
+        self.schema = schema
+        self._check = _compile(schema, False, schema)
+        self._check_and_fill = _compile(schema, True, schema)
+
+    def validate(self, config: Any, fill_defaults: bool = True) -> Any:
+        """
+        Validate config in a single pass and report all errors at once.
+
+        Parameters
+        ----------
+        config : Any
+        fill_defaults : bool, optional (default: True)
+            Set missing properties which have a `default` in the schema.
+            The config is modified in place.
+
+        Returns
+        -------
+        config : Any
+        """
+        errors: List[Tuple[str, str]] = []
+        check = self._check_and_fill if fill_defaults else self._check
+        config = check(config, "$", errors)
+        if errors:
+            raise ValidationError(errors)
+        return config
+
+
+def schema_hash(schema: Dict) -> str:
+    """
+    Get a hash which identifies the content of a schema.
+
+    Parameters
+    ----------
+    schema : Dict
+
+    Returns
+    -------
+    hexdigest : str
+    """
+    canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def compile_schema(schema: Dict) -> Validator:
+    """
+    Compile a schema; schemas with the same content are compiled only once.
+
+    Parameters
+    ----------
+    schema : Dict
+
+    Returns
+    -------
+    validator : Validator
+    """
+    key = schema_hash(schema)
+    if key not in _CACHE:
+        _CACHE[key] = Validator(schema)
+    return _CACHE[key]
+
+
+def validate(config: Any, schema: Dict, fill_defaults: bool = True) -> Any:
+    """
+    Validate config against schema.
+
+    Parameters
+    ----------
+    config : Any
+    schema : Dict
+    fill_defaults : bool, optional (default: True)
+
+    Returns
+    -------
+    config : Any
+    """
+    return compile_schema(schema).validate(config, fill_defaults=fill_defaults)
+
+
+def _compile(schema: Any, fill_defaults: bool, root: Dict) -> Check:
+    """Compile a (sub)schema of root into a check."""
+    if schema is True or schema == {}:
+        return _accept
+    if schema is False:
+        return _reject
+    checks: List[Check] = []
+    for keyword in schema:
+        if keyword in _ANNOTATIONS or keyword in _COMPILERS:
+            continue
+        raise NotImplementedError(f"The schema keyword '{keyword}' is not supported.")
+    compilers: List[Callable[[Dict, bool, Dict], Check]] = []
+    for keyword, compiler in _COMPILERS.items():
+        if keyword in schema and compiler not in compilers:
+            compilers.append(compiler)
+            checks.append(compiler(schema, fill_defaults, root))
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value: Any, path: str, errors: List[Tuple[str, str]]) -> Any:
+        for check in checks:
+            value = check(value, path, errors)
+        return value
+
+    return check_all
+
+
+def _accept(value: Any, path: str, errors: List[Tuple[str, str]]) -> Any:
+    return value
+
+
+def _reject(value: Any, path: str, errors: List[Tuple[str, str]]) -> Any:
+    errors.append((path, "no value is allowed here"))
+    return value
+
+
+def _compile_type(schema: Dict, fill_defaults: bool, root: Dict) -> Check:
+    names = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+    predicates = [_TYPES[name] for name in names]
+    expected = " or ".join(repr(name) for name in names)
+
+    def check(value: Any, path: str, errors: List[Tuple[str, str]]) -> Any:
+        for predicate in predicates:
+            if predicate(value):
+                return value
+        errors.append((path, f"expected type {expected}, got {type(value).__name__!r}"))
+        return value
+
+    return check
+
+
+def _compile_properties(schema: Dict, fill_defaults: bool, root: Dict) -> Check:
+    properties = {
+        key: _compile(subschema, fill_defaults, root)
+        for key, subschema in schema.get("properties", {}).items()
+    }
+    defaults = {
+        key: subschema["default"]
+        for key, subschema in schema.get("properties", {}).items()
+        if fill_defaults and isinstance(subschema, dict) and "default" in subschema
+    }
+    patterns = [
+        (re.compile(pattern), _compile(subschema, fill_defaults, root))
+        for pattern, subschema in schema.get("patternProperties", {}).items()
+    ]
+    required = schema.get("required", [])
+    additional = schema.get("additionalProperties", True)
+    check_additional = _compile(additional, fill_defaults, root)
+
+    def check(value: Any, path: str, errors: List[Tuple[str, str]]) -> Any:
+        if not isinstance(value, dict):
+            return value
+        for key, default in defaults.items():
+            if key not in value:
+                value[key] = deepcopy(default)
+        for key in required:
+            if key not in value:
+                errors.append((path, f"missing required property {key!r}"))
+        for key in value:
+            child = properties.get(key)
+            matched = False
+            if patterns and isinstance(key, str):
+                for pattern, pattern_check in patterns:
+                    if pattern.search(key):
+                        matched = True
+                        value[key] = pattern_check(value[key], f"{path}.{key}", errors)
+            if child is None:
+                if matched or additional is True:
+                    continue
+                child = check_additional
+            value[key] = child(value[key], f"{path}.{key}", errors)
+        return value
+
+    return check
+
+
+def _compile_items(schema: Dict, fill_defaults: bool, root: Dict) -> Check:
+    item_check = _compile(schema.get("items", True), fill_defaults, root)
+    min_items = schema.get("minItems")
+    max_items = schema.get("maxItems")
+
+    def check(value: Any, path: str, errors: List[Tuple[str, str]]) -> Any:
+        if not isinstance(value, (list, tuple, FrozenArray)):
+            return value
+        if min_items is not None and len(value) < min_items:
+            errors.append((path, f"expected at least {min_items} items"))
+        if max_items is not None and len(value) > max_items:
+            errors.append((path, f"expected at most {max_items} items"))
+        if item_check is not _accept:
+            for i, item in enumerate(value):
+                item_check(item, f"{path}[{i}]", errors)
+        return value
+
+    return check
+
+
+def _compile_enum(schema: Dict, fill_defaults: bool, root: Dict) -> Check:
+    allowed = schema["enum"] if "enum" in schema else [schema["const"]]
+
+    def check(value: Any, path: str, errors: List[Tuple[str, str]]) -> Any:
+        if value not in allowed:
+            errors.append((path, f"{value!r} is not one of {allowed!r}"))
+        return value
+
+    return check
+
+
+def _compile_range(schema: Dict, fill_defaults: bool, root: Dict) -> Check:
+    bounds = [
+        (schema.get("minimum"), lambda v, b: v >= b, ">="),
+        (schema.get("maximum"), lambda v, b: v <= b, "<="),
+        (schema.get("exclusiveMinimum"), lambda v, b: v > b, ">"),
+        (schema.get("exclusiveMaximum"), lambda v, b: v < b, "<"),
+    ]
+    bounds = [bound for bound in bounds if bound[0] is not None]
+
+    def check(value: Any, path: str, errors: List[Tuple[str, str]]) -> Any:
+        if not _TYPES["number"](value):
+            return value
+        for bound, holds, symbol in bounds:
+            if not holds(value, bound):
+                errors.append((path, f"expected a value {symbol} {bound}, got {value}"))
+        return value
+
+    return check
+
+
+def _compile_string(schema: Dict, fill_defaults: bool, root: Dict) -> Check:
+    min_length = schema.get("minLength")
+    max_length = schema.get("maxLength")
+    pattern = re.compile(schema["pattern"]) if "pattern" in schema else None
+
+    def check(value: Any, path: str, errors: List[Tuple[str, str]]) -> Any:
+        if not isinstance(value, str):
+            return value
+        if min_length is not None and len(value) < min_length:
+            errors.append((path, f"expected at least {min_length} characters"))
+        if max_length is not None and len(value) > max_length:
+            errors.append((path, f"expected at most {max_length} characters"))
+        if pattern is not None and not pattern.search(value):
+            errors.append((path, f"{value!r} does not match {pattern.pattern!r}"))
+        return value
+
+    return check
+
+
+def _compile_any_of(schema: Dict, fill_defaults: bool, root: Dict) -> Check:
+    # Defaults are not filled from alternatives which might not match
+    options = [_compile(subschema, False, root) for subschema in schema["anyOf"]]
+
+    def check(value: Any, path: str, errors: List[Tuple[str, str]]) -> Any:
+        for option in options:
+            option_errors: List[Tuple[str, str]] = []
+            option(value, path, option_errors)
+            if not option_errors:
+                return value
+        errors.append((path, "does not match any of the allowed schemas"))
+        return value
+
+    return check
+
+
+def _compile_all_of(schema: Dict, fill_defaults: bool, root: Dict) -> Check:
+    checks = [_compile(subschema, fill_defaults, root) for subschema in schema["allOf"]]
+
+    def check(value: Any, path: str, errors: List[Tuple[str, str]]) -> Any:
+        for subcheck in checks:
+            value = subcheck(value, path, errors)
+        return value
+
+    return check
+
+
+def _compile_one_of(schema: Dict, fill_defaults: bool, root: Dict) -> Check:
+    options = [_compile(subschema, False, root) for subschema in schema["oneOf"]]
+
+    def check(value: Any, path: str, errors: List[Tuple[str, str]]) -> Any:
+        matches = 0
+        for option in options:
+            option_errors: List[Tuple[str, str]] = []
+            option(value, path, option_errors)
+            matches += not option_errors
+        if matches != 1:
+            errors.append(
+                (path, f"matches {matches} of the schemas, expected exactly one")
+            )
+        return value
+
+    return check
+
+
+def _compile_not(schema: Dict, fill_defaults: bool, root: Dict) -> Check:
+    negated = _compile(schema["not"], False, root)
+
+    def check(value: Any, path: str, errors: List[Tuple[str, str]]) -> Any:
+        negated_errors: List[Tuple[str, str]] = []
+        negated(value, path, negated_errors)
+        if not negated_errors:
+            errors.append((path, "matches a schema which is not allowed"))
+        return value
+
+    return check
+
+
+def _compile_ref(schema: Dict, fill_defaults: bool, root: Dict) -> Check:
+    ref = schema["$ref"]
+    if ref != "#" and not ref.startswith("#/"):
+        raise NotImplementedError(
+            f"Only references within the schema like '#/$defs/name' are "
+            f"supported, got '{ref}'."
+        )
+    target: Any = root
+    for token in cfg_load.delta.split_path(ref[1:]):
+        try:
+            target = target[int(token) if isinstance(target, list) else token]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise ValueError(f"The reference '{ref}' does not exist in the schema")
+    # Compiled on first use, as schemas may refer to themselves recursively
+    compiled: List[Check] = []
+
+    def check(value: Any, path: str, errors: List[Tuple[str, str]]) -> Any:
+        if not compiled:
+            compiled.append(_compile(target, fill_defaults, root))
+        return compiled[0](value, path, errors)
+
+    return check
+
+
+# Maps each supported keyword to its compiler. Compilers which handle several
+# keywords are called only once per (sub)schema.
+_COMPILERS: Dict[str, Callable[[Dict, bool, Dict], Check]] = {}
+for _keywords, _compiler in [
+    (("type",), _compile_type),
+    (
+        ("properties", "patternProperties", "required", "additionalProperties"),
+        _compile_properties,
+    ),
+    (("items", "minItems", "maxItems"), _compile_items),
+    (("enum", "const"), _compile_enum),
+    (
+        ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum"),
+        _compile_range,
+    ),
+    (("minLength", "maxLength", "pattern"), _compile_string),
+    (("anyOf",), _compile_any_of),
+    (("allOf",), _compile_all_of),
+    (("oneOf",), _compile_one_of),
+    (("not",), _compile_not),
+    (("$ref",), _compile_ref),
+]:
+    for _keyword in _keywords:
+        _COMPILERS[_keyword] = _compiler
@@ -0,0 +1,435 @@
+"""
+Serve parsed configurations to other processes over a Unix domain socket.
+
+The daemon (`cfg_load serve`) keeps parsed configurations in memory. Before
+answering a request, it checks with a single `stat` call if the source file
+was modified and loads it again only in that case.
+
+The protocol is line-based: a client sends one JSON object per line and gets
+one JSON object per line back.
+
+Requests::
+
+    {"op": "load", "path": "/abs/config.yaml", "raw": false, "load_remote": true}
+    {"op": "get", "path": "/abs/config.yaml", "key": "server.port"}
+    {"op": "ping"}
+
+Responses are `{"ok": true, ...}` with `config` and `meta` for `load` and
+`value` for `get`, or `{"ok": false, "error": "...", "type": "KeyError"}`.
+
+Values which JSON can not represent are sent as objects with a `$type`, so
+the client gets the same configuration as :func:`cfg_load.load`::
+
+    {"$type": "date", "value": "2020-01-01"}
+    {"$type": "dict", "items": [[1, "one"]]}
+
+Dicts with keys which are no strings, or with a `$type` key, are sent as
+`dict`. Other types, e.g. sets, are rejected with a TypeError.
+
+The daemon does not apply environment variables (see :func:`cfg_load.load_env`),
+as its environment is not the one of its clients. :meth:`Client.load` and
+:meth:`Client.get` apply the environment of the calling process.
+"""
+
+# Core Library
+import base64
+import datetime
+import json
+import logging
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+
+# First party
+import cfg_load
+import cfg_load.subscriptions
+
+logger = logging.getLogger(__name__)
+
+
+def default_socket_path() -> str:
+    """
+    Get the socket path which is used if none is given.
+
+    This is $CFG_LOAD_SOCKET if it is set, otherwise cfg_load.sock in
+    $XDG_RUNTIME_DIR or a per-user file in the temporary directory.
+
+    Returns
+    -------
+    socket_path : str
+    """
+    if "CFG_LOAD_SOCKET" in os.environ:
+        return os.environ["CFG_LOAD_SOCKET"]
+    if "XDG_RUNTIME_DIR" in os.environ:
+        return os.path.join(os.environ["XDG_RUNTIME_DIR"], "cfg_load.sock")
+    return os.path.join(tempfile.gettempdir(), f"cfg_load-{os.getuid()}.sock")
+
+
+def _dumps(obj: Any) -> bytes:
+    return (json.dumps(_encode(obj), ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _loads(line: bytes) -> Any:
+    return json.loads(line, object_hook=_decode)
+
+
+def _encode(value: Any) -> Any:
+    """Convert value into JSON types; see the module docstring."""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, dict):
+        if "$type" in value or not all(isinstance(key, str) for key in value):
+            items = [[_encode(key), _encode(item)] for key, item in value.items()]
+            return {"$type": "dict", "items": items}
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, tuple):
+        return {"$type": "tuple", "items": [_encode(item) for item in value]}
+    # datetime is a subclass of date, so it is checked first
+    for type_ in (datetime.datetime, datetime.date, datetime.time):
+        if isinstance(value, type_):
+            return {"$type": type_.__name__, "value": value.isoformat()}
+    if isinstance(value, bytes):
+        return {"$type": "bytes", "value": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"Values of type {type(value).__name__!r} can not be sent")
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    """Restore the values which were converted by _encode."""
+    type_ = obj.get("$type")
+    if type_ is None:
+        return obj
+    if type_ == "dict":
+        return {key: item for key, item in obj["items"]}
+    if type_ == "tuple":
+        return tuple(obj["items"])
+    if type_ == "bytes":
+        return base64.b64decode(obj["value"])
+    return _FROM_ISOFORMAT[type_](obj["value"])
+
+
+_FROM_ISOFORMAT = {
+    "datetime": datetime.datetime.fromisoformat,
+    "date": datetime.date.fromisoformat,
+    "time": datetime.time.fromisoformat,
+}
+
+
+class _Entry:
+    """A loaded configuration together with the state of its source file."""
+
+    def __init__(self, config: Union[cfg_load.Configuration, Dict], stat: Tuple):
+        self.config = config
+        self.stat = stat
+        self._load_response: Optional[bytes] = None
+
+    def load_response(self) -> bytes:
+        """Get the encoded response for `load`; it is encoded only once."""
+        if self._load_response is None:
+            if isinstance(self.config, cfg_load.Configuration):
+                response = {
+                    "ok": True,
+                    "config": self.config.to_dict(),
+                    "meta": self.config.meta,
+                }
+            else:
+                response = {"ok": True, "config": self.config, "meta": None}
+            self._load_response = _dumps(response)
+        return self._load_response
+
+
+class ConfigServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Keep configurations loaded and answer requests for them.
+
+    Parameters
+    ----------
+    socket_path : str, optional
+        Defaults to :func:`default_socket_path`.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Optional[str] = None):
+        self.socket_path = socket_path or default_socket_path()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self._entries: Dict[Tuple[str, bool, bool], _Entry] = {}
+        # One lock per entry, so a slow load does not block other files
+        self._locks: Dict[Tuple[str, bool, bool], threading.Lock] = {}
+        self._lock = threading.Lock()
+        # Only the user who started the daemon may connect
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(self.socket_path, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+
+    def get_entry(self, path: str, raw: bool, load_remote: bool) -> _Entry:
+        """
+        Get the loaded configuration at path; load it if it changed.
+
+        Parameters
+        ----------
+        path : str
+        raw : bool
+        load_remote : bool
+
+        Returns
+        -------
+        entry : _Entry
+        """
+        path = os.path.abspath(path)
+        key = (path, raw, load_remote)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.stat != signature:
+                if entry is not None:
+                    logger.info(f"Reloading changed configuration '{path}'")
+                config = cfg_load.load(
+                    path, raw, load_remote=load_remote, apply_env=False
+                )
+                entry = _Entry(config, signature)
+                self._entries[key] = entry
+        return entry
+
+    def handle_request_line(self, line: bytes) -> bytes:
+        """
+        Answer one request.
+
+        Parameters
+        ----------
+        line : bytes
+            A JSON-encoded request.
+
+        Returns
+        -------
+        response : bytes
+            A JSON-encoded response, terminated by a newline.
+        """
+        try:
+            request = _loads(line)
+            op = request.get("op")
+            if op == "ping":
+                return _dumps({"ok": True})
+            raw = bool(request.get("raw", False))
+            load_remote = bool(request.get("load_remote", True))
+            entry = self.get_entry(request["path"], raw, load_remote)
+            if op == "load":
+                return entry.load_response()
+            if op == "get":
+                value = cfg_load.subscriptions.lookup(
+                    entry.config, request.get("key", "")
+                )
+                if isinstance(value, cfg_load.Configuration):
+                    value = value.to_dict()
+                return _dumps({"ok": True, "value": value})
+            raise ValueError(f"Unknown op: {op!r}")
+        except Exception as exc:  # noqa
+            return _dumps({"ok": False, "error": str(exc), "type": type(exc).__name__})
+
+    def server_close(self) -> None:
+        """Close the server and remove the socket file."""
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: ConfigServer
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            self.wfile.write(self.server.handle_request_line(line))
+            self.wfile.flush()
+
+
+def serve(socket_path: Optional[str] = None, preload: Tuple[str, ...] = ()) -> None:
+    """
+    Run the daemon until it is interrupted.
+
+    Parameters
+    ----------
+    socket_path : str, optional
+    preload : Tuple[str, ...]
+        Configuration files which are loaded before the first request.
+    """
+    with ConfigServer(socket_path) as server:
+        for path in preload:
+            server.get_entry(path, False, True)
+        logger.info(f"Serving configurations at '{server.socket_path}'")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+class RemoteError(Exception):
+    """
+    The daemon could not answer a request.
+
+    Parameters
+    ----------
+    message : str
+    type_name : str
+        Name of the exception type in the daemon, e.g. 'KeyError'.
+    """
+
+    def __init__(self, message: str, type_name: str):
+        super().__init__(f"{type_name}: {message}")
+        self.type_name = type_name
+
+
+class Client:
+    """
+    A connection to a cfg_load daemon.
+
+    Parameters
+    ----------
+    socket_path : str, optional
+        Defaults to :func:`default_socket_path`.
+    timeout : float, optional
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: float = 10.0):
+        self.socket_path = socket_path or default_socket_path()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(self.socket_path)
+        self._file = self._socket.makefile("rwb")
+        self._lock = threading.Lock()
+
+    def _request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._file.write(_dumps(request))
+            self._file.flush()
+            line = self._file.readline()
+        if not line:
+            raise ConnectionError(f"The daemon at '{self.socket_path}' hung up")
+        response = _loads(line)
+        if not response["ok"]:
+            raise RemoteError(response["error"], response["type"])
+        return response
+
+    def ping(self) -> bool:
+        """Check if the daemon answers."""
+        return self._request({"op": "ping"})["ok"]
+
+    def load(
+        self, filepath: str, load_raw: bool = False, load_remote: bool = True
+    ) -> Union[cfg_load.Configuration, Dict]:
+        """
+        Get a configuration from the daemon; see :func:`cfg_load.load`.
+
+        The daemon parses the file and downloads remote files. The environment
+        variables and the modules of `_module_path` keys are loaded in the
+        calling process.
+
+        Parameters
+        ----------
+        filepath : str
+        load_raw : bool, optional (default: False)
+        load_remote : bool, optional (default: True)
+
+        Returns
+        -------
+        config : Configuration
+        """
+        response = self._request(
+            {
+                "op": "load",
+                "path": os.path.abspath(filepath),
+                "raw": load_raw,
+                "load_remote": load_remote,
+            }
+        )
+        if load_raw:
+            return response["config"]
+        meta = response["meta"]
+        meta["served_from"] = self.socket_path
+        # Configuration.reload loads the file in this process
+        meta["load_options"].pop("apply_env", None)
+        config_dict = cfg_load.load_env(response["config"])
+        # The daemon already loaded the remote files
+        config = cfg_load.Configuration._wrap(config_dict, meta, False)
+        config.meta["load_remote"] = load_remote
+        return config
+
+    def get(self, filepath: str, key: str, load_raw: bool = False) -> Any:
+        """
+        Get the value of one dot-separated key, e.g. 'server.hosts.0'.
+
+        Only the value is transferred, not the whole configuration. If an
+        environment variable overwrites the top-level key, the value of the
+        top-level key is transferred.
+
+        Parameters
+        ----------
+        filepath : str
+        key : str
+        load_raw : bool, optional (default: False)
+
+        Returns
+        -------
+        value : Any
+        """
+        keys = cfg_load.subscriptions.split_keys(key)
+        overridden = (
+            not load_raw
+            and bool(keys)
+            and keys[0] in os.environ
+            and not keys[0].startswith("_")
+        )
+        response = self._request(
+            {
+                "op": "get",
+                "path": os.path.abspath(filepath),
+                "key": keys[0] if overridden else key,
+                "raw": load_raw,
+            }
+        )
+        if not overridden:
+            return response["value"]
+        value = cfg_load.load_env({keys[0]: response["value"]})[keys[0]]
+        return cfg_load.subscriptions.lookup(value, ".".join(keys[1:]))
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def connect(socket_path: Optional[str] = None, timeout: float = 10.0) -> Client:
+    """
+    Connect to a cfg_load daemon.
+
+    >> client = cfg_load.connect()
+    >> cfg = client.load("config.yaml")
+
+    Parameters
+    ----------
+    socket_path : str, optional
+        Defaults to :func:`default_socket_path`.
+    timeout : float, optional
+
+    Returns
+    -------
+    client : Client
+    """
+    return Client(socket_path, timeout)
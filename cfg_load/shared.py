@@ -0,0 +1,435 @@
+"""
+Share one read-only copy of a configuration between processes.
+
+In pre-fork servers, every worker which touches a normal Configuration writes
+to the reference counts of its objects and thereby copies the memory pages
+which contain them. :func:`share` instead encodes the configuration into a
+flat layout in `multiprocessing.shared_memory`. Workers read it through small
+facade objects, so the configuration exists only once.
+
+Layout (little-endian, offsets are relative to the start of the block)::
+
+    header: magic (8 bytes), root offset (u32), meta offset (u32), size (u32)
+    node:   tag (1 byte) followed by the payload of the tag
+
+    'N' None, 'T' True, 'F' False
+    'i' int64, 'f' float64
+    's' str, 'b' bytes, 'I' big int, 'p' pickled object: length (u32) + data
+    'l' list: count (u32) + count offsets of the elements (u32)
+    'd' dict: count (u32) + count pairs of key / value offsets (u32) in
+        insertion order + count positions of the pairs, sorted by encoded key
+
+Equal scalars are stored only once.
+"""
+
+# Core Library
+import bisect
+import collections.abc
+import pickle
+import struct
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union, cast
+
+# First party
+import cfg_load
+
+MAGIC = b"CFGSHM1\x00"
+_HEADER = struct.Struct("<8sIII")
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_PAIR = struct.Struct("<II")
+_MAX_SIZE = 2**32 - 1
+
+
+class _Encoder:
+    """Encode a tree of dicts, lists and scalars into one bytearray."""
+
+    def __init__(self) -> None:
+        self.buffer = bytearray(_HEADER.size)
+        self._scalars: Dict[bytes, int] = {}
+
+    def _append(self, data: bytes) -> int:
+        offset = len(self.buffer)
+        if offset + len(data) > _MAX_SIZE:
+            raise ValueError("The configuration is too big to be shared")
+        self.buffer += data
+        return offset
+
+    def _scalar(self, data: bytes) -> int:
+        offset = self._scalars.get(data)
+        if offset is None:
+            offset = self._scalars[data] = self._append(data)
+        return offset
+
+    def encode(self, value: Any) -> int:
+        """Encode value and return its offset."""
+        if isinstance(value, (dict, list, tuple)):
+            return self._encode_container(value)
+        return self._scalar(encode_scalar(value))
+
+    def _encode_container(self, value: Union[Dict, List, Tuple]) -> int:
+        if isinstance(value, dict):
+            pairs = [
+                (self.encode(key), self.encode(item)) for key, item in value.items()
+            ]
+            keys = [encode_scalar(key) for key in value]
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            data = bytearray(b"d" + _U32.pack(len(pairs)))
+            for pair in pairs:
+                data += _PAIR.pack(*pair)
+            for position in order:
+                data += _U32.pack(position)
+            return self._append(bytes(data))
+        offsets = [self.encode(item) for item in value]
+        return self._append(
+            b"l" + _U32.pack(len(offsets)) + b"".join(_U32.pack(o) for o in offsets)
+        )
+
+
+def encode_scalar(value: Any) -> bytes:
+    """
+    Encode a value which is not a dict or list as node.
+
+    Parameters
+    ----------
+    value : Any
+
+    Returns
+    -------
+    node : bytes
+    """
+    if value is None:
+        return b"N"
+    if value is True:
+        return b"T"
+    if value is False:
+        return b"F"
+    if type(value) is int:
+        if -(2**63) <= value < 2**63:
+            return b"i" + _I64.pack(value)
+        data = str(value).encode("ascii")
+        return b"I" + _U32.pack(len(data)) + data
+    if type(value) is float:
+        return b"f" + _F64.pack(value)
+    if type(value) is str:
+        data = value.encode("utf-8", "surrogatepass")
+        return b"s" + _U32.pack(len(data)) + data
+    if type(value) is bytes:
+        return b"b" + _U32.pack(len(value)) + value
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    return b"p" + _U32.pack(len(data)) + data
+
+
+def encode(config: Any, meta: Optional[Dict] = None) -> bytes:
+    """
+    Encode config and its meta data into the flat layout.
+
+    Parameters
+    ----------
+    config : Any
+    meta : Dict, optional
+
+    Returns
+    -------
+    data : bytes
+    """
+    encoder = _Encoder()
+    root = encoder.encode(config)
+    meta_offset = encoder._append(encode_scalar(pickle.dumps(meta)))
+    _HEADER.pack_into(encoder.buffer, 0, MAGIC, root, meta_offset, len(encoder.buffer))
+    return bytes(encoder.buffer)
+
+
+def decode(data: Union[bytes, memoryview]) -> Tuple[Any, Dict]:
+    """
+    Get a view of the root of data, which was created by :func:`encode`.
+
+    Parameters
+    ----------
+    data : Union[bytes, memoryview]
+
+    Returns
+    -------
+    root : Any
+        Usually a SharedMapping.
+    meta : Dict
+    """
+    buf = memoryview(data)
+    magic, root, meta_offset, size = _HEADER.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise ValueError("The data was not created by cfg_load.shared.encode")
+    buf = buf[:size]
+    return _decode(buf, root), pickle.loads(_decode(buf, meta_offset))
+
+
+def _scalar_end(buf: memoryview, offset: int) -> int:
+    """Get the offset after the scalar node at offset."""
+    tag = buf[offset]
+    if tag in b"NTF":
+        return offset + 1
+    if tag in b"if":
+        return offset + 9
+    return offset + 5 + _U32.unpack_from(buf, offset + 1)[0]
+
+
+def _decode(buf: memoryview, offset: int) -> Any:
+    """Decode the node at offset; containers become facades."""
+    tag = chr(buf[offset])
+    if tag == "d":
+        return SharedMapping(buf, offset)
+    if tag == "l":
+        return SharedSequence(buf, offset)
+    if tag == "s":
+        (length,) = _U32.unpack_from(buf, offset + 1)
+        return str(buf[offset + 5 : offset + 5 + length], "utf-8", "surrogatepass")
+    if tag == "i":
+        return _I64.unpack_from(buf, offset + 1)[0]
+    if tag == "f":
+        return _F64.unpack_from(buf, offset + 1)[0]
+    if tag == "N":
+        return None
+    if tag == "T":
+        return True
+    if tag == "F":
+        return False
+    (length,) = _U32.unpack_from(buf, offset + 1)
+    data = bytes(buf[offset + 5 : offset + 5 + length])
+    if tag == "b":
+        return data
+    if tag == "I":
+        return int(data)
+    return pickle.loads(data)
+
+
+def _to_plain(value: Any) -> Any:
+    if isinstance(value, SharedMapping):
+        return {key: _to_plain(item) for key, item in value.items()}
+    if isinstance(value, SharedSequence):
+        return [_to_plain(item) for item in value]
+    return value
+
+
+class SharedMapping(collections.abc.Mapping):
+    """
+    A read-only view of an encoded dict.
+
+    Nested dicts and lists are returned as views, too; scalars are decoded on
+    access.
+    """
+
+    __slots__ = ("_buf", "_offset", "_count")
+
+    def __init__(self, buf: memoryview, offset: int):
+        self._buf = buf
+        self._offset = offset
+        (self._count,) = _U32.unpack_from(buf, offset + 1)
+
+    def _pair(self, position: int) -> Tuple[int, int]:
+        return _PAIR.unpack_from(self._buf, self._offset + 5 + 8 * position)
+
+    def _sorted_position(self, index: int) -> int:
+        start = self._offset + 5 + 8 * self._count
+        return _U32.unpack_from(self._buf, start + 4 * index)[0]
+
+    def _encoded_key(self, index: int) -> bytes:
+        key_offset = self._pair(self._sorted_position(index))[0]
+        return bytes(self._buf[key_offset : _scalar_end(self._buf, key_offset)])
+
+    def __getitem__(self, key: Any) -> Any:
+        if isinstance(key, (dict, list, tuple)):
+            raise KeyError(key)
+        encoded = encode_scalar(key)
+        keys = _SortedKeys(self)
+        index = bisect.bisect_left(keys, encoded)
+        if index < self._count and keys[index] == encoded:
+            return _decode(self._buf, self._pair(self._sorted_position(index))[1])
+        raise KeyError(key)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator:
+        for position in range(self._count):
+            yield _decode(self._buf, self._pair(position)[0])
+
+    def items(self) -> Any:
+        """Iterate over (key, value) pairs without looking up the keys."""
+        return [
+            (_decode(self._buf, key), _decode(self._buf, value))
+            for key, value in (self._pair(i) for i in range(self._count))
+        ]
+
+    def to_dict(self) -> Dict:
+        """Decode into plain dicts and lists."""
+        return _to_plain(self)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()!r})"
+
+
+class _SortedKeys(collections.abc.Sequence):
+    """The encoded keys of a SharedMapping in sorted order, for bisect."""
+
+    def __init__(self, mapping: SharedMapping):
+        self._mapping = mapping
+
+    def __len__(self) -> int:
+        return self._mapping._count
+
+    def __getitem__(self, index: Any) -> bytes:
+        return self._mapping._encoded_key(index)
+
+
+class SharedSequence(collections.abc.Sequence):
+    """A read-only view of an encoded list."""
+
+    __slots__ = ("_buf", "_offset", "_count")
+
+    def __init__(self, buf: memoryview, offset: int):
+        self._buf = buf
+        self._offset = offset
+        (self._count,) = _U32.unpack_from(buf, offset + 1)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("list index out of range")
+        (offset,) = _U32.unpack_from(self._buf, self._offset + 5 + 4 * index)
+        return _decode(self._buf, offset)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (list, tuple, SharedSequence)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({_to_plain(self)!r})"
+
+
+class SharedConfiguration(SharedMapping):
+    """
+    A Configuration which lives in shared memory.
+
+    It supports the read-only interface of :class:`cfg_load.Configuration`.
+    Use :func:`share` to create one and :func:`attach` to open it in a
+    process which was not forked from the creator.
+
+    Parameters
+    ----------
+    shm : multiprocessing.shared_memory.SharedMemory
+    """
+
+    __slots__ = ("shm", "meta", "_modules")
+
+    def __init__(self, shm: shared_memory.SharedMemory):
+        root, meta = decode(cast(memoryview, shm.buf).toreadonly())
+        if not isinstance(root, SharedMapping):
+            raise ValueError(f"'{shm.name}' does not contain a dict")
+        super().__init__(root._buf, root._offset)
+        self.shm = shm
+        self.meta = meta
+        self._modules: Optional[Dict] = None
+
+    @property
+    def name(self) -> str:
+        """The name of the shared memory block; pass it to :func:`attach`."""
+        return self.shm.name
+
+    @property
+    def modules(self) -> Dict:
+        """The modules of `_module_path` keys, loaded in this process."""
+        if self._modules is None:
+            self._modules = self.to_configuration().modules
+        return self._modules
+
+    def to_configuration(self) -> "cfg_load.Configuration":
+        """Create a process-local Configuration with the same content."""
+        meta = dict(self.meta)
+        load_remote = meta.get("load_remote", False)
+        config = cfg_load.Configuration._wrap(self.to_dict(), meta, False)
+        config.meta["load_remote"] = load_remote
+        return config
+
+    def pformat(self, indent: int = 4, meta: bool = False) -> str:
+        """Pretty-format the configuration; see Configuration.pformat."""
+        return self.to_configuration().pformat(indent=indent, meta=meta)
+
+    def update(self, other: "cfg_load.Configuration") -> "cfg_load.Configuration":
+        """Create a process-local, updated Configuration."""
+        return self.to_configuration().update(other)
+
+    def apply_env(self, env_mapping: List[Dict[str, Any]]) -> "cfg_load.Configuration":
+        """Create a process-local Configuration with environment variables."""
+        return self.to_configuration().apply_env(env_mapping)
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}({self.meta.get('filepath')})"
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(name={self.name!r})"
+
+    def close(self) -> None:
+        """Close the shared memory block in this process."""
+        self._buf.release()
+        self.shm.close()
+
+    def unlink(self) -> None:
+        """Free the shared memory block; call it once, in the creator."""
+        self.shm.unlink()
+
+
+def share(
+    config: "cfg_load.Configuration", name: Optional[str] = None
+) -> SharedConfiguration:
+    """
+    Copy config into shared memory.
+
+    Call it before forking the workers; they inherit the returned object.
+    The creator is responsible for calling `unlink()` at the end.
+
+    Parameters
+    ----------
+    config : Configuration
+    name : str, optional
+        Name of the shared memory block. A random one is used if not given.
+
+    Returns
+    -------
+    shared_config : SharedConfiguration
+    """
+    data = encode(config.to_dict(), config.meta)
+    shm = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+    cast(memoryview, shm.buf)[: len(data)] = data
+    return SharedConfiguration(shm)
+
+
+def attach(name: str) -> SharedConfiguration:
+    """
+    Open a configuration which was shared by another process.
+
+    Parameters
+    ----------
+    name : str
+
+    Returns
+    -------
+    shared_config : SharedConfiguration
+    """
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)  # type: ignore
+    except TypeError:  # pragma: no cover
+        # Before Python 3.13, attaching registers the block for removal at
+        # exit, which would remove it for all other processes, too.
+        # Core Library
+        from multiprocessing import resource_tracker
+
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore
+    return SharedConfiguration(shm)
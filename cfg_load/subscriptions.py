@@ -0,0 +1,252 @@
+"""Notify components when the part of a configuration they use changes."""
+
+# Core Library
+import logging
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+# First party
+import cfg_load.compact
+import cfg_load.delta
+
+logger = logging.getLogger(__name__)
+
+Keys = Union[str, Sequence[Any]]
+
+
+class ChangeEvent(NamedTuple):
+    """
+    A subtree of a configuration which changed.
+
+    Parameters
+    ----------
+    keys : Tuple[Any, ...]
+        The keys of the subtree, e.g. ('cache', 'redis').
+    old : Any
+        The old value of the subtree; None if it did not exist.
+    new : Any
+        The new value of the subtree; None if it was removed.
+    config : Configuration
+        The new configuration.
+    """
+
+    keys: Tuple[Any, ...]
+    old: Any
+    new: Any
+    config: Any
+
+
+Callback = Callable[[ChangeEvent], None]
+
+# The fingerprint of subtrees which do not exist
+_MISSING = ""
+
+
+def split_keys(keys: Keys) -> Tuple[Any, ...]:
+    """
+    Get the keys of a subtree as a tuple.
+
+    >>> split_keys("cache.redis")
+    ('cache', 'redis')
+    >>> split_keys(["hosts", 0])
+    ('hosts', 0)
+
+    Parameters
+    ----------
+    keys : Union[str, Sequence[Any]]
+        A dot-separated string or a sequence of keys and list indices.
+
+    Returns
+    -------
+    keys : Tuple[Any, ...]
+    """
+    if isinstance(keys, str):
+        return tuple(keys.split(".")) if keys else ()
+    return tuple(keys)
+
+
+def get_subtree(config: Any, keys: Tuple[Any, ...]) -> Tuple[bool, Any]:
+    """
+    Get the subtree of config at keys.
+
+    Parameters
+    ----------
+    config : Any
+    keys : Tuple[Any, ...]
+
+    Returns
+    -------
+    exists, subtree : Tuple[bool, Any]
+    """
+    node = config
+    for key in keys:
+        if (
+            isinstance(node, (list, cfg_load.compact.FrozenArray))
+            and isinstance(key, str)
+            and key.isdigit()
+        ):
+            key = int(key)
+        try:
+            node = node[key]
+        except (KeyError, IndexError, TypeError):
+            return False, None
+    return True, node
+
+
+def lookup(config: Any, key: str) -> Any:
+    """
+    Get the value of a dot-separated key; list elements are accessed by index.
+
+    Parameters
+    ----------
+    config : Any
+    key : str
+        e.g. 'server.hosts.0'
+
+    Returns
+    -------
+    value : Any
+    """
+    value = config
+    for part in split_keys(key):
+        if isinstance(value, (list, tuple, cfg_load.compact.FrozenArray)):
+            value = value[int(part)]
+        else:
+            value = value[part]
+    return value
+
+
+class Subscription:
+    """
+    A callback for the changes of one subtree.
+
+    Parameters
+    ----------
+    registry : Subscriptions
+    keys : Tuple[Any, ...]
+    callback : Callable[[ChangeEvent], None]
+    """
+
+    def __init__(
+        self, registry: "Subscriptions", keys: Tuple[Any, ...], callback: Callback
+    ):
+        self.registry = registry
+        self.keys = keys
+        self.callback = callback
+
+    def cancel(self) -> None:
+        """Stop calling the callback."""
+        self.registry.remove(self)
+
+
+class Subscriptions:
+    """
+    The subscriptions of a configuration and the configurations derived from it.
+
+    Configurations created by `update`, `apply_env`, `patch` and `reload`
+    share the subscriptions of the configuration they were created from.
+    """
+
+    def __init__(self) -> None:
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def add(self, keys: Keys, callback: Callback) -> Subscription:
+        """
+        Call callback with a :class:`ChangeEvent` when the subtree changes.
+
+        Parameters
+        ----------
+        keys : Union[str, Sequence[Any]]
+        callback : Callable[[ChangeEvent], None]
+
+        Returns
+        -------
+        subscription : Subscription
+        """
+        subscription = Subscription(self, split_keys(keys), callback)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def remove(self, subscription: Subscription) -> None:
+        """
+        Remove a subscription; nothing happens if it was removed before.
+
+        Parameters
+        ----------
+        subscription : Subscription
+        """
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def notify(self, old_config: Any, new_config: Any) -> List[ChangeEvent]:
+        """
+        Call the callbacks of the subtrees which differ.
+
+        The subtrees are compared by their fingerprints, which are cached in
+        the configurations. Subtrees which are the same object are not
+        compared at all. A callback which raises an exception is logged and
+        does not stop the other callbacks.
+
+        Parameters
+        ----------
+        old_config : Configuration
+        new_config : Configuration
+
+        Returns
+        -------
+        events : List[ChangeEvent]
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        events: Dict[Tuple[Any, ...], ChangeEvent] = {}
+        unchanged = set()
+        for subscription in subscriptions:
+            keys = subscription.keys
+            if keys in unchanged:
+                continue
+            if keys not in events:
+                event = _compare(old_config, new_config, keys)
+                if event is None:
+                    unchanged.add(keys)
+                    continue
+                events[keys] = event
+            try:
+                subscription.callback(events[keys])
+            except Exception:  # noqa
+                logger.exception(f"Subscription for {keys} failed")
+        return list(events.values())
+
+
+def _compare(old_config: Any, new_config: Any, keys: Tuple[Any, ...]) -> Any:
+    old_exists, old = get_subtree(old_config.to_dict(), keys)
+    new_exists, new = get_subtree(new_config.to_dict(), keys)
+    if old_exists and new_exists and old is new:
+        return None
+    old_fingerprint = (
+        cfg_load.delta.fingerprint(old, old_config._fingerprints)
+        if old_exists
+        else _MISSING
+    )
+    new_fingerprint = (
+        cfg_load.delta.fingerprint(new, new_config._fingerprints)
+        if new_exists
+        else _MISSING
+    )
+    if old_fingerprint == new_fingerprint:
+        return None
+    return ChangeEvent(keys, old, new, new_config)
@@ -0,0 +1,171 @@
+"""Measure the phases of loading a configuration and report them to hooks."""
+
+# Core Library
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+
+class PhaseEvent(NamedTuple):
+    """
+    A phase of loading a configuration which has finished.
+
+    Parameters
+    ----------
+    name : str
+        One of 'read', 'parse', 'validate', 'compact_lists',
+        'make_paths_absolute', 'load_env', 'resolve_references', 'copy',
+        'load_modules', 'load_remote' and 'download'.
+    filepath : str, optional
+        The configuration file which is loaded.
+    duration : float
+        Duration of the phase in seconds, measured with a monotonic clock.
+    start_time_ns : int
+        Wall clock time when the phase started, e.g. for the `start_time` of
+        an OpenTelemetry span.
+    end_time_ns : int
+        Wall clock time when the phase ended.
+    attributes : Dict[str, Any]
+        Further information, e.g. 'bytes' for the 'read' phase or
+        'source_url' for a 'download'.
+    """
+
+    name: str
+    filepath: Optional[str]
+    duration: float
+    start_time_ns: int
+    end_time_ns: int
+    attributes: Dict[str, Any]
+
+
+Hook = Callable[[PhaseEvent], None]
+
+_HOOKS: List[Hook] = []
+
+
+def add_hook(hook: Hook) -> Hook:
+    """
+    Call hook with a :class:`PhaseEvent` whenever a phase has finished.
+
+    Example which creates OpenTelemetry spans:
+
+    >> def to_span(event):
+    ..     span = tracer.start_span(f"cfg_load.{event.name}",
+    ..                              start_time=event.start_time_ns,
+    ..                              attributes=event.attributes)
+    ..     span.end(end_time=event.end_time_ns)
+    >> cfg_load.timing.add_hook(to_span)
+
+    Parameters
+    ----------
+    hook : Callable[[PhaseEvent], None]
+
+    Returns
+    -------
+    hook : Callable[[PhaseEvent], None]
+    """
+    _HOOKS.append(hook)
+    return hook
+
+
+def remove_hook(hook: Hook) -> None:
+    """
+    Stop calling hook.
+
+    Parameters
+    ----------
+    hook : Callable[[PhaseEvent], None]
+    """
+    _HOOKS.remove(hook)
+
+
+def statsd_hook(client: Any, prefix: str = "cfg_load") -> Hook:
+    """
+    Create a hook which sends the duration of every phase to statsd.
+
+    Parameters
+    ----------
+    client : Any
+        An object with a `timing(name, milliseconds)` method, e.g. a
+        `statsd.StatsClient`.
+    prefix : str
+
+    Returns
+    -------
+    hook : Callable[[PhaseEvent], None]
+    """
+
+    def hook(event: PhaseEvent) -> None:
+        client.timing(f"{prefix}.{event.name}", event.duration * 1000)
+
+    return hook
+
+
+class Timer:
+    """
+    Record the duration of the phases of loading one configuration.
+
+    Parameters
+    ----------
+    filepath : str, optional
+    """
+
+    def __init__(self, filepath: Optional[str] = None):
+        self.filepath = filepath
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str, record: bool = True, **attributes: Any) -> Iterator:
+        """
+        Measure the code in the with-block as the phase name.
+
+        The yielded dict can be used to add attributes to the event.
+
+        Parameters
+        ----------
+        name : str
+        record : bool, optional (default: True)
+            Store the duration in `timings`. If False, only hooks are called.
+        **attributes : Any
+        """
+        start_time_ns = time.time_ns()
+        start = time.perf_counter()
+        yield attributes
+        duration = time.perf_counter() - start
+        if record:
+            self.timings[name] = self.timings.get(name, 0.0) + duration
+        if _HOOKS:
+            event = PhaseEvent(
+                name,
+                self.filepath,
+                duration,
+                start_time_ns,
+                start_time_ns + int(duration * 1e9),
+                attributes,
+            )
+            for hook in list(_HOOKS):
+                hook(event)
+
+
+def count_nodes(config: Any) -> int:
+    """
+    Count all dicts, lists and values in config.
+
+    Parameters
+    ----------
+    config : Any
+
+    Returns
+    -------
+    nb_nodes : int
+    """
+    count = 0
+    stack = [config]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return count
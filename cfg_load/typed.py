@@ -0,0 +1,297 @@
+"""Convert configurations into typed objects with attribute access."""
+
+# Core Library
+import collections.abc
+import dataclasses
+import functools
+import keyword
+from copy import deepcopy
+from typing import Any, Dict, List, Tuple, Union, cast, get_type_hints
+
+# Third party
+import mpu
+
+# First party
+from cfg_load.compact import FrozenArray
+from cfg_load.schema import ValidationError, schema_hash
+
+Errors = List[Tuple[str, str]]
+
+_MISSING = object()
+_CLASS_CACHE: Dict[Tuple[str, str], type] = {}
+
+
+class TypedNode:
+    """
+    Base class of the classes which are generated from a schema.
+
+    Instances are read-only. Each generated class stores its values in
+    `__slots__`, so an instance needs less memory than a dict with the same
+    keys and attribute access does not need a hash lookup.
+    """
+
+    __slots__: Tuple[str, ...] = ()
+    _schema: Dict = {}
+
+    def __init__(self, **kwargs: Any):
+        for name in self.__slots__:
+            object.__setattr__(self, name, kwargs[name])
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{self.__class__.__name__} is read-only")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{self.__class__.__name__} is read-only")
+
+    def __eq__(self, other: Any) -> bool:
+        return type(self) is type(other) and self._astuple() == other._astuple()
+
+    def __hash__(self) -> int:
+        return hash(self._astuple())
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{self.__class__.__name__}({values})"
+
+    def __reduce__(self) -> Any:
+        # Generated classes can not be imported, so they are re-generated
+        return _restore, (self._schema, self.__class__.__name__, self._asdict())
+
+    def _astuple(self) -> Tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def _asdict(self) -> Dict[str, Any]:
+        """Return the values as dict; nested nodes stay typed."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _restore(schema: Dict, name: str, values: Dict[str, Any]) -> TypedNode:
+    return _class_for_schema(schema, name)(**values)
+
+
+def as_typed(config: Dict, spec: Union[Dict, type]) -> Any:
+    """
+    Convert config into typed objects.
+
+    Parameters
+    ----------
+    config : Dict
+    spec : Union[Dict, type]
+        Either a dataclass or a JSON Schema. For a dataclass, nested
+        dataclasses are created for fields which are annotated with a
+        dataclass. For a schema, a class with `__slots__` is generated for
+        every object with `properties`. Generated classes are cached by the
+        schema content.
+
+    Returns
+    -------
+    typed : Any
+        An instance of the dataclass or of the generated class.
+    """
+    errors: Errors = []
+    if isinstance(spec, dict):
+        typed = _from_schema(config, spec, "$", errors, "Config", {})
+    elif dataclasses.is_dataclass(spec):
+        typed = _from_type(config, spec, "$", errors)
+    else:
+        raise TypeError(f"Expected a dataclass or a JSON Schema, got {spec!r}")
+    if errors:
+        raise ValidationError(errors)
+    return typed
+
+
+def _coerce_scalar(value: Any, target: type, path: str, errors: Errors) -> Any:
+    """Convert value to one of int, float, str and bool."""
+    if type(value) is target or value is None:
+        return value
+    try:
+        if isinstance(value, collections.abc.Collection) and not isinstance(value, str):
+            raise TypeError(value)
+        if target is bool:
+            if isinstance(value, str):
+                return mpu.string.str2bool(value)
+            if isinstance(value, int) and value in (0, 1):
+                return bool(value)
+            raise ValueError(value)
+        if target in (int, float) and isinstance(value, bool):
+            raise ValueError(value)
+        if target is int and isinstance(value, float) and not value.is_integer():
+            raise ValueError(value)
+        return target(value)
+    except (TypeError, ValueError):
+        errors.append((path, f"can not convert {value!r} to {target.__name__}"))
+        return value
+
+
+_SCHEMA_SCALARS = {"integer": int, "number": float, "string": str, "boolean": bool}
+
+# The item types of a FrozenArray by its typecode
+_ARRAY_TYPES = {"q": int, "d": float}
+
+
+def _from_schema(
+    value: Any,
+    schema: Dict,
+    path: str,
+    errors: Errors,
+    name: str,
+    classes: Dict[int, type],
+) -> Any:
+    type_ = schema.get("type")
+    if type_ in _SCHEMA_SCALARS:
+        return _coerce_scalar(value, _SCHEMA_SCALARS[type_], path, errors)
+    if type_ == "array" or "items" in schema:
+        if not isinstance(value, (list, tuple, FrozenArray)):
+            errors.append((path, f"expected an array, got {type(value).__name__!r}"))
+            return value
+        item_schema = schema.get("items", {})
+        if isinstance(value, FrozenArray) and (
+            item_schema == {}
+            or _SCHEMA_SCALARS.get(item_schema.get("type"))
+            is _ARRAY_TYPES[value.typecode]
+        ):
+            # The numbers already have the right type
+            return value
+        return [
+            _from_schema(
+                item, item_schema, f"{path}[{i}]", errors, f"{name}Item", classes
+            )
+            for i, item in enumerate(value)
+        ]
+    if "properties" not in schema:
+        return value
+    if not isinstance(value, dict):
+        errors.append((path, f"expected an object, got {type(value).__name__!r}"))
+        return value
+    # Hashing the schema is expensive, so it is done once per subschema
+    cls = classes.get(id(schema))
+    if cls is None:
+        cls = classes[id(schema)] = _class_for_schema(schema, name)
+    required = set(schema.get("required", []))
+    kwargs: Dict[str, Any] = {}
+    for key, subschema in schema["properties"].items():
+        if key in value:
+            item = value[key]
+        elif "default" in subschema:
+            item = deepcopy(subschema["default"])
+        else:
+            if key in required:
+                errors.append((path, f"missing required property {key!r}"))
+            # Missing optional properties are None, whatever their type is
+            kwargs[_attribute_name(key)] = None
+            continue
+        attribute = _attribute_name(key)
+        kwargs[attribute] = _from_schema(
+            item, subschema, f"{path}.{key}", errors, _class_name(key), classes
+        )
+    return cls(**kwargs)
+
+
+def _class_for_schema(schema: Dict, name: str) -> type:
+    name = schema.get("title", name)
+    cache_key = (schema_hash(schema), name)
+    if cache_key not in _CLASS_CACHE:
+        slots = tuple(_attribute_name(key) for key in schema["properties"])
+        if len(set(slots)) < len(slots):
+            keys: Dict[str, List[str]] = {}
+            for key, slot in zip(schema["properties"], slots):
+                keys.setdefault(slot, []).append(key)
+            collisions = [
+                f"{', '.join(map(repr, same))} -> {slot!r}"
+                for slot, same in keys.items()
+                if len(same) > 1
+            ]
+            raise ValueError(
+                "Properties get the same attribute name: " + "; ".join(collisions)
+            )
+        _CLASS_CACHE[cache_key] = type(
+            _class_name(name), (TypedNode,), {"__slots__": slots, "_schema": schema}
+        )
+    return _CLASS_CACHE[cache_key]
+
+
+def _attribute_name(key: str) -> str:
+    """Get a valid Python identifier for key; invalid characters become _."""
+    name = "".join(char if char.isalnum() else "_" for char in str(key))
+    if not name.isidentifier() or keyword.iskeyword(name):
+        name = "_" + name
+    return name
+
+
+def _class_name(key: str) -> str:
+    return "".join(part.capitalize() for part in _attribute_name(key).split("_"))
+
+
+@functools.lru_cache(maxsize=None)
+def _type_hints(target: type) -> Dict[str, Any]:
+    return get_type_hints(target)
+
+
+def _from_type(value: Any, target: Any, path: str, errors: Errors) -> Any:
+    if dataclasses.is_dataclass(target):
+        if not isinstance(value, dict):
+            errors.append((path, f"expected an object, got {type(value).__name__!r}"))
+            return value
+        hints = _type_hints(cast(type, target))
+        kwargs = {}
+        complete = True
+        for field in dataclasses.fields(target):
+            if not field.init:
+                continue
+            item = value.get(field.name, _MISSING)
+            if item is _MISSING:
+                if (
+                    field.default is dataclasses.MISSING
+                    and field.default_factory is dataclasses.MISSING  # type: ignore
+                ):
+                    errors.append((path, f"missing required property {field.name!r}"))
+                    complete = False
+                continue
+            kwargs[field.name] = _from_type(
+                item, hints[field.name], f"{path}.{field.name}", errors
+            )
+        return cast(type, target)(**kwargs) if complete else value
+    if target in (int, float, str, bool):
+        return _coerce_scalar(value, target, path, errors)
+    origin = getattr(target, "__origin__", None)
+    args: Tuple[Any, ...] = getattr(target, "__args__", ())
+    if origin is Union:
+        if value is None and type(None) in args:
+            return None
+        options = [arg for arg in args if arg is not type(None)]
+        if len(options) == 1:
+            return _from_type(value, options[0], path, errors)
+        return value
+    if (
+        origin is list
+        and isinstance(value, FrozenArray)
+        and args[0] in (Any, _ARRAY_TYPES[value.typecode])
+    ):
+        # The numbers already have the right type
+        return value
+    if (
+        origin in (list, tuple)
+        and args
+        and isinstance(value, (list, tuple, FrozenArray))
+    ):
+        if origin is tuple:
+            if len(args) == 2 and args[1] is Ellipsis:
+                # Tuple[int, ...]
+                args = (args[0],) * len(value)
+            elif len(value) != len(args):
+                errors.append((path, f"expected {len(args)} items, got {len(value)}"))
+                return value
+            return tuple(
+                _from_type(item, arg, f"{path}[{i}]", errors)
+                for i, (item, arg) in enumerate(zip(value, args))
+            )
+        return [
+            _from_type(item, args[0], f"{path}[{i}]", errors)
+            for i, item in enumerate(value)
+        ]
+    if origin is dict and len(args) == 2 and isinstance(value, dict):
+        return {
+            key: _from_type(item, args[1], f"{path}.{key}", errors)
+            for key, item in value.items()
+        }
+    return value
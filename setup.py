@@ -12,5 +12,13 @@ setup(
         "requests>=2.18.4",
         "six>=1.11.0",
     ],
-    extras_require={"all": "boto3"},
+    extras_require={
+        "all": [
+            "boto3",
+            "cbor2",
+            "msgpack",
+            "tomli; python_version<'3.11'",
+            "tomli_w",
+        ]
+    },
 )
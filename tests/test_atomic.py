@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+"""Test the cfg_load.atomic module."""
+
+# Core Library
+import threading
+
+# First party
+import cfg_load
+
+
+def make_config(config):
+    meta = {"filepath": "config.yaml", "parse_datetime": None}
+    return cfg_load.Configuration(config, meta, load_remote=False)
+
+
+def test_set_does_not_modify_snapshots():
+    config = cfg_load.AtomicConfiguration(make_config({"a": 1, "b": {"c": 2}}))
+    snapshot = config.snapshot()
+    config.set("a/x", 3)
+    assert config["a/x"] == 3
+    assert "a/x" not in snapshot
+    assert config.snapshot()["b"] is snapshot["b"]
+
+
+def test_mapping_interface():
+    config = cfg_load.AtomicConfiguration(make_config({"a": 1}))
+    assert config.get("a") == 1
+    assert config.get("missing") is None
+    assert config.get("missing", 2) == 2
+    assert dict(config.items()) == {"a": 1}
+    config.set("b", 3)
+    assert config.get("b") == 3
+
+
+def test_update_and_subscribe():
+    config = cfg_load.AtomicConfiguration(make_config({"a": 1}))
+    events = []
+    config.subscribe("a", events.append)
+    config.update(make_config({"a": 2}))
+    assert config["a"] == 2
+    assert [event.new for event in events] == [2]
+
+
+def test_stress_many_readers_and_writers():
+    config = cfg_load.AtomicConfiguration(
+        make_config({"counter": 0, "pair": {"left": 0, "right": 0}})
+    )
+    nb_writers, nb_writes = 8, 50
+    errors = []
+
+    def increment(cfg):
+        counter = cfg["counter"] + 1
+        return cfg.patch(
+            [
+                {"op": "replace", "path": "/counter", "value": counter},
+                {"op": "replace", "path": "/pair/left", "value": counter},
+                {"op": "replace", "path": "/pair/right", "value": counter},
+            ]
+        )
+
+    def write():
+        for _ in range(nb_writes):
+            config.transform(increment)
+
+    def read():
+        last = 0
+        for _ in range(5_000):
+            snapshot = config.snapshot()
+            pair = snapshot["pair"]
+            if pair["left"] != pair["right"] or snapshot["counter"] < last:
+                errors.append((last, snapshot.to_dict()))
+            last = snapshot["counter"]
+
+    readers = [threading.Thread(target=read) for _ in range(16)]
+    writers = [threading.Thread(target=write) for _ in range(nb_writers)]
+    for thread in readers + writers:
+        thread.start()
+    for thread in readers + writers:
+        thread.join()
+    assert errors == []
+    # Writers are serialized, so no increment is lost
+    assert config["counter"] == nb_writers * nb_writes
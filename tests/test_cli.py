@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+
+"""Test the cfg_load.cli module."""
+
+# Core Library
+import importlib
+import io
+import json
+
+# Third party
+import pkg_resources
+import pytest
+
+# First party
+import cfg_load
+import cfg_load.cli
+
+
+@pytest.fixture(autouse=True)
+def no_log_files(monkeypatch):
+    """Keep entry_point from adding file handlers to the root logger."""
+    monkeypatch.setattr(cfg_load.cli, "setup_logging", lambda: None)
+
+
+def test_show(capsys):
+    filepath = pkg_resources.resource_filename(__name__, "examples/simple_base.yaml")
+    cfg_load.cli.entry_point([filepath])
+    assert "'only': 'base'" in capsys.readouterr().out
+
+
+def test_show_raw(capsys):
+    filepath = pkg_resources.resource_filename(__name__, "examples/simple_base.yaml")
+    cfg_load.cli.entry_point(["show", filepath, "--raw"])
+    assert "'only': 'base'" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("extension", [".msgpack", ".cbor", ".json", ".toml"])
+def test_convert(tmp_path, extension):
+    source = pkg_resources.resource_filename(__name__, "examples/simple_base.yaml")
+    target = str(tmp_path / f"converted{extension}")
+    cfg_load.cli.entry_point(["convert", source, target])
+    assert cfg_load.load(target, load_raw=True) == cfg_load.load(source, load_raw=True)
+
+
+def test_convert_explicit_format(tmp_path):
+    source = pkg_resources.resource_filename(__name__, "examples/test.json")
+    target = str(tmp_path / "converted.bin")
+    cfg_load.cli.entry_point(["convert", source, target, "--format", "cbor"])
+    assert cfg_load.load(target, load_raw=True) == cfg_load.load(source, load_raw=True)
+
+
+def test_import_has_no_side_effects(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    importlib.reload(cfg_load.cli)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_show_json(capsys):
+    filepath = pkg_resources.resource_filename(__name__, "examples/simple_base.yaml")
+    cfg_load.cli.entry_point(["show", filepath, "--json"])
+    assert json.loads(capsys.readouterr().out)["nested"]["inner_only_base"] == 28
+
+
+@pytest.mark.parametrize(
+    ("key", "args", "expected"),
+    [
+        ("server.port", [], "8080"),
+        ("server.host", [], '"localhost"'),
+        ("server.host", ["--text"], "localhost"),
+        ("model.thresholds.1", [], "0.5"),
+        ("model", [], '{"thresholds": [0.1, 0.5, 0.9]}'),
+    ],
+)
+def test_query(capsys, key, args, expected):
+    filepath = pkg_resources.resource_filename(__name__, "examples/test.toml")
+    assert cfg_load.cli.entry_point(["query", filepath, key] + args) == 0
+    assert capsys.readouterr().out == expected + "\n"
+
+
+def test_validate(capsys):
+    filepath = pkg_resources.resource_filename(__name__, "examples/test.toml")
+    schema = pkg_resources.resource_filename(__name__, "examples/server_schema.json")
+    assert cfg_load.cli.entry_point(["validate", filepath, "--schema", schema]) == 0
+    assert capsys.readouterr().out == f"{filepath}: valid\n"
+
+
+def test_validate_invalid(capsys):
+    filepath = pkg_resources.resource_filename(__name__, "examples/simple_base.yaml")
+    schema = pkg_resources.resource_filename(__name__, "examples/server_schema.json")
+    args = ["validate", filepath, "--schema", schema, "--json"]
+    assert cfg_load.cli.entry_point(args) == 1
+    result = json.loads(capsys.readouterr().out)
+    assert result["valid"] is False
+    assert result["errors"] == [
+        {"path": "$", "message": "missing required property 'server'"}
+    ]
+
+
+def test_batch():
+    filepaths = [
+        pkg_resources.resource_filename(__name__, "examples/test.toml"),
+        pkg_resources.resource_filename(__name__, "examples/simple_base.yaml"),
+        "",
+        "does-not-exist.yaml",
+    ]
+    out = io.StringIO()
+    success = cfg_load.cli.batch(
+        "query", [path + "\n" for path in filepaths], out, key="server.port"
+    )
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert success is False
+    assert len(results) == 3
+    assert results[0]["value"] == 8080
+    assert results[1]["error"] == "KeyError: 'server'"
+    assert results[2]["error"].startswith("FileNotFoundError")
+
+
+def test_batch_show():
+    filepath = pkg_resources.resource_filename(__name__, "examples/simple_base.yaml")
+    out = io.StringIO()
+    assert cfg_load.cli.batch("show", [filepath + "\n"], out, load_remote=False)
+    result = json.loads(out.getvalue())
+    assert result["config"] == cfg_load.load(filepath).to_dict()
+
+
+def test_batch_entry_point(capsys, monkeypatch):
+    filepath = pkg_resources.resource_filename(__name__, "examples/simple_base.yaml")
+    monkeypatch.setattr("sys.stdin", io.StringIO(filepath + "\n" + filepath + "\n"))
+    assert cfg_load.cli.entry_point(["batch", "validate"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["valid"] for line in lines] == [True, True]
+
+
+def test_show_max_depth(capsys):
+    filepath = pkg_resources.resource_filename(__name__, "examples/test.toml")
+    cfg_load.cli.entry_point(["show", filepath, "--json", "--max-depth", "0"])
+    assert '"server": "<dict with 3 items>"' in capsys.readouterr().out
+
+
+def test_profile(capsys):
+    filepath = pkg_resources.resource_filename(
+        __name__, "examples/cifar10_baseline.yaml"
+    )
+    cfg_load.cli.entry_point(
+        ["profile", filepath, "--no-remote", "--runs", "2", "--top", "2", "--json"]
+    )
+    report = json.loads(capsys.readouterr().out)
+    assert report["runs"] == 2
+    assert set(report["phases"]) >= {"read", "parse (yaml)", "make_paths_absolute"}
+    assert report["phases"]["read"]["warm"] is not None
+    assert report["peak_memory_bytes"] > 0
+    assert report["depth"] == 3
+    assert [subtree["key"] for subtree in report["largest_subtrees"]] == [
+        "train",
+        "evaluate",
+    ]
+    config = cfg_load.load(filepath, load_remote=False).to_dict()
+    assert report["largest_subtrees"][0]["bytes"] == len(
+        json.dumps(config["train"], separators=(",", ":"))
+    )
+
+
+def test_profile_table(capsys):
+    filepath = pkg_resources.resource_filename(__name__, "examples/simple_base.yaml")
+    cfg_load.cli.entry_point(["profile", filepath, "--runs", "1"])
+    out = capsys.readouterr().out
+    assert "parse (yaml)" in out
+    assert "peak memory" in out
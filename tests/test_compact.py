@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+
+"""Test the cfg_load.compact module."""
+
+# Core Library
+import copy
+import io
+import json
+import pickle
+from dataclasses import dataclass
+from typing import List
+
+# Third party
+import pytest
+
+# First party
+import cfg_load
+import cfg_load.compact
+import cfg_load.references
+import cfg_load.subscriptions
+
+
+def test_compact_lists():
+    config = {
+        "thresholds": [0.5] * 300,
+        "buckets": list(range(300)),
+        "short": [1.0, 2.0],
+        "mixed": [1, 2.0] * 150,
+        "flags": [True] * 300,
+        "huge": [2**70] * 300,
+        "nested": [{"embedding": [1.5] * 300}],
+    }
+    cfg_load.compact.compact_lists(config)
+    assert isinstance(config["thresholds"], cfg_load.compact.FrozenArray)
+    assert config["thresholds"].typecode == "d"
+    assert config["buckets"].typecode == "q"
+    assert isinstance(config["nested"][0]["embedding"], cfg_load.compact.FrozenArray)
+    for key in ["short", "mixed", "flags", "huge"]:
+        assert isinstance(config[key], list)
+    assert config["buckets"] == list(range(300))
+    assert config["buckets"][-1] == 299
+    assert config["buckets"][:3] == [0, 1, 2]
+    with pytest.raises(TypeError):
+        config["buckets"][0] = 5
+
+
+def test_frozen_array_copy_and_pickle():
+    array = cfg_load.compact.compact_lists({"a": [1.5] * 300})["a"]
+    assert copy.deepcopy(array) is array
+    assert pickle.loads(pickle.dumps(array)) == array
+    assert array.to_memoryview().readonly
+
+
+def test_frozen_array_to_numpy():
+    np = pytest.importorskip("numpy")
+    array = cfg_load.compact.compact_lists({"a": [1.5] * 300})["a"]
+    values = array.to_numpy()
+    assert values.dtype == np.float64
+    assert not values.flags.writeable
+
+
+def test_load_compact_lists(tmp_path):
+    target = tmp_path / "config.json"
+    target.write_text(json.dumps({"boundaries": list(range(1000)), "name": "x"}))
+    cfg = cfg_load.load(str(target), compact_lists=True)
+    assert isinstance(cfg["boundaries"], cfg_load.compact.FrozenArray)
+    assert "compact_lists" in cfg.meta["timings"]
+    assert cfg.to_dict(plain_lists=True) == {
+        "boundaries": list(range(1000)),
+        "name": "x",
+    }
+    assert type(cfg.to_dict(plain_lists=True)["boundaries"]) is list
+    stream = io.StringIO()
+    cfg.dump(stream, format="json")
+    assert json.loads(stream.getvalue())["boundaries"] == list(range(1000))
+    cfg = cfg_load.load(str(target), compact_lists=2000)
+    assert type(cfg["boundaries"]) is list
+
+
+def test_compact_lists_with_as_typed_and_lookup(tmp_path):
+    target = tmp_path / "model.json"
+    target.write_text(json.dumps({"weights": [0.5] * 300, "ids": list(range(300))}))
+    cfg = cfg_load.load(str(target), compact_lists=True)
+    schema = {
+        "properties": {
+            "weights": {"type": "array", "items": {"type": "number"}},
+            "ids": {"type": "array", "items": {"type": "string"}},
+        }
+    }
+    typed = cfg.as_typed(schema)
+    assert typed.weights is cfg["weights"]
+    assert typed.ids[:2] == ["0", "1"]
+
+    @dataclass
+    class Model:
+        weights: List[float]
+        ids: List[str]
+
+    model = cfg.as_typed(Model)
+    assert model.weights is cfg["weights"]
+    assert model.ids[299] == "299"
+    assert cfg_load.subscriptions.lookup(cfg, "ids.7") == 7
+    assert (
+        cfg_load.references.resolve({"ids": cfg["ids"], "first": "${ref:ids.0}"})[
+            "first"
+        ]
+        == 0
+    )
+
+
+def test_compact_lists_with_environment_override(tmp_path, monkeypatch):
+    target = tmp_path / "model.json"
+    target.write_text(json.dumps({"thresholds": [0.5] * 300}))
+    monkeypatch.setenv("thresholds", "[1, 2, 3]")
+    cfg = cfg_load.load(str(target), compact_lists=True)
+    assert cfg["thresholds"] == [1, 2, 3]
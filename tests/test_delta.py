@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+
+"""Test the cfg_load.delta module."""
+
+# Core Library
+import copy
+
+# Third party
+import pkg_resources
+import pytest
+
+# First party
+import cfg_load
+import cfg_load.delta
+
+
+@pytest.fixture
+def cfg():
+    filepath = pkg_resources.resource_filename(__name__, "examples/test.toml")
+    return cfg_load.load(filepath)
+
+
+def test_diff_equal(cfg):
+    other = cfg_load.Configuration(cfg.to_dict(), dict(cfg.meta), False)
+    assert cfg.diff(other) == []
+    assert cfg.fingerprint() == other.fingerprint()
+
+
+def test_diff_and_patch(cfg):
+    new_dict = copy.deepcopy(cfg.to_dict())
+    new_dict["server"]["port"] = 8081
+    del new_dict["title"]
+    new_dict["model"]["thresholds"].append(0.99)
+    new_dict["new/key"] = {"a": 1}
+    other = cfg_load.Configuration(new_dict, dict(cfg.meta), False)
+    delta = cfg.diff(other)
+    assert {"op": "replace", "path": "/server/port", "value": 8081} in delta
+    assert {"op": "remove", "path": "/title"} in delta
+    assert {"op": "add", "path": "/new~1key", "value": {"a": 1}} in delta
+    assert len(delta) == 4
+    patched = cfg.patch(delta)
+    assert patched == other
+    assert patched.fingerprint() == other.fingerprint()
+    # Unchanged subtrees are shared, the original is not modified
+    assert "title" in cfg
+    assert cfg["server"]["port"] == 8080
+    assert patched["model"] is not cfg["model"]
+    assert patched.diff(cfg) != []
+
+
+def test_patch_shares_unchanged_subtrees():
+    old = {"a": {"x": [1, 2, 3]}, "b": {"y": 1}}
+    new = cfg_load.delta.patch(old, [{"op": "replace", "path": "/b/y", "value": 2}])
+    assert new == {"a": {"x": [1, 2, 3]}, "b": {"y": 2}}
+    assert new["a"] is old["a"]
+    assert old["b"]["y"] == 1
+    assert cfg_load.delta.diff(old, new) == [
+        {"op": "replace", "path": "/b/y", "value": 2}
+    ]
+
+
+def test_patch_inherits_fingerprints(cfg):
+    cfg.fingerprint()
+    patched = cfg.patch([{"op": "replace", "path": "/server/port", "value": 1}])
+    assert id(cfg["model"]) in patched._fingerprints
+    assert id(patched["server"]) not in patched._fingerprints
+    assert patched.fingerprint() != cfg.fingerprint()
+    assert cfg.diff(patched) == [{"op": "replace", "path": "/server/port", "value": 1}]
+
+
+def test_diff_types():
+    assert cfg_load.delta.diff({"a": 1}, {"a": True}) == [
+        {"op": "replace", "path": "/a", "value": True}
+    ]
+    assert cfg_load.delta.diff([1, 2, 3], [1]) == [
+        {"op": "remove", "path": "/2"},
+        {"op": "remove", "path": "/1"},
+    ]
+
+
+def test_patch_list_operations():
+    old = {"l": [1, 2]}
+    delta = [
+        {"op": "add", "path": "/l/0", "value": 0},
+        {"op": "add", "path": "/l/-", "value": 3},
+        {"op": "remove", "path": "/l/1"},
+    ]
+    assert cfg_load.delta.patch(old, delta) == {"l": [0, 2, 3]}
+    assert old == {"l": [1, 2]}
+
+
+def test_patch_invalid_path():
+    with pytest.raises(ValueError):
+        cfg_load.delta.patch({"a": 1}, [{"op": "remove", "path": "/b"}])
+    with pytest.raises(ValueError):
+        cfg_load.delta.patch(
+            {"a": [1]}, [{"op": "replace", "path": "/a/5", "value": 1}]
+        )
+
+
+def test_patch_int_keys():
+    new = cfg_load.delta.patch(
+        {1: "a"}, [{"op": "replace", "path": "/1", "value": "b"}]
+    )
+    assert new == {1: "b"}
+
+
+def test_patch_modules():
+    filepath = pkg_resources.resource_filename(
+        __name__, "examples/cifar10_baseline.yaml"
+    )
+    cfg = cfg_load.load(filepath)
+    patched = cfg.patch([{"op": "add", "path": "/other", "value": 1}])
+    assert patched.modules["paths"] is cfg.modules["paths"]
+    patched = cfg.patch([{"op": "remove", "path": "/paths_module_path"}])
+    assert "paths" not in patched.modules
+    assert "paths" in cfg.modules
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+"""Test the cfg_load.dump module."""
+
+# Core Library
+import datetime
+import io
+import os
+
+# Third party
+import pkg_resources
+import pytest
+
+# First party
+import cfg_load
+import cfg_load.dump
+
+
+def make_big_config():
+    return {
+        "name": "big",
+        "layers": [{"id": i, "weights": list(range(50))} for i in range(100)],
+        "nested": {"a": {"b": {"c": {"d": {"e": 1}}}}},
+    }
+
+
+def test_elide():
+    config = make_big_config()
+    elided = cfg_load.dump.elide(config, max_depth=1, max_items=2)
+    assert elided["name"] == "big"
+    assert elided["layers"] == [
+        "<dict with 2 items>",
+        "<dict with 2 items>",
+        "<98 more items>",
+    ]
+    assert elided["..."] == "<1 more item>"
+    elided = cfg_load.dump.elide(config, max_depth=1)
+    assert elided["nested"] == {"a": "<dict with 1 item>"}
+    # The original is not modified
+    assert len(config["layers"]) == 100
+
+
+def test_elide_dict_items():
+    elided = cfg_load.dump.elide({str(i): i for i in range(5)}, max_items=3)
+    assert elided == {"0": 0, "1": 1, "2": 2, "...": "<2 more items>"}
+
+
+def test_elide_nothing():
+    config = make_big_config()
+    assert cfg_load.dump.elide(config) is config
+
+
+@pytest.mark.parametrize("format_name", ["yaml", "json", "msgpack", "cbor"])
+def test_dump_roundtrip(tmpdir, format_name):
+    if format_name in ("msgpack", "cbor"):
+        pytest.importorskip({"msgpack": "msgpack", "cbor": "cbor2"}[format_name])
+    fmt = cfg_load.formats.get_format(format_name)
+    config = make_big_config()
+    target = os.path.join(str(tmpdir), "config" + fmt.extensions[0])
+    with open(target, "wb") as stream:
+        cfg_load.dump.dump(config, stream, format_name)
+    assert cfg_load.load(target, load_raw=True) == config
+
+
+def test_dump_json_in_chunks(monkeypatch):
+    monkeypatch.setattr(cfg_load.dump, "WRITE_BUFFER_SIZE", 100)
+    writes = []
+
+    class Stream(io.StringIO):
+        def write(self, text):
+            writes.append(text)
+            return super().write(text)
+
+    stream = Stream()
+    cfg_load.dump.dump(make_big_config(), stream, "json")
+    assert len(writes) > 1
+    assert (
+        cfg_load.formats.load_json_stream(io.BytesIO(stream.getvalue().encode("utf-8")))
+        == make_big_config()
+    )
+
+
+def test_dump_binary_format_to_text_stream():
+    pytest.importorskip("msgpack")
+    with pytest.raises(TypeError):
+        cfg_load.dump.dump({"a": 1}, io.StringIO(), "msgpack")
+
+
+def make_big_configuration():
+    meta = {"parse_datetime": datetime.datetime.now(), "filepath": "big.yaml"}
+    return cfg_load.Configuration(make_big_config(), meta, load_remote=False)
+
+
+def test_configuration_dump_max_items():
+    cfg = make_big_configuration()
+    stream = io.StringIO()
+    cfg.dump(stream, max_items=1)
+    assert "<2 more items>" in stream.getvalue()
+    assert "weights" not in stream.getvalue()
+
+
+def test_repr_is_bounded():
+    cfg = make_big_configuration()
+    assert len(repr(cfg)) < len(str(cfg.to_dict())) // 4
+    assert "..." in repr(cfg)
+
+
+def test_pformat_max_items():
+    filepath = pkg_resources.resource_filename(__name__, "examples/test.toml")
+    cfg = cfg_load.load(filepath)
+    text = cfg.pformat(max_items=1)
+    assert "'title': 'TOML example'" in text
+    assert "more items" in text
+
+
+def test_canonical_keys():
+    assert cfg_load.dump.canonical({2: "b", "1": "a"}) == b'{"1":"a","2":"b"}'
+    with pytest.raises(ValueError):
+        cfg_load.dump.canonical({1: "a", "1": "b"})
@@ -2,9 +2,10 @@
 
 """Test the cfg_load module."""
 
-
 # Core Library
+import hashlib
 import os
+import pickle
 from io import StringIO
 from unittest.mock import patch
 from urllib import request
@@ -155,6 +156,21 @@ def test_update():
     assert cfg_expected == cfg_result._dict
 
 
+def test_update_keeps_meta_of_other():
+    filepath = pkg_resources.resource_filename(__name__, "examples/simple_base.yaml")
+    cfg_base = cfg_load.load(filepath)
+    filepath = pkg_resources.resource_filename(__name__, "examples/simple_user.yaml")
+    cfg_update = cfg_load.load(filepath, load_remote=False)
+    meta = dict(cfg_update.meta)
+    cfg_result = cfg_base.update(cfg_update)
+    assert cfg_update.meta == meta
+    assert cfg_result.meta is not cfg_update.meta
+    meta = {"filepath": "config.yaml", "parse_datetime": None}
+    cfg = cfg_load.Configuration({}, meta, load_remote=False)
+    assert meta == {"filepath": "config.yaml", "parse_datetime": None}
+    assert "timings" in cfg.meta
+
+
 def test_apply_env():
     path = "examples/simple_base.yaml"  # always use slash
     filepath = pkg_resources.resource_filename(__name__, path)
@@ -228,3 +244,166 @@ def test_configuration_class(monkeypatch):
     assert isinstance(cfg.pformat(), str)
     assert isinstance(cfg.pformat(meta=True), str)
     cfg.set("foo", "bar")
+
+
+def test_load_toml():
+    path = "examples/test.toml"  # always use slash
+    filepath = pkg_resources.resource_filename(__name__, path)
+    cfg = cfg_load.load(filepath)
+    assert cfg["server"]["port"] == 8080
+    assert cfg["server"]["data_path"] == os.path.join(os.path.dirname(filepath), "data")
+
+
+@pytest.mark.parametrize("format_name", ["msgpack", "cbor", "json", "yaml", "toml"])
+def test_load_binary_roundtrip(tmp_path, format_name):
+    path = "examples/simple_base.yaml"  # always use slash
+    filepath = pkg_resources.resource_filename(__name__, path)
+    raw = cfg_load.load(filepath, load_raw=True)
+    fmt = cfg_load.formats.get_format(format_name)
+    target = tmp_path / f"simple{fmt.extensions[0]}"
+    with open(target, "wb") as stream:
+        fmt.dump(raw, stream)
+    assert cfg_load.load(str(target)).to_dict() == raw
+
+
+@pytest.mark.parametrize("format_name", ["msgpack", "cbor"])
+def test_load_sniff_magic_bytes(tmp_path, format_name):
+    fmt = cfg_load.formats.get_format(format_name)
+    target = tmp_path / "config.bin"
+    with open(target, "wb") as stream:
+        fmt.dump({"foo": "bar", "answer": 42}, stream)
+    assert cfg_load.load(str(target), load_raw=True) == {"foo": "bar", "answer": 42}
+
+
+def test_register_format(tmp_path):
+    def load_lines(stream, **kwargs):
+        return dict(line.decode().split("=", 1) for line in stream.read().splitlines())
+
+    fmt = cfg_load.formats.Format("lines", (".lines",), load_lines)
+    cfg_load.formats.register(fmt)
+    try:
+        target = tmp_path / "config.lines"
+        target.write_text("foo=bar\n")
+        assert cfg_load.load(str(target), load_raw=True) == {"foo": "bar"}
+    finally:
+        cfg_load.formats._FORMATS.remove(fmt)
+
+
+def test_pickle_protocol_5():
+    filepath = pkg_resources.resource_filename(
+        __name__, "examples/cifar10_baseline.yaml"
+    )
+    cfg = cfg_load.load(filepath, load_remote=False)
+    buffers = []
+    data = pickle.dumps(cfg, protocol=5, buffer_callback=buffers.append)
+    assert len(buffers) == 1
+    loaded = pickle.loads(data, buffers=buffers)
+    assert loaded == cfg
+    assert loaded.meta["filepath"] == cfg.meta["filepath"]
+    assert loaded._modules is None
+    assert loaded.modules["paths"].__file__ == cfg.modules["paths"].__file__
+    # The pickled bytes are reused
+    assert pickle.dumps(cfg) == pickle.dumps(cfg)
+    assert cfg._pickled is not None
+    cfg.set("other", 1)
+    assert pickle.loads(pickle.dumps(cfg))["other"] == 1
+
+
+def test_pickle_does_not_load_remote(tmp_path):
+    config = {
+        "model_load_url": {
+            "source_url": "https://example.com/model.bin",
+            "sink_path": str(tmp_path / "model.bin"),
+        }
+    }
+    meta = {"filepath": "config.yaml", "parse_datetime": None}
+    with patch("cfg_load.remote.load") as load:
+        cfg = cfg_load.Configuration(config, meta)
+        loaded = pickle.loads(pickle.dumps(cfg))
+    assert load.call_count == 1
+    assert loaded.remote_ready("model_load_url")
+    assert loaded.meta["load_remote"] is True
+
+
+def test_source_sha256_and_reload_if_changed(tmp_path):
+    target = tmp_path / "config.yaml"
+    target.write_bytes(b"a: 1\n")
+    cfg = cfg_load.load(str(target))
+    assert cfg.meta["sha256"] == hashlib.sha256(b"a: 1\n").hexdigest()
+    assert not cfg.source_changed()
+    assert cfg.reload(if_changed=True) is cfg
+    target.write_bytes(b"a: 2\n")
+    assert cfg.source_changed()
+    assert cfg.reload(if_changed=True)["a"] == 2
+
+
+def test_canonical(tmp_path):
+    (tmp_path / "a.yaml").write_text("b: [1, 2.5]\na: {y: x, x: true}\n")
+    (tmp_path / "b.json").write_text('{"a": {"x": true, "y": "x"}, "b": [1, 2.5]}')
+    cfg_a = cfg_load.load(str(tmp_path / "a.yaml"))
+    cfg_b = cfg_load.load(str(tmp_path / "b.json"))
+    assert cfg_a.meta["sha256"] != cfg_b.meta["sha256"]
+    assert cfg_a.canonical() == cfg_b.canonical()
+    assert cfg_a.canonical() == b'{"a":{"x":true,"y":"x"},"b":[1,2.5]}'
+
+
+def test_iter_load_yaml(tmp_path, monkeypatch):
+    monkeypatch.setenv("JOB_NAME", "from-env")
+    target = tmp_path / "jobs.yaml"
+    target.write_text(
+        "JOB_NAME: a\ndata_path: a.csv\n---\nJOB_NAME: b\ndata_path: b.csv\n---\n"
+        "JOB_NAME: c\n"
+    )
+    configs = cfg_load.iter_load(str(target))
+    first = next(configs)
+    assert first["data_path"] == str(tmp_path / "a.csv")
+    assert first["JOB_NAME"] == "from-env"
+    assert first.meta["document"] == 0
+    assert [cfg.meta["document"] for cfg in configs] == [1, 2]
+
+
+def test_iter_load_jsonl(tmp_path):
+    target = tmp_path / "jobs.jsonl"
+    target.write_text('{"id": 1}\n\n{"id": 2, "out_path": "out"}\n')
+    configs = list(cfg_load.iter_load(str(target)))
+    assert [cfg["id"] for cfg in configs] == [1, 2]
+    assert configs[1]["out_path"] == str(tmp_path / "out")
+    raw = list(cfg_load.iter_load(str(target), load_raw=True))
+    assert raw == [{"id": 1}, {"id": 2, "out_path": "out"}]
+    assert cfg_load.load(str(target), load_raw=True) == raw
+    target.write_text('{"id": 1}\n{"id": \n')
+    with pytest.raises(ValueError, match="Line 2"):
+        list(cfg_load.iter_load(str(target)))
+
+
+def test_iter_load_empty_documents(tmp_path):
+    target = tmp_path / "jobs.yaml"
+    target.write_text("a: 1\n---\n---\nb: 2\n---\n")
+    configs = list(cfg_load.iter_load(str(target)))
+    assert [cfg.to_dict() for cfg in configs] == [{"a": 1}, {"b": 2}]
+    assert [cfg.meta["document"] for cfg in configs] == [0, 2]
+
+
+def test_iter_load_reads_schema_once(tmp_path, monkeypatch):
+    schema = tmp_path / "schema.json"
+    schema.write_text('{"type": "object", "required": ["id"]}')
+    target = tmp_path / "jobs.jsonl"
+    target.write_text('{"id": 1}\n{"id": 2}\n{"id": 3}\n')
+    calls = []
+    load = cfg_load.load
+
+    def counting_load(filepath, *args, **kwargs):
+        calls.append(filepath)
+        return load(filepath, *args, **kwargs)
+
+    monkeypatch.setattr(cfg_load, "load", counting_load)
+    configs = list(cfg_load.iter_load(str(target), schema=str(schema)))
+    assert len(configs) == 3
+    assert calls == [str(schema)]
+
+
+def test_iter_load_single_document():
+    filepath = pkg_resources.resource_filename(__name__, "examples/test.json")
+    assert [cfg.to_dict() for cfg in cfg_load.iter_load(filepath)] == [
+        cfg_load.load(filepath).to_dict()
+    ]
@@ -3,6 +3,8 @@
 """Test the cfg_load.paths module."""
 
 # Core Library
+import os
+import tempfile
 import unittest
 from copy import deepcopy
 from unittest.mock import patch
@@ -55,3 +57,50 @@ class PathsTest(unittest.TestCase):
         loaded_cfg = cfg_load.paths.make_paths_absolute("/home/user", deepcopy(cfg))
         exp = {"a_path": "/home/user/change.me"}
         self.assertDictEqual(exp, loaded_cfg)
+
+    def test_make_paths_absolute_lists_and_non_strings(self):
+        cfg = {
+            "datasets": [{"a_path": "a.csv"}, {"a_path": "a.csv"}],
+            "none_path": None,
+            "number_path": 3,
+        }
+        loaded_cfg = cfg_load.paths.make_paths_absolute("/data", deepcopy(cfg))
+        exp = {
+            "datasets": [{"a_path": "/data/a.csv"}, {"a_path": "/data/a.csv"}],
+            "none_path": None,
+            "number_path": 3,
+        }
+        self.assertDictEqual(exp, loaded_cfg)
+
+    @patch.dict("os.environ", {"DATA_DIR": "/srv/data"})
+    def test_make_paths_absolute_expand_vars(self):
+        cfg = {"a_path": "$DATA_DIR/x.csv", "b_path": "${DATA_DIR}/../y"}
+        loaded_cfg = cfg_load.paths.make_paths_absolute(
+            "/home/user", deepcopy(cfg), expand_vars=True
+        )
+        exp = {"a_path": "/srv/data/x.csv", "b_path": "/srv/y"}
+        self.assertDictEqual(exp, loaded_cfg)
+
+    def test_make_paths_absolute_check_exists(self):
+        with tempfile.TemporaryDirectory() as dir_:
+            open(os.path.join(dir_, "exists.txt"), "w").close()
+            cfg = {"a_path": "exists.txt", "b_path": "missing.txt"}
+            with self.assertRaises(FileNotFoundError) as context:
+                cfg_load.paths.make_paths_absolute(dir_, cfg, check_exists=True)
+            self.assertIn("missing.txt", str(context.exception))
+            self.assertNotIn("exists.txt", str(context.exception))
+            cfg = {"a_path": "exists.txt", "dir_path": "."}
+            cfg_load.paths.make_paths_absolute(dir_, cfg, check_exists=True)
+
+    @patch.dict("os.environ", {"DATA_DIR": "/srv/data"})
+    def test_load_expand_vars_and_check_exists(self):
+        with tempfile.TemporaryDirectory() as dir_:
+            filepath = os.path.join(dir_, "config.yaml")
+            with open(filepath, "w") as f:
+                f.write("data_path: $DATA_DIR/x.csv\nconfig_path: config.yaml\n")
+            cfg = cfg_load.load(filepath, expand_vars=True)
+            self.assertEqual(cfg["data_path"], "/srv/data/x.csv")
+            with self.assertRaises(FileNotFoundError) as context:
+                cfg_load.load(filepath, expand_vars=True, check_exists=True)
+            self.assertIn("/srv/data/x.csv", str(context.exception))
+            self.assertNotIn("config.yaml", str(context.exception))
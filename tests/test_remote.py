@@ -1,21 +1,80 @@
 #!/usr/bin/env python
 
-"""Test the cfg_load.paths module."""
+"""Test the cfg_load.remote module."""
 
 # Core Library
+import concurrent.futures
+import hashlib
+import http.server
 import os
+import threading
 
 # Third party
 import boto3
 import pkg_resources
 import pytest
+import requests
 import responses
 from moto import mock_s3
 
 # First party
+import cfg_load
 import cfg_load.remote
 
 
+@pytest.fixture
+def range_server():
+    """Serve server.content with ranges; cut the first `cut_after` bytes."""
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(server.content)))
+            self.send_header("ETag", server.etag)
+            self.send_header("Accept-Ranges", "bytes")
+            self.end_headers()
+
+        def do_GET(self):
+            server.requests.append(self.headers.get("Range"))
+            start, end = 0, len(server.content)
+            status = 200
+            if self.headers.get("Range") and self.headers.get("If-Range") in (
+                None,
+                server.etag,
+            ):
+                first, last = self.headers["Range"][len("bytes=") :].split("-")
+                start, end = int(first), int(last or end - 1) + 1
+                status = 206
+            body = server.content[start:end]
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", server.etag)
+            self.send_header("Accept-Ranges", "bytes")
+            if status == 206:
+                self.send_header(
+                    "Content-Range", f"bytes {start}-{end - 1}/{len(server.content)}"
+                )
+            self.end_headers()
+            if server.cut_after is not None:
+                body, server.cut_after = body[: server.cut_after], None
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.content = bytes(range(256)) * 400
+    server.etag = '"v1"'
+    server.cut_after = None
+    server.requests = []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/model.bin"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
 @responses.activate
 def test_load_http(requests_mock):
     filepath = pkg_resources.resource_filename(__name__, "examples/image.jpg")
@@ -72,3 +131,357 @@ def test_load_unknown_protocol():
     sink = "ignore_zip-random.zip"
     with pytest.raises(RuntimeError):
         cfg_load.remote.load(source, sink)
+
+
+def test_fetch_http_revalidates_with_etag(requests_mock, tmpdir):
+    source = "https://example.com/config.yaml"
+    requests_mock.get(
+        source,
+        [
+            {"content": b"a: 1\n", "headers": {"ETag": '"v1"'}},
+            {"status_code": 304},
+        ],
+    )
+    first = cfg_load.remote.fetch(source, str(tmpdir))
+    assert first.content == b"a: 1\n"
+    assert first.etag == '"v1"'
+    assert not first.from_cache
+    second = cfg_load.remote.fetch(source, str(tmpdir))
+    assert second.content == b"a: 1\n"
+    assert second.from_cache
+    assert requests_mock.request_history[1].headers["If-None-Match"] == '"v1"'
+
+
+def test_fetch_ttl(requests_mock, tmpdir):
+    source = "https://example.com/config.yaml"
+    requests_mock.get(source, content=b"a: 1\n")
+    cfg_load.remote.fetch(source, str(tmpdir), ttl=60)
+    assert cfg_load.remote.fetch(source, str(tmpdir), ttl=60).from_cache
+    assert requests_mock.call_count == 1
+
+
+def test_fetch_stale_fallback(requests_mock, tmpdir):
+    source = "https://example.com/config.yaml"
+    requests_mock.get(
+        source,
+        [
+            {"content": b"a: 1\n"},
+            {"exc": requests.exceptions.ConnectionError},
+            {"status_code": 503},
+            {"status_code": 404},
+        ],
+    )
+    cfg_load.remote.fetch(source, str(tmpdir))
+    assert cfg_load.remote.fetch(source, str(tmpdir)).stale
+    assert cfg_load.remote.fetch(source, str(tmpdir)).stale
+    with pytest.raises(requests.exceptions.HTTPError):
+        cfg_load.remote.fetch(source, str(tmpdir))
+
+
+def test_fetch_unreachable_without_cache(requests_mock, tmpdir):
+    source = "https://example.com/config.yaml"
+    requests_mock.get(source, exc=requests.exceptions.ConnectionError)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        cfg_load.remote.fetch(source, str(tmpdir))
+
+
+@mock_s3
+def test_load_config_from_s3(tmpdir):
+    conn = boto3.resource("s3", region_name="us-east-1")
+    conn.create_bucket(Bucket="configs")
+    conn.Object("configs", "app.json").put(Body=b'{"server": {"port": 8080}}')
+    cfg = cfg_load.load("s3://configs/app.json", cache_dir=str(tmpdir))
+    assert cfg["server"]["port"] == 8080
+    assert cfg.meta["origin"] == "s3://configs/app.json"
+    assert cfg.meta["filepath"] == "s3://configs/app.json"
+    assert cfg.meta["etag"]
+    assert not cfg.meta["from_cache"]
+    cfg = cfg_load.load("s3://configs/app.json", cache_dir=str(tmpdir))
+    assert cfg.meta["from_cache"]
+
+
+def test_load_config_from_http_sniffs_format(requests_mock, tmpdir):
+    pytest.importorskip("msgpack")
+    # Third party
+    import msgpack
+
+    source = "https://example.com/config"
+    requests_mock.get(source, content=msgpack.packb({"a": 1}))
+    assert cfg_load.load(source, load_raw=True, cache_dir=str(tmpdir)) == {"a": 1}
+
+
+@mock_s3
+def test_load_directory_aws_s3(tmpdir):
+    conn = boto3.resource("s3", region_name="us-east-1")
+    conn.create_bucket(Bucket="models")
+    for i in range(20):
+        conn.Object("models", f"v3/shards/shard-{i:04d}.bin").put(Body=b"x" * i)
+    conn.Object("models", "v4/other.bin").put(Body=b"other")
+    sink = os.path.join(str(tmpdir), "model")
+    stats = cfg_load.remote.load_directory("s3://models/v3/", sink, workers=4)
+    assert (stats.files, stats.downloaded, stats.skipped) == (20, 20, 0)
+    assert stats.bytes == sum(range(20))
+    with open(os.path.join(sink, "shards", "shard-0003.bin"), "rb") as f:
+        assert f.read() == b"xxx"
+    assert not os.path.exists(os.path.join(sink, "other.bin"))
+
+    # Unchanged files are skipped
+    stats = cfg_load.remote.load_directory("s3://models/v3/", sink, "load_always")
+    assert (stats.downloaded, stats.skipped) == (0, 20)
+
+    # Changed files are downloaded again with 'load_always'
+    conn.Object("models", "v3/shards/shard-0003.bin").put(Body=b"yyy")
+    stats = cfg_load.remote.load_directory("s3://models/v3/", sink)
+    assert stats.downloaded == 0
+    stats = cfg_load.remote.load_directory("s3://models/v3/", sink, "load_always")
+    assert (stats.downloaded, stats.bytes) == (1, 3)
+    with open(os.path.join(sink, "shards", "shard-0003.bin"), "rb") as f:
+        assert f.read() == b"yyy"
+
+
+def test_load_directory_manifest(requests_mock, tmpdir):
+    source = "https://example.com/model/"
+    requests_mock.get(
+        source + "manifest.json",
+        json={"files": [{"path": "a.bin", "size": 3}, "sub/b.bin"]},
+    )
+    requests_mock.get(source + "a.bin", content=b"aaa")
+    requests_mock.get(source + "sub/b.bin", content=b"bb")
+    sink = os.path.join(str(tmpdir), "model")
+    stats = cfg_load.remote.load_directory(source, sink)
+    assert (stats.downloaded, stats.bytes) == (2, 5)
+    assert stats.bytes_per_second > 0
+    with open(os.path.join(sink, "sub", "b.bin"), "rb") as f:
+        assert f.read() == b"bb"
+
+
+def test_load_directory_outside_of_sink(requests_mock, tmpdir):
+    source = "https://example.com/model/"
+    requests_mock.get(source + "manifest.json", json=["../../evil"])
+    with pytest.raises(ValueError):
+        cfg_load.remote.load_directory(source, str(tmpdir))
+
+
+@mock_s3
+def test_load_url_directory_records_stats(tmpdir):
+    conn = boto3.resource("s3", region_name="us-east-1")
+    conn.create_bucket(Bucket="models")
+    conn.Object("models", "v3/a.bin").put(Body=b"abc")
+    sink = os.path.join(str(tmpdir), "model")
+    config = {"model_load_url": {"source_url": "s3://models/v3/", "sink_path": sink}}
+    meta = {"filepath": "config.yaml", "parse_datetime": None}
+    cfg = cfg_load.Configuration(config, meta)
+    assert cfg.meta["downloads"]["/model_load_url"]["bytes"] == 3
+    assert os.path.isfile(os.path.join(sink, "a.bin"))
+
+
+def test_load_sha256(requests_mock, tmpdir):
+    source = "https://example.com/model.bin"
+    requests_mock.get(source, content=b"model weights")
+    digest = hashlib.sha256(b"model weights").hexdigest()
+    sink = os.path.join(str(tmpdir), "model.bin")
+    cfg_load.remote.load(source, sink, sha256=digest)
+    with open(sink, "rb") as f:
+        assert f.read() == b"model weights"
+    # The digest is cached, the existing file is not downloaded again
+    assert cfg_load.remote.file_digest(sink) == digest
+    cfg_load.remote.load(source, sink, sha256=digest)
+    assert requests_mock.call_count == 1
+
+
+def test_load_checksum_mismatch(requests_mock, tmpdir):
+    source = "https://example.com/model.bin"
+    requests_mock.get(source, content=b"truncated")
+    sink = os.path.join(str(tmpdir), "model.bin")
+    with pytest.raises(cfg_load.remote.ChecksumError):
+        cfg_load.remote.load(source, sink, md5=hashlib.md5(b"model").hexdigest())
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_load_if_missing_replaces_corrupt_file(requests_mock, tmpdir):
+    source = "https://example.com/model.bin"
+    requests_mock.get(source, content=b"model weights")
+    digest = hashlib.sha256(b"model weights").hexdigest()
+    sink = os.path.join(str(tmpdir), "model.bin")
+    with open(sink, "wb") as f:
+        f.write(b"model wei")
+    cfg_load.remote.load(source, sink, sha256=digest)
+    with open(sink, "rb") as f:
+        assert f.read() == b"model weights"
+
+
+def test_file_digest_sidecar(tmpdir):
+    filepath = os.path.join(str(tmpdir), "data")
+    with open(filepath, "wb") as f:
+        f.write(b"abc")
+    assert (
+        cfg_load.remote.file_digest(filepath, "md5") == hashlib.md5(b"abc").hexdigest()
+    )
+    assert os.path.isfile(filepath + cfg_load.remote.DIGEST_SUFFIX)
+    with open(filepath, "wb") as f:
+        f.write(b"abcd")
+    os.utime(filepath, ns=(0, 1))
+    assert (
+        cfg_load.remote.file_digest(filepath, "md5") == hashlib.md5(b"abcd").hexdigest()
+    )
+
+
+def test_load_http_resumes(range_server, tmpdir):
+    sink = os.path.join(str(tmpdir), "model.bin")
+    digest = hashlib.sha256(range_server.content).hexdigest()
+    range_server.cut_after = 1000
+    with pytest.raises(requests.RequestException):
+        cfg_load.remote.load(range_server.url, sink, sha256=digest)
+    assert not os.path.exists(sink)
+    assert os.path.getsize(sink + cfg_load.remote.PART_SUFFIX) == 1000
+    cfg_load.remote.load(range_server.url, sink, sha256=digest)
+    assert range_server.requests == [None, "bytes=1000-"]
+    with open(sink, "rb") as f:
+        assert f.read() == range_server.content
+    assert sorted(os.listdir(str(tmpdir))) == [
+        "model.bin",
+        "model.bin" + cfg_load.remote.DIGEST_SUFFIX,
+    ]
+
+
+def test_load_http_restarts_changed_file(range_server, tmpdir):
+    sink = os.path.join(str(tmpdir), "model.bin")
+    range_server.cut_after = 1000
+    with pytest.raises(requests.RequestException):
+        cfg_load.remote.load(range_server.url, sink)
+    range_server.content = b"new" * 1000
+    range_server.etag = '"v2"'
+    cfg_load.remote.load(range_server.url, sink)
+    with open(sink, "rb") as f:
+        assert f.read() == b"new" * 1000
+
+
+def test_load_http_segments(range_server, tmpdir):
+    sink = os.path.join(str(tmpdir), "model.bin")
+    digest = hashlib.md5(range_server.content).hexdigest()
+    cfg_load.remote.load(range_server.url, sink, md5=digest, segments=4)
+    assert sorted(range_server.requests[1:]) == [
+        "bytes=0-25599",
+        "bytes=25600-51199",
+        "bytes=51200-76799",
+        "bytes=76800-102399",
+    ]
+    with open(sink, "rb") as f:
+        assert f.read() == range_server.content
+
+
+def test_load_http_not_found(requests_mock, tmpdir):
+    source = "https://example.com/missing.bin"
+    requests_mock.get(source, status_code=404)
+    with pytest.raises(requests.HTTPError):
+        cfg_load.remote.load(source, os.path.join(str(tmpdir), "missing.bin"))
+
+
+def test_load_remote_background(requests_mock, tmpdir):
+    release = threading.Event()
+
+    def content(request, context):
+        release.wait(10)
+        return b"weights"
+
+    source = "https://example.com/model.bin"
+    requests_mock.get(source, content=content)
+    sink = os.path.join(str(tmpdir), "model.bin")
+    config = {"model_load_url": {"source_url": source, "sink_path": sink}}
+    meta = {"filepath": "config.yaml", "parse_datetime": None}
+    cfg = cfg_load.Configuration(config, meta, load_remote="background")
+    assert not cfg.remote_ready("model_load_url")
+    release.set()
+    assert cfg.wait_remote("model_load_url", timeout=10) is cfg
+    assert cfg.remote_ready("model_load_url")
+    with open(sink, "rb") as f:
+        assert f.read() == b"weights"
+
+
+def test_wait_remote_raises_download_error(requests_mock, tmpdir):
+    source = "https://example.com/missing.bin"
+    requests_mock.get(source, status_code=404)
+    sink = os.path.join(str(tmpdir), "missing.bin")
+    config = {"model_load_url": {"source_url": source, "sink_path": sink}}
+    meta = {"filepath": "config.yaml", "parse_datetime": None}
+    cfg = cfg_load.Configuration(config, meta, load_remote="background")
+    with pytest.raises(requests.HTTPError):
+        cfg.wait_remote(timeout=10)
+    assert cfg.remote_ready("model_load_url")
+
+
+def test_apply_env_keeps_background_downloads(requests_mock, tmpdir, monkeypatch):
+    release = threading.Event()
+
+    def content(request, context):
+        release.wait(10)
+        return b"weights"
+
+    source = "https://example.com/model.bin"
+    requests_mock.get(source, content=content)
+    sink = os.path.join(str(tmpdir), "model.bin")
+    config = {"model_load_url": {"source_url": source, "sink_path": sink}}
+    meta = {"filepath": "config.yaml", "parse_datetime": None}
+    cfg = cfg_load.Configuration(config, meta, load_remote="background")
+    monkeypatch.setenv("CFG_LOAD_TEST_LEVEL", "DEBUG")
+    env_mapping = [
+        {"env_name": "CFG_LOAD_TEST_LEVEL", "keys": ["level"], "converter": "str"}
+    ]
+    new_cfg = cfg.apply_env(env_mapping)
+    # Returns without waiting and without a second download of the sink
+    assert not new_cfg.remote_ready("model_load_url")
+    assert new_cfg._remote["/model_load_url"] is cfg._remote["/model_load_url"]
+    assert new_cfg.meta["load_remote"] == "background"
+    assert cfg.meta["load_remote"] == "background"
+    assert new_cfg["level"] == "DEBUG"
+    release.set()
+    new_cfg.wait_remote(timeout=10)
+    assert requests_mock.call_count == 1
+
+
+def test_update_downloads_only_new_keys(requests_mock, tmpdir):
+    requests_mock.get("https://example.com/a.bin", content=b"a")
+    requests_mock.get("https://example.com/b.bin", content=b"b")
+    meta = {"filepath": "config.yaml", "parse_datetime": None}
+
+    def entry(name):
+        return {
+            "source_url": f"https://example.com/{name}.bin",
+            "sink_path": os.path.join(str(tmpdir), f"{name}.bin"),
+            "policy": "load_always",
+        }
+
+    cfg = cfg_load.Configuration({"a_load_url": entry("a")}, meta)
+    other = cfg_load.Configuration({"b_load_url": entry("b")}, dict(meta))
+    assert requests_mock.call_count == 2
+    merged = cfg.update(other)
+    assert requests_mock.call_count == 2
+    assert set(merged._remote) == {"/a_load_url", "/b_load_url"}
+
+
+def test_load_remote_same_key_in_two_subtrees(monkeypatch):
+    releases = {name: threading.Event() for name in "abc"}
+
+    def load(source, sink, *args):
+        releases[source].wait(10)
+
+    monkeypatch.setattr(cfg_load.remote, "load", load)
+    config = {
+        "a": {"w_load_url": {"source_url": "a", "sink_path": "a.bin"}},
+        "b": {"w_load_url": {"source_url": "b", "sink_path": "b.bin"}},
+        "c_load_url": {"source_url": "c", "sink_path": "c.bin"},
+    }
+    meta = {"filepath": "config.yaml", "parse_datetime": None}
+    cfg = cfg_load.Configuration(config, meta, load_remote="background")
+    assert set(cfg._remote) == {"/a/w_load_url", "/b/w_load_url", "/c_load_url"}
+    releases["b"].set()
+    cfg.wait_remote("/b/w_load_url", timeout=10)
+    with pytest.raises(concurrent.futures.TimeoutError):
+        cfg.wait_remote(timeout=0.1)
+    assert not cfg.remote_ready("/a/w_load_url")
+    with pytest.raises(KeyError, match="ambiguous"):
+        cfg.remote_ready("w_load_url")
+    releases["a"].set()
+    releases["c"].set()
+    cfg.wait_remote(timeout=10)
+    assert cfg.remote_ready("c_load_url")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+
+"""Test the cfg_load.schema module."""
+
+# Third party
+import pkg_resources
+import pytest
+
+# First party
+import cfg_load
+import cfg_load.schema
+
+
+def test_load_with_schema():
+    filepath = pkg_resources.resource_filename(__name__, "examples/test.toml")
+    schema = pkg_resources.resource_filename(__name__, "examples/server_schema.json")
+    cfg = cfg_load.load(filepath, schema=schema)
+    assert cfg["server"]["workers"] == 4
+
+
+def test_load_with_schema_no_defaults():
+    filepath = pkg_resources.resource_filename(__name__, "examples/test.toml")
+    schema = pkg_resources.resource_filename(__name__, "examples/server_schema.json")
+    cfg = cfg_load.load(filepath, schema=schema, fill_defaults=False)
+    assert "workers" not in cfg["server"]
+
+
+def test_schema_file_is_read_once(tmp_path, monkeypatch):
+    filepath = pkg_resources.resource_filename(__name__, "examples/test.toml")
+    schema = tmp_path / "schema.json"
+    schema.write_text('{"type": "object"}')
+    calls = []
+    load = cfg_load.load
+
+    def counting_load(path, *args, **kwargs):
+        calls.append(path)
+        return load(path, *args, **kwargs)
+
+    monkeypatch.setattr(cfg_load, "load", counting_load)
+    cfg_load.load(filepath, schema=str(schema))
+    cfg_load.load(filepath, schema=str(schema))
+    assert calls.count(str(schema)) == 1
+    schema.write_text('{"type": "object", "required": ["missing"]}')
+    with pytest.raises(cfg_load.schema.ValidationError):
+        cfg_load.load(filepath, schema=str(schema))
+    assert calls.count(str(schema)) == 2
+
+
+def test_environment_overrides_are_validated(tmp_path, monkeypatch):
+    filepath = tmp_path / "config.yaml"
+    filepath.write_text("PORT: 8080\nweights: [0.5, 0.5]\n")
+    schema = {
+        "properties": {
+            "PORT": {"type": "integer", "maximum": 65535},
+            "weights": {"type": "array", "items": {"type": "number"}},
+        }
+    }
+    monkeypatch.setenv("PORT", "70000")
+    with pytest.raises(cfg_load.schema.ValidationError) as exinfo:
+        cfg_load.load(str(filepath), schema=schema, compact_lists=2)
+    assert exinfo.value.errors == [("$.PORT", "expected a value <= 65535, got 70000")]
+    monkeypatch.setenv("PORT", "8081")
+    cfg = cfg_load.load(str(filepath), schema=schema, compact_lists=2)
+    assert cfg["PORT"] == 8081
+
+
+def test_validate_reports_all_errors():
+    schema = {
+        "type": "object",
+        "required": ["name"],
+        "properties": {
+            "port": {"type": "integer", "maximum": 65535},
+            "hosts": {"type": "array", "items": {"type": "string"}},
+            "mode": {"enum": ["fast", "safe"]},
+        },
+        "additionalProperties": False,
+    }
+    config = {"port": 70000, "hosts": ["a", 1], "mode": "slow", "extra": True}
+    with pytest.raises(cfg_load.schema.ValidationError) as exinfo:
+        cfg_load.schema.validate(config, schema)
+    assert sorted(path for path, _ in exinfo.value.errors) == [
+        "$",
+        "$.extra",
+        "$.hosts[1]",
+        "$.mode",
+        "$.port",
+    ]
+
+
+def test_validate_any_of_and_strings():
+    schema = {
+        "properties": {
+            "name": {"type": "string", "pattern": "^[a-z]+$", "maxLength": 5},
+            "timeout": {"anyOf": [{"type": "null"}, {"type": "number"}]},
+        }
+    }
+    cfg_load.schema.validate({"name": "abc", "timeout": None}, schema)
+    with pytest.raises(cfg_load.schema.ValidationError) as exinfo:
+        cfg_load.schema.validate({"name": "Abcdefg", "timeout": "1"}, schema)
+    assert len(exinfo.value.errors) == 3
+
+
+def test_compile_schema_is_cached():
+    schema = {"type": "object", "properties": {"a": {"type": "integer"}}}
+    copy = {"properties": {"a": {"type": "integer"}}, "type": "object"}
+    assert cfg_load.schema.compile_schema(schema) is cfg_load.schema.compile_schema(
+        copy
+    )
+
+
+def test_unsupported_keyword():
+    with pytest.raises(NotImplementedError):
+        cfg_load.schema.compile_schema({"unevaluatedProperties": False})
+    with pytest.raises(NotImplementedError):
+        cfg_load.schema.compile_schema({"$ref": "other.json#/$defs/foo"})
+    with pytest.raises(ValueError):
+        cfg_load.schema.compile_schema({"$ref": "#/definitions/foo"})
+
+
+def test_validate_references_and_combinators():
+    schema = {
+        "$defs": {
+            "port": {"type": "integer", "minimum": 1, "maximum": 65535},
+            "node": {
+                "properties": {"children": {"items": {"$ref": "#/$defs/node"}}},
+                "required": ["name"],
+            },
+        },
+        "properties": {
+            "port": {"$ref": "#/$defs/port"},
+            "url": {"type": "string", "format": "uri"},
+            "tree": {"$ref": "#/$defs/node"},
+            "mode": {"oneOf": [{"const": "fast"}, {"const": "safe"}]},
+            "name": {"allOf": [{"type": "string"}, {"minLength": 2}]},
+            "level": {"not": {"const": "TRACE"}},
+        },
+        "patternProperties": {"^x-": {"type": "string"}},
+        "additionalProperties": False,
+    }
+    config = {
+        "port": 8080,
+        "url": "https://example.com",
+        "tree": {"name": "root", "children": [{"name": "leaf", "children": []}]},
+        "mode": "fast",
+        "name": "ab",
+        "level": "INFO",
+        "x-team": "ml",
+    }
+    cfg_load.schema.validate(config, schema)
+    invalid = {
+        "port": 0,
+        "tree": {"children": [{"children": [{}]}]},
+        "mode": "slow",
+        "name": "a",
+        "level": "TRACE",
+        "x-team": 1,
+        "other": 1,
+    }
+    with pytest.raises(cfg_load.schema.ValidationError) as exinfo:
+        cfg_load.schema.validate(invalid, schema)
+    assert sorted(exinfo.value.errors) == [
+        ("$.level", "matches a schema which is not allowed"),
+        ("$.mode", "matches 0 of the schemas, expected exactly one"),
+        ("$.name", "expected at least 2 characters"),
+        ("$.other", "no value is allowed here"),
+        ("$.port", "expected a value >= 1, got 0"),
+        ("$.tree", "missing required property 'name'"),
+        ("$.tree.children[0]", "missing required property 'name'"),
+        ("$.tree.children[0].children[0]", "missing required property 'name'"),
+        ("$.x-team", "expected type 'string', got 'int'"),
+    ]
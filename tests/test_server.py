@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+
+"""Test the cfg_load.server module."""
+
+# Core Library
+import datetime
+import os
+import shutil
+import threading
+
+# Third party
+import pkg_resources
+import pytest
+
+# First party
+import cfg_load
+import cfg_load.server
+
+
+@pytest.fixture
+def server(tmp_path):
+    socket_path = str(tmp_path / "cfg_load.sock")
+    server = cfg_load.server.ConfigServer(socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    source = pkg_resources.resource_filename(__name__, "examples/test.toml")
+    target = tmp_path / "test.toml"
+    shutil.copy(source, target)
+    return str(target)
+
+
+def test_load(server, config_path):
+    with cfg_load.connect(server.socket_path) as client:
+        assert client.ping()
+        cfg = client.load(config_path)
+        assert isinstance(cfg, cfg_load.Configuration)
+        assert cfg == cfg_load.load(config_path)
+        assert cfg.meta["filepath"] == config_path
+        assert cfg.meta["served_from"] == server.socket_path
+        assert client.load(config_path, load_raw=True)["server"]["data_path"] == "data"
+        assert client.get(config_path, "server.port") == 8080
+        assert client.get(config_path, "model.thresholds.2") == 0.9
+
+
+def test_environment_of_the_client(server, config_path, monkeypatch):
+    monkeypatch.setenv("title", "from the client")
+    monkeypatch.setenv("model", '{"thresholds": [0.2]}')
+    with cfg_load.connect(server.socket_path) as client:
+        cfg = client.load(config_path)
+        assert cfg["title"] == "from the client"
+        assert cfg["model"]["thresholds"] == [0.2]
+        assert client.get(config_path, "model.thresholds.0") == 0.2
+        assert client.get(config_path, "server.port") == 8080
+        assert client.load(config_path, load_raw=True)["title"] == "TOML example"
+    # The daemon keeps the configuration without the environment variables
+    entry = server.get_entry(config_path, False, True)
+    assert entry.config["title"] == "TOML example"
+
+
+def test_socket_permissions(server):
+    assert os.stat(server.socket_path).st_mode & 0o777 == 0o600
+
+
+def test_reload_changed_file(server, config_path):
+    with cfg_load.connect(server.socket_path) as client:
+        assert client.get(config_path, "server.port") == 8080
+        with open(config_path) as f:
+            content = f.read()
+        with open(config_path, "w") as f:
+            f.write(content.replace("8080", "9090"))
+        stat = os.stat(config_path)
+        os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert client.get(config_path, "server.port") == 9090
+
+
+def test_errors(server, config_path):
+    with cfg_load.connect(server.socket_path) as client:
+        with pytest.raises(cfg_load.server.RemoteError) as exinfo:
+            client.get(config_path, "server.missing")
+        assert exinfo.value.type_name == "KeyError"
+        with pytest.raises(cfg_load.server.RemoteError) as exinfo:
+            client.load(config_path + ".missing")
+        assert exinfo.value.type_name == "FileNotFoundError"
+        # The connection is still usable after an error
+        assert client.ping()
+
+
+def test_default_socket_path(monkeypatch):
+    monkeypatch.setenv("CFG_LOAD_SOCKET", "/run/foo.sock")
+    assert cfg_load.server.default_socket_path() == "/run/foo.sock"
+    monkeypatch.delenv("CFG_LOAD_SOCKET")
+    monkeypatch.setenv("XDG_RUNTIME_DIR", "/run/user/1000")
+    assert cfg_load.server.default_socket_path() == "/run/user/1000/cfg_load.sock"
+
+
+def test_load_keeps_types(server, tmp_path):
+    config_path = tmp_path / "types.yaml"
+    config_path.write_text(
+        "1: one\nwhen: 2020-01-01\nat: 2020-01-01 12:30:00\n"
+        "nested: {$type: date, value: x}\n"
+    )
+    with cfg_load.connect(server.socket_path) as client:
+        cfg = client.load(str(config_path))
+        assert cfg.to_dict() == cfg_load.load(str(config_path)).to_dict()
+        assert cfg[1] == "one"
+        assert cfg["when"] == datetime.date(2020, 1, 1)
+        assert isinstance(cfg.meta["parse_datetime"], datetime.datetime)
+        assert client.get(str(config_path), "nested") == {
+            "$type": "date",
+            "value": "x",
+        }
+
+
+def test_unsupported_type():
+    with pytest.raises(TypeError):
+        cfg_load.server._dumps({"a": {1, 2}})
+
+
+def test_slow_load_does_not_block_other_files(
+    server, config_path, tmp_path, monkeypatch
+):
+    slow_path = str(tmp_path / "slow.toml")
+    shutil.copy(config_path, slow_path)
+    started = threading.Event()
+    release = threading.Event()
+    load = cfg_load.load
+
+    def slow_load(path, *args, **kwargs):
+        if path == slow_path:
+            started.set()
+            release.wait(10)
+        return load(path, *args, **kwargs)
+
+    monkeypatch.setattr(cfg_load, "load", slow_load)
+    thread = threading.Thread(target=server.get_entry, args=(slow_path, False, True))
+    thread.start()
+    try:
+        assert started.wait(10)
+        with cfg_load.connect(server.socket_path, timeout=5) as client:
+            assert client.get(config_path, "server.port") == 8080
+    finally:
+        release.set()
+        thread.join()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+"""Test the cfg_load.shared module."""
+
+# Core Library
+import multiprocessing
+import os
+import sys
+from datetime import date
+
+# Third party
+import pkg_resources
+import pytest
+
+# First party
+import cfg_load
+import cfg_load.shared
+
+
+@pytest.fixture
+def shared():
+    filepath = pkg_resources.resource_filename(__name__, "examples/test.json")
+    cfg = cfg_load.load(filepath, load_remote=False)
+    shared = cfg.to_shared()
+    yield cfg, shared
+    shared.close()
+    shared.unlink()
+
+
+def test_share(shared):
+    cfg, shared = shared
+    assert shared == cfg
+    assert shared.to_dict() == cfg.to_dict()
+    assert list(shared) == list(cfg)
+    assert shared["train"]["data_augmentation"]["zoom_range"] == 0
+    assert shared["foo_list"][-1] == 3
+    assert shared["foo_list"] == [1, 2, 3]
+    assert shared["umlautüößhere"] == "wörks"
+    assert shared.meta == cfg.meta
+    assert shared.pformat() == cfg.pformat()
+    assert isinstance(shared.to_configuration(), cfg_load.Configuration)
+    assert "foo" in shared
+    assert "missing" not in shared
+    with pytest.raises(KeyError):
+        shared["missing"]
+    with pytest.raises(TypeError):
+        shared["foo"] = "bar"
+
+
+def test_encode_scalars():
+    config = {
+        "none": None,
+        "bools": [True, False],
+        "big": 2**100,
+        "negative": -(2**63),
+        "bytes": b"\x00\x01",
+        "date": date(2020, 1, 1),
+        1: "int key",
+        "nested": {"list": [[1], {"a": "b"}], "empty": {}},
+    }
+    data = cfg_load.shared.encode(config, {"filepath": "foo.yaml"})
+    root, meta = cfg_load.shared.decode(data)
+    assert meta == {"filepath": "foo.yaml"}
+    assert root.to_dict() == config
+    assert root[1] == "int key"
+
+
+def test_equal_scalars_are_stored_once():
+    value = "x" * 1000
+    data = cfg_load.shared.encode({"a": value, "b": [value, value]})
+    assert len(data) < 1100
+
+
+def _read_in_worker(shared, queue):
+    queue.put(shared["train"]["epochs"])
+
+
+def _attach_in_worker(name, queue):
+    shared = cfg_load.shared.attach(name)
+    queue.put(shared["model"]["script_path"])
+    shared.close()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fork is not available")
+def test_forked_workers_read_shared_memory(shared):
+    _, shared = shared
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    workers = [
+        context.Process(target=_read_in_worker, args=(shared, queue)) for _ in range(3)
+    ]
+    for worker in workers:
+        worker.start()
+    results = [queue.get(timeout=10) for _ in workers]
+    for worker in workers:
+        worker.join()
+    assert results == [1000, 1000, 1000]
+
+
+def test_attach(shared):
+    cfg, shared = shared
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    worker = context.Process(target=_attach_in_worker, args=(shared.name, queue))
+    worker.start()
+    assert queue.get(timeout=20) == cfg["model"]["script_path"]
+    worker.join()
+    if sys.platform.startswith("linux"):
+        # The worker must not have removed the block
+        assert os.path.exists(f"/dev/shm/{shared.name.lstrip('/')}")
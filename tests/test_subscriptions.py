@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+"""Test the cfg_load.subscriptions module."""
+
+# Core Library
+import os
+import shutil
+from unittest.mock import patch
+
+# Third party
+import pkg_resources
+
+# First party
+import cfg_load
+import cfg_load.compact
+
+
+def load_toml():
+    filepath = pkg_resources.resource_filename(__name__, "examples/test.toml")
+    return cfg_load.load(filepath)
+
+
+def test_subscribe_update():
+    cfg = load_toml()
+    server_events, model_events = [], []
+    cfg.subscribe("server", server_events.append)
+    cfg.subscribe(["model", "thresholds"], model_events.append)
+    other = cfg_load.Configuration(
+        {"server": {"port": 9090}}, dict(cfg.meta), load_remote=False
+    )
+    new_cfg = cfg.update(other)
+    assert len(server_events) == 1
+    assert server_events[0].keys == ("server",)
+    assert server_events[0].old["port"] == 8080
+    assert server_events[0].new["port"] == 9090
+    assert server_events[0].config is new_cfg
+    assert model_events == []
+
+
+def test_subscriptions_are_shared():
+    cfg = load_toml()
+    events = []
+    subscription = cfg.subscribe("server.port", events.append)
+    cfg = cfg.patch([{"op": "replace", "path": "/server/port", "value": 1}])
+    cfg = cfg.patch([{"op": "replace", "path": "/server/port", "value": 2}])
+    assert [event.new for event in events] == [1, 2]
+    subscription.cancel()
+    cfg.patch([{"op": "replace", "path": "/server/port", "value": 3}])
+    assert len(events) == 2
+
+
+def test_subscribe_apply_env():
+    cfg = load_toml()
+    events = []
+    cfg.subscribe("model.thresholds.0", events.append)
+    env_mapping = [
+        {"env_name": "THRESHOLD", "keys": ["title"], "converter": "str"},
+    ]
+    with patch.dict(os.environ, {"THRESHOLD": "new title"}):
+        cfg.apply_env(env_mapping)
+    assert events == []
+
+
+def test_subscribe_added_and_removed():
+    cfg = load_toml()
+    events = []
+    cfg.subscribe("cache", events.append)
+    cfg = cfg.patch([{"op": "add", "path": "/cache", "value": {"size": 1}}])
+    cfg = cfg.patch([{"op": "remove", "path": "/cache"}])
+    assert [(event.old, event.new) for event in events] == [
+        (None, {"size": 1}),
+        ({"size": 1}, None),
+    ]
+
+
+def test_failing_callback_does_not_stop_others():
+    cfg = load_toml()
+    events = []
+
+    def fail(event):
+        raise RuntimeError("broken component")
+
+    cfg.subscribe("server", fail)
+    cfg.subscribe("server", events.append)
+    cfg.patch([{"op": "replace", "path": "/server/port", "value": 1}])
+    assert len(events) == 1
+
+
+def test_reload(tmpdir):
+    source = pkg_resources.resource_filename(__name__, "examples/test.toml")
+    filepath = os.path.join(str(tmpdir), "test.toml")
+    shutil.copy(source, filepath)
+    cfg = cfg_load.load(filepath)
+    events = []
+    cfg.subscribe("title", events.append)
+    cfg.subscribe("server", events.append)
+    with open(filepath) as f:
+        content = f.read()
+    with open(filepath, "w") as f:
+        f.write(content.replace("TOML example", "Reloaded"))
+    new_cfg = cfg.reload()
+    assert new_cfg["title"] == "Reloaded"
+    assert [event.keys for event in events] == [("title",)]
+
+
+def test_reload_keeps_load_options(tmpdir):
+    filepath = tmpdir.join("model.json")
+    filepath.write('{"weights": [' + ", ".join(["0.5"] * 300) + "]}")
+    schema = {"properties": {"threshold": {"type": "number", "default": 0.5}}}
+    cfg = cfg_load.load(str(filepath), schema=schema, compact_lists=True)
+    events = []
+    cfg.subscribe("weights", events.append)
+    cfg.subscribe("threshold", events.append)
+    new_cfg = cfg.reload()
+    assert events == []
+    assert isinstance(new_cfg["weights"], cfg_load.compact.FrozenArray)
+    assert new_cfg["threshold"] == 0.5
+    assert cfg.reload(compact_lists=False)["weights"] == [0.5] * 300
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+"""Test the cfg_load.timing module."""
+
+# Third party
+import pkg_resources
+
+# First party
+import cfg_load
+import cfg_load.timing
+
+
+def test_load_records_timings():
+    filepath = pkg_resources.resource_filename(__name__, "examples/test.toml")
+    cfg = cfg_load.load(filepath)
+    assert set(cfg.meta["timings"]) == {
+        "read",
+        "parse",
+        "make_paths_absolute",
+        "load_env",
+        "copy",
+        "load_modules",
+        "load_remote",
+    }
+    assert all(duration >= 0 for duration in cfg.meta["timings"].values())
+    with open(filepath, "rb") as f:
+        assert cfg.meta["bytes"] == len(f.read())
+    # root, 2 values, server with 3 values, model with a list of 3 numbers
+    assert cfg.meta["nodes"] == 12
+
+
+def test_hooks():
+    events = []
+    hook = cfg_load.timing.add_hook(events.append)
+    try:
+        filepath = pkg_resources.resource_filename(__name__, "examples/test.toml")
+        cfg_load.load(filepath, load_remote=False)
+    finally:
+        cfg_load.timing.remove_hook(hook)
+    names = [event.name for event in events]
+    assert names == [
+        "read",
+        "parse",
+        "make_paths_absolute",
+        "load_env",
+        "copy",
+        "load_modules",
+    ]
+    assert events[0].attributes["bytes"] > 0
+    assert events[1].attributes["format"] == "toml"
+    assert all(event.filepath == filepath for event in events)
+    assert all(event.end_time_ns >= event.start_time_ns for event in events)
+
+
+def test_statsd_hook():
+    class FakeStatsClient:
+        def __init__(self):
+            self.calls = []
+
+        def timing(self, name, milliseconds):
+            self.calls.append((name, milliseconds))
+
+    client = FakeStatsClient()
+    timer = cfg_load.timing.Timer()
+    hook = cfg_load.timing.add_hook(cfg_load.timing.statsd_hook(client, "app"))
+    try:
+        with timer.phase("parse"):
+            pass
+        with timer.phase("download", record=False):
+            pass
+    finally:
+        cfg_load.timing.remove_hook(hook)
+    assert [name for name, _ in client.calls] == ["app.parse", "app.download"]
+    assert list(timer.timings) == ["parse"]
+
+
+def test_count_nodes():
+    assert cfg_load.timing.count_nodes({"a": [1, 2], "b": {"c": None}}) == 6
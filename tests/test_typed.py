@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+
+"""Test the cfg_load.typed module."""
+
+# Core Library
+import json
+import pickle
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Third party
+import pkg_resources
+import pytest
+
+# First party
+import cfg_load
+import cfg_load.typed
+from cfg_load.schema import ValidationError
+
+
+@dataclass(frozen=True)
+class Server:
+    host: str
+    port: int
+    debug: bool = False
+
+
+@dataclass(frozen=True)
+class Model:
+    thresholds: List[float] = field(default_factory=list)
+    name: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    title: str
+    server: Server
+    model: Model
+    labels: Dict[str, int] = field(default_factory=dict)
+
+
+def load_schema():
+    path = pkg_resources.resource_filename(__name__, "examples/server_schema.json")
+    with open(path) as stream:
+        return json.load(stream)
+
+
+def test_as_typed_dataclass():
+    filepath = pkg_resources.resource_filename(__name__, "examples/test.toml")
+    cfg = cfg_load.load(filepath)
+    typed = cfg.as_typed(AppConfig)
+    assert typed.server == Server(host="localhost", port=8080)
+    assert typed.model.thresholds == [0.1, 0.5, 0.9]
+    assert typed.model.name is None
+
+
+def test_as_typed_dataclass_coercion():
+    config = {
+        "title": 1,
+        "server": {"host": "h", "port": "80", "debug": "yes"},
+        "model": {"thresholds": ["0.5", 1]},
+        "labels": {"a": "1"},
+    }
+    typed = cfg_load.typed.as_typed(config, AppConfig)
+    assert typed.title == "1"
+    assert typed.server.port == 80
+    assert typed.server.debug is True
+    assert typed.model.thresholds == [0.5, 1.0]
+    assert typed.labels == {"a": 1}
+
+
+def test_as_typed_dataclass_errors():
+    config = {"title": "t", "server": {"port": "eighty"}, "model": {}}
+    with pytest.raises(ValidationError) as exinfo:
+        cfg_load.typed.as_typed(config, AppConfig)
+    assert sorted(exinfo.value.errors) == [
+        ("$.server", "missing required property 'host'"),
+        ("$.server.port", "can not convert 'eighty' to int"),
+    ]
+
+
+def test_as_typed_schema():
+    filepath = pkg_resources.resource_filename(__name__, "examples/test.toml")
+    cfg = cfg_load.load(filepath)
+    typed = cfg.as_typed(load_schema())
+    assert typed.server.host == "localhost"
+    assert typed.server.port == 8080
+    assert typed.server.workers == 4
+    assert not hasattr(typed.server, "__dict__")
+    assert typed.server.__slots__ == ("host", "port", "workers")
+    with pytest.raises(AttributeError):
+        typed.server.port = 1
+    assert typed == cfg.as_typed(load_schema())
+    assert pickle.loads(pickle.dumps(typed)) == typed
+
+
+def test_as_typed_schema_is_smaller_than_dict():
+    schema = {"properties": {name: {"type": "integer"} for name in "abcdefgh"}}
+    config = {name: i for i, name in enumerate("abcdefgh")}
+    typed = cfg_load.typed.as_typed(config, schema)
+    assert sys.getsizeof(typed) < sys.getsizeof(config)
+
+
+def test_as_typed_schema_classes_are_cached():
+    schema = {"title": "point", "properties": {"x": {"type": "number"}}}
+    first = cfg_load.typed.as_typed({"x": 1}, schema)
+    second = cfg_load.typed.as_typed({"x": "2.5"}, dict(schema))
+    assert type(first) is type(second)
+    assert type(first).__name__ == "Point"
+    assert (first.x, second.x) == (1.0, 2.5)
+
+
+def test_as_typed_invalid_spec():
+    with pytest.raises(TypeError):
+        cfg_load.typed.as_typed({}, int)
+
+
+def test_as_typed_rejects_containers_for_scalars():
+    config = {"title": {"a": 1}, "server": {"host": ["h"], "port": 80}, "model": {}}
+    with pytest.raises(ValidationError) as exinfo:
+        cfg_load.typed.as_typed(config, AppConfig)
+    assert sorted(exinfo.value.errors) == [
+        ("$.server.host", "can not convert ['h'] to str"),
+        ("$.title", "can not convert {'a': 1} to str"),
+    ]
+
+
+def test_as_typed_schema_attribute_collision():
+    schema = {"properties": {"a-b": {"type": "string"}, "a_b": {"type": "string"}}}
+    with pytest.raises(ValueError, match="'a-b', 'a_b' -> 'a_b'"):
+        cfg_load.typed.as_typed({"a-b": "x", "a_b": "y"}, schema)
+
+
+@dataclass(frozen=True)
+class Pairs:
+    pair: Tuple[int, str]
+    sizes: Tuple[int, ...] = ()
+
+
+def test_as_typed_tuples():
+    typed = cfg_load.typed.as_typed({"pair": ["1", "a"], "sizes": ["1", 2]}, Pairs)
+    assert typed == Pairs(pair=(1, "a"), sizes=(1, 2))
+    with pytest.raises(ValidationError) as exinfo:
+        cfg_load.typed.as_typed({"pair": [1, "a", "b"]}, Pairs)
+    assert exinfo.value.errors == [("$.pair", "expected 2 items, got 3")]
+
+
+def test_as_typed_schema_optional_properties():
+    schema = {
+        "properties": {
+            "a": {"type": "integer"},
+            "db": {"type": "object", "properties": {"host": {"type": "string"}}},
+            "tags": {"type": "array", "items": {"type": "string"}},
+        }
+    }
+    typed = cfg_load.typed.as_typed({"a": 1}, schema)
+    assert (typed.a, typed.db, typed.tags) == (1, None, None)